@@ -1,21 +1,42 @@
 import httpx
 import allure
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Callable, Iterable, Iterator, List, Union
 from config.settings import Settings
 from utils.http_logger import LogHTTPResponse
-import time
+from clients.api_response import APIResponse
+from clients.node_ledger import node_ledger
+from clients.node_waiter import ABSENT, NodeStatusTracker, NodeWaitError, statuses_from_list
+from clients.pagination import (
+    DEFAULT_LOOKAHEAD, DEFAULT_PAGE_SIZE, PrefetchedRequest, TimeWindow, iter_items, iter_pages
+)
+from clients.transport_pool import transport_registry
+from utils.attachment_buffer import http_attachments
+from utils.http_metrics import http_metrics
+from utils.node_timeline import node_timeline
+from utils.clock import VIRTUAL_TIME_HEADER, clock
 from control_panel.node import NodeState
+from datetime import datetime
 
 
-class APIClient:
+class BaseAPIClient:
+    """
+    Request building shared by APIClient and AsyncAPIClient: headers, bound tokens, query
+    parameters, reporting. Subclasses provide the httpx client and the sending itself.
+    """
 
     def __init__(self, base_url: str, token: Optional[str] = None, refresh_token: Optional[str] = None, api_key: Optional[str] = None):
         self.base_url = base_url.rstrip('/')
         self.token = token
         self.refresh_token = refresh_token
         self.api_key = api_key
-        self.client = httpx.Client(timeout=30.0)
+        self.client = self._create_client()
         self.headers = self._get_headers()
+        self._token_source = None
+        self._token_renew = None
+        self._bound_token = None
+
+    def _create_client(self) -> Union[httpx.Client, httpx.AsyncClient]:
+        raise NotImplementedError
 
     def _get_headers(self, additional_headers: Optional[Dict[str, str]] = None) -> Dict[str, str]:
         headers = {"Content-Type": "application/json"}
@@ -25,90 +46,153 @@ class APIClient:
         
         if self.api_key:
             headers["X-API-Key"] = self.api_key
+
+        if clock.is_virtual:
+            headers[VIRTUAL_TIME_HEADER] = repr(clock.time())
         
         if additional_headers:
             headers.update(additional_headers)
         
         return headers
 
-    def _log_response(self, response: httpx.Response, stage: str) -> httpx.Response:
+    def bind_token_source(self, token_source: Callable[[], Any],
+                          renew: Optional[Callable[[str], Any]] = None):
+        """
+        Keep token/refresh_token current from a TokenBroker-style source (returns a TokenSet).
+
+        The bound token is only replaced while the test has not overridden self.token itself.
+        `renew(rejected_access_token)` is called once when the server answers 401 to a request
+        sent with the bound token, and the request is resent with what it returns.
+        """
+        self._token_source = token_source
+        self._token_renew = renew
+        self._bound_token = self.token = None
+        self._refresh_bound_token()
+
+    def _refresh_bound_token(self):
+        if self._token_source is None or self.token != self._bound_token:
+            return
+        self._use_tokens(self._token_source())
+
+    def _use_tokens(self, tokens):
+        self.token = self._bound_token = tokens.access_token
+        self.refresh_token = tokens.refresh_token
+
+    def _renew_rejected_token(self, response: APIResponse) -> bool:
+        """True when `response` rejected the bound token and a renewed one is in place to resend with."""
+        if response.status_code != 401 or self._token_renew is None or self._bound_token is None:
+            return False
+        # Requests that override Authorization (invalid-token tests) expect their 401.
+        if response.raw.request.headers.get("Authorization") != f"Bearer {self._bound_token}":
+            return False
+        self._use_tokens(self._token_renew(self._bound_token))
+        return True
+
+    def _log_response(self, response: APIResponse, stage: str) -> APIResponse:
+        http_metrics.record_response(response)
         LogHTTPResponse(response, stage)
         return response
 
-    @allure.step("GET {endpoint}")
-    def get(self, endpoint: str, params: Optional[Dict[str, Any]] = None, 
-            headers: Optional[Dict[str, str]] = None) -> httpx.Response:
+    @staticmethod
+    def _attach_request(method: str, params: Optional[Dict[str, Any]], json: Optional[Dict[str, Any]]):
+        if method == "GET":
+            http_attachments.attach(lambda: str(params), "Query Parameters", allure.attachment_type.JSON)
+        elif method != "DELETE":
+            http_attachments.attach(lambda: str(json), "Request Body", allure.attachment_type.JSON)
+
+    @staticmethod
+    def _attach_response(response: APIResponse):
+        http_attachments.attach(response.content, "Response Body", allure.attachment_type.JSON)
+        http_attachments.attach(str(response.status_code), "Status Code", allure.attachment_type.TEXT)
+
+    @staticmethod
+    def _given_params(params: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """Leave out query parameters that are None; httpx would send them as `name=`."""
+        if params is None:
+            return None
+        return {name: value for name, value in params.items() if value is not None}
+
+    def set_cookies(self, cookies: Dict[str, str]):
+        for name, value in cookies.items():
+            self.client.cookies.set(name, value)
+
+    def get_cookies(self) -> Dict[str, str]:
+        return dict(self.client.cookies)
+
+    def clear_cookies(self):
+        self.client.cookies.clear()
+
+
+class APIClient(BaseAPIClient):
+
+    def _create_client(self) -> httpx.Client:
+        return httpx.Client(timeout=30.0, transport=transport_registry.get(self.base_url))
+
+    def _send(self, method: str, endpoint: str, params: Optional[Dict[str, Any]] = None,
+              json: Optional[Dict[str, Any]] = None,
+              headers: Optional[Dict[str, str]] = None) -> APIResponse:
         url = f"{self.base_url}{endpoint}"
+        params = self._given_params(params)
+        self._refresh_bound_token()
+        response = self._exchange(method, url, params, json, headers)
+        if self._renew_rejected_token(response):
+            self._log_response(response, f"{method} {endpoint}")
+            response = self._exchange(method, url, params, json, headers)
+        return self._log_response(response, f"{method} {endpoint}")
+
+    def _exchange(self, method: str, url: str, params: Optional[Dict[str, Any]], json: Optional[Dict[str, Any]],
+                  headers: Optional[Dict[str, str]]) -> APIResponse:
         request_headers = self._get_headers(headers)
-        
-        with allure.step(f"Request: GET {url}"):
-            allure.attach(str(params), "Query Parameters", allure.attachment_type.JSON)
-            response = self.client.get(url, params=params, headers=request_headers)
-            allure.attach(response.text, "Response Body", allure.attachment_type.JSON)
-            allure.attach(str(response.status_code), "Status Code", allure.attachment_type.TEXT)
-        
-        return self._log_response(response, f"GET {endpoint}")
+        with allure.step(f"Request: {method} {url}"):
+            self._attach_request(method, params, json)
+            response = APIResponse(self.client.request(method, url, params=params, json=json, headers=request_headers))
+            self._attach_response(response)
+        return response
 
-    @allure.step("POST {endpoint}")
-    def post(self, endpoint: str, json: Optional[Dict[str, Any]] = None,
-             headers: Optional[Dict[str, str]] = None) -> httpx.Response:
+    def _prefetch(self, endpoint: str, params: Optional[Dict[str, Any]] = None) -> PrefetchedRequest:
+        """Start a GET in the background; reporting happens when its result is taken."""
         url = f"{self.base_url}{endpoint}"
-        request_headers = self._get_headers(headers)
-        
-        with allure.step(f"Request: POST {url}"):
-            allure.attach(str(json), "Request Body", allure.attachment_type.JSON)
-            response = self.client.post(url, json=json, headers=request_headers)
-            allure.attach(response.text, "Response Body", allure.attachment_type.JSON)
-            allure.attach(str(response.status_code), "Status Code", allure.attachment_type.TEXT)
-        
-        return self._log_response(response, f"POST {endpoint}")
+        self._refresh_bound_token()
+        request_headers = self._get_headers()
+
+        def finish(raw: httpx.Response) -> APIResponse:
+            with allure.step(f"GET {endpoint}"), allure.step(f"Request: GET {url}"):
+                self._attach_request("GET", params, None)
+                response = APIResponse(raw)
+                self._attach_response(response)
+            return self._log_response(response, f"GET {endpoint}")
+
+        return PrefetchedRequest(lambda: self.client.get(url, params=params, headers=request_headers), finish)
+
+    @allure.step("GET {endpoint}")
+    def get(self, endpoint: str, params: Optional[Dict[str, Any]] = None, 
+            headers: Optional[Dict[str, str]] = None) -> APIResponse:
+        return self._send("GET", endpoint, params=params, headers=headers)
 
+    @allure.step("POST {endpoint}")
+    def post(self, endpoint: str, json: Optional[Dict[str, Any]] = None,
+             headers: Optional[Dict[str, str]] = None) -> APIResponse:
+        return self._send("POST", endpoint, json=json, headers=headers)
 
     @allure.step("PUT {endpoint}")
     def put(self, endpoint: str, json: Optional[Dict[str, Any]] = None,
-            headers: Optional[Dict[str, str]] = None) -> httpx.Response:
-        url = f"{self.base_url}{endpoint}"
-        request_headers = self._get_headers(headers)
-        
-        with allure.step(f"Request: PUT {url}"):
-            allure.attach(str(json), "Request Body", allure.attachment_type.JSON)
-            response = self.client.put(url, json=json, headers=request_headers)
-            allure.attach(response.text, "Response Body", allure.attachment_type.JSON)
-            allure.attach(str(response.status_code), "Status Code", allure.attachment_type.TEXT)
-        
-        return self._log_response(response, f"PUT {endpoint}")
+            headers: Optional[Dict[str, str]] = None) -> APIResponse:
+        return self._send("PUT", endpoint, json=json, headers=headers)
 
     @allure.step("DELETE {endpoint}")
-    def delete(self, endpoint: str, headers: Optional[Dict[str, str]] = None) -> httpx.Response:
-        url = f"{self.base_url}{endpoint}"
-        request_headers = self._get_headers(headers)
-        
-        with allure.step(f"Request: DELETE {url}"):
-            response = self.client.delete(url, headers=request_headers)
-            allure.attach(response.text, "Response Body", allure.attachment_type.JSON)
-            allure.attach(str(response.status_code), "Status Code", allure.attachment_type.TEXT)
-        
-        return self._log_response(response, f"DELETE {endpoint}")
+    def delete(self, endpoint: str, headers: Optional[Dict[str, str]] = None) -> APIResponse:
+        return self._send("DELETE", endpoint, headers=headers)
 
     @allure.step("PATCH {endpoint}")
     def patch(self, endpoint: str, json: Optional[Dict[str, Any]] = None,
-            headers: Optional[Dict[str, str]] = None) -> httpx.Response:
-        url = f"{self.base_url}{endpoint}"
-        request_headers = self._get_headers(headers)
-        
-        with allure.step(f"Request: PATCH {url}"):
-            allure.attach(str(json), "Request Body", allure.attachment_type.JSON)
-            response = self.client.patch(url, json=json, headers=request_headers)
-            allure.attach(response.text, "Response Body", allure.attachment_type.JSON)
-            allure.attach(str(response.status_code), "Status Code", allure.attachment_type.TEXT)
-        
-        return self._log_response(response, f"PATCH {endpoint}")
+            headers: Optional[Dict[str, str]] = None) -> APIResponse:
+        return self._send("PATCH", endpoint, json=json, headers=headers)
 
     @allure.step("Custom Request {method} {endpoint}")
     def send_custom_request(self, method: str, endpoint: str, 
                            json: Optional[Dict[str, Any]] = None,
                            params: Optional[Dict[str, Any]] = None,
-                           headers: Optional[Dict[str, str]] = None) -> httpx.Response:
+                           headers: Optional[Dict[str, str]] = None) -> APIResponse:
         if method.upper() == "GET":
             return self.get(endpoint, params=params, headers=headers)
         elif method.upper() == "POST":
@@ -122,16 +206,6 @@ class APIClient:
         else:
             raise ValueError(f"Unsupported HTTP method: {method}")
 
-    def set_cookies(self, cookies: Dict[str, str]):
-        for name, value in cookies.items():
-            self.client.cookies.set(name, value)
-
-    def get_cookies(self) -> Dict[str, str]:
-        return dict(self.client.cookies)
-
-    def clear_cookies(self):
-        self.client.cookies.clear()
-
     def close(self):
         self.client.close()
 
@@ -148,47 +222,168 @@ class NodesAPIClient(APIClient):
             base_url=settings.cp_nodes_api_url,
             token=token or settings.api_token
         )
+        self.settings = settings
         self.nodes_list = []
         self.sleep_period = 1
+        self.max_sleep_period = 10
         self.node_status_timeout = 60
+        self.teardown_concurrency = settings.node_teardown_concurrency
 
-    def create_node(self, preset_instance_id: str, preset_override_values: Optional[Dict[str, Any]] = None) -> httpx.Response:
+    def create_node(self, preset_instance_id: str, preset_override_values: Optional[Dict[str, Any]] = None) -> APIResponse:
         payload = {"preset_instance_id": preset_instance_id}
         if preset_override_values:
             payload["preset_override_values"] = preset_override_values
         response = self.post("/v1/ui/nodes", json=payload)
         if response.status_code == 201:
-            self.nodes_list.append(response.json()["deployment_id"])
+            node_id = response.json()["deployment_id"]
+            node_timeline.record_body(response.json())
+            node_ledger.record_created(node_id, self.base_url)
+            self.nodes_list.append(node_id)
         return response
 
-    def list_nodes(self) -> httpx.Response:
-        return self.get("/v1/ui/nodes")
+    def list_nodes(self) -> APIResponse:
+        response = self.get("/v1/ui/nodes")
+        if response.status_code == 200:
+            node_timeline.record_body(response.json())
+        return response
 
-    def get_node(self, node_id: str) -> httpx.Response:
-        return self.get(f"/v1/ui/nodes/{node_id}")
+    def get_node(self, node_id: str) -> APIResponse:
+        response = self.get(f"/v1/ui/nodes/{node_id}")
+        if response.status_code == 200:
+            node_timeline.record_body(response.json())
+        return response
 
-    def schedule_delete_node(self, node_id: str) -> httpx.Response:
+    def schedule_delete_node(self, node_id: str) -> APIResponse:
         operational_node_id = node_id.lower()
         response = self.post(f"/v1/ui/nodes/{node_id}/schedule-delete")
-        if response.status_code == 200 and operational_node_id in self.nodes_list:
-            self.nodes_list.remove(operational_node_id)
+        if response.status_code == 200:
+            node_ledger.record_deleted(node_id, self.base_url)
+            node_timeline.record_body(response.json())
+            if operational_node_id in self.nodes_list:
+                self.nodes_list.remove(operational_node_id)
         return response
 
     def _teardown(self):
-        for node_id in list(self.nodes_list):  # Iterate over copy
-            self.schedule_delete_node(node_id)
+        # Imported here: node_cleanup builds on the async client, which builds on this module.
+        from clients.node_cleanup import delete_nodes
+        delete_nodes(self, self.nodes_list, self.teardown_concurrency)
+
+    def _poll_statuses(self, node_ids: List[str]) -> Optional[Dict[str, Optional[str]]]:
+        """One request per tick: get_node for a single node, list_nodes for several."""
+        if len(node_ids) == 1:
+            response = self.get_node(node_ids[0])
+            if response.status_code == 404:
+                node_timeline.record(node_ids[0], ABSENT)
+                return {}
+            if response.status_code != 200:
+                return None
+            return {node_ids[0]: response.json()["status"]}
+        response = self.list_nodes()
+        if response.status_code != 200:
+            return None
+        return statuses_from_list(response.json())
+
+    @allure.step("Waiting {node_ids} to be {expected_status}")
+    def wait_nodes_until_status(self, node_ids: Iterable[str], expected_status: NodeState,
+                                timeout: int = None) -> Dict[str, Dict[str, float]]:
+        """
+        Wait until every node is in `expected_status`, failing fast on error/deleted.
+
+        Returns, per node, the seconds since the start of the wait at which each state was first seen.
+        """
+        tracker = NodeStatusTracker(
+            node_ids, expected_status,
+            timeout=self.node_status_timeout if timeout is None else timeout,
+            min_interval=self.sleep_period, max_interval=self.max_sleep_period,
+        )
+        while True:
+            statuses = self._poll_statuses(tracker.pending)
+            try:
+                changed = statuses is not None and tracker.observe(statuses)
+            except NodeWaitError:
+                tracker.report(False)
+                raise
+            if tracker.done:
+                tracker.report(True)
+                return tracker.timeline
+            if tracker.remaining() <= 0:
+                tracker.report(False)
+                raise tracker.timeout_error()
+            clock.sleep(tracker.next_delay(changed))
 
     @allure.step("Waiting {node_id} to be {expected_status}")
     def _wait_node_until_status(self, node_id: str, expected_status: NodeState, timeout: int = None):
-        if timeout is None:
-            timeout = self.node_status_timeout
-        start_time = time.time()
-        while time.time() - start_time < timeout:
-            response = self.get_node(node_id)
-            if response.json()["status"] == expected_status:
-                return
-            time.sleep(self.sleep_period)
-        raise Exception(f"Node {node_id} is not {expected_status} after {timeout} seconds")
+        return self.wait_nodes_until_status([node_id], expected_status, timeout)[node_id]
+
+
+class DeploymentsAPIClient(NodesAPIClient):
+    """
+    /v1/ui/deployments and their revisions.
+
+    A deployment is the resource behind a node, so created deployments share the nodes
+    bookkeeping (ledger, teardown, state waits). The iter_* methods are lazy: they request
+    pages of `page_size` while up to `lookahead` more pages are already in flight, and can
+    parse each item, e.g. with `DeploymentRevision.model_validate`.
+    """
+
+    def create_deployment(self, preset_instance_id: str,
+                          preset_override_values: Optional[Dict[str, Any]] = None) -> APIResponse:
+        payload = {"preset_instance_id": preset_instance_id}
+        if preset_override_values:
+            payload["preset_override_values"] = preset_override_values
+        response = self.post("/v1/ui/deployments", json=payload)
+        if response.status_code == 201:
+            node_id = response.json()["deployment_id"]
+            node_timeline.record_body(response.json())
+            node_ledger.record_created(node_id, self.base_url)
+            self.nodes_list.append(node_id)
+        return response
+
+    def list_deployments(self, page: Optional[int] = None, page_size: Optional[int] = None) -> APIResponse:
+        return self.get("/v1/ui/deployments", params={"page": page, "page_size": page_size})
+
+    def iter_deployments(self, page_size: int = DEFAULT_PAGE_SIZE, lookahead: int = DEFAULT_LOOKAHEAD,
+                         parse: Optional[Callable[[dict], Any]] = None) -> Iterator[Any]:
+        pages = iter_pages(
+            lambda page: self._prefetch("/v1/ui/deployments", {"page": page, "page_size": page_size}),
+            page_size, lookahead,
+        )
+        return iter_items(pages, parse)
+
+    def get_deployment(self, deployment_id: str) -> APIResponse:
+        return self.get(f"/v1/ui/deployments/{deployment_id}")
+
+    def schedule_delete_deployment(self, deployment_id: str) -> APIResponse:
+        response = self.post(f"/v1/ui/deployments/{deployment_id}/schedule-delete")
+        if response.status_code == 200:
+            node_timeline.record_body(response.json())
+            node_ledger.record_deleted(deployment_id, self.base_url)
+            if deployment_id.lower() in self.nodes_list:
+                self.nodes_list.remove(deployment_id.lower())
+        return response
+
+    def list_revisions(self, deployment_id: str, page: Optional[int] = None,
+                       page_size: Optional[int] = None) -> APIResponse:
+        return self.get(f"/v1/ui/deployments/{deployment_id}/revisions",
+                        params={"page": page, "page_size": page_size})
+
+    def iter_revisions(self, deployment_id: str, page_size: int = DEFAULT_PAGE_SIZE,
+                       lookahead: int = DEFAULT_LOOKAHEAD,
+                       parse: Optional[Callable[[dict], Any]] = None) -> Iterator[Any]:
+        endpoint = f"/v1/ui/deployments/{deployment_id}/revisions"
+        pages = iter_pages(lambda page: self._prefetch(endpoint, {"page": page, "page_size": page_size}),
+                           page_size, lookahead)
+        return iter_items(pages, parse)
+
+    def get_revision(self, deployment_id: str, revision_id: str) -> APIResponse:
+        return self.get(f"/v1/ui/deployments/{deployment_id}/revisions/{revision_id}")
+
+    def create_revision(self, deployment_id: str, preset_instance_id: str,
+                        preset_override_values: Optional[Dict[str, Any]] = None) -> APIResponse:
+        payload = {"preset_instance_id": preset_instance_id}
+        if preset_override_values:
+            payload["preset_override_values"] = preset_override_values
+        return self.post(f"/v1/ui/deployments/{deployment_id}/revisions", json=payload)
 
 
 class InternalAPIClient(APIClient):
@@ -199,10 +394,10 @@ class InternalAPIClient(APIClient):
             api_key=settings.api_key
         )
 
-    def register_worker(self, worker_id: str, worker_data: Dict[str, Any]) -> httpx.Response:
+    def register_worker(self, worker_id: str, worker_data: Dict[str, Any]) -> APIResponse:
         return self.put(f"/internal/workers/{worker_id}", json=worker_data)
 
-    def confirm_deletion(self, node_id: str) -> httpx.Response:
+    def confirm_deletion(self, node_id: str) -> APIResponse:
         return self.post(f"/internal/nodes/{node_id}/confirm-delete")
 
 
@@ -215,25 +410,44 @@ class AuthAPIClient(APIClient):
             refresh_token=refresh_token
         )
 
-    def login(self, username: Optional[str] = None, password: Optional[str] = None) -> httpx.Response:        
+    def login(self, username: Optional[str] = None, password: Optional[str] = None) -> APIResponse:        
         return self.post("/v1/auth/login", json={"username": username, "password": password})
 
-    def post_refresh(self, refresh_token: str) -> httpx.Response:
+    def post_refresh(self, refresh_token: str) -> APIResponse:
         return self.post("/v1/auth/refresh", json={"refresh_token": refresh_token})
 
-    def logout(self, refresh_token: Optional[str] = None) -> httpx.Response:
+    def logout(self, refresh_token: Optional[str] = None) -> APIResponse:
         payload = {"refresh_token": refresh_token} if refresh_token else {}
         return self.post("/v1/auth/logout", json=payload)
 
-    def get_profile(self) -> httpx.Response:
+    def get_profile(self) -> APIResponse:
         return self.get("/v1/auth/profile")
 
-    def change_password(self, old_password: Optional[str] = None, new_password: Optional[str] = None) -> httpx.Response:
+    def change_password(self, old_password: Optional[str] = None, new_password: Optional[str] = None) -> APIResponse:
         return self.put("/v1/auth/password", json={"old_password": old_password, "new_password": new_password})
 
-    def change_username(self, new_username: Optional[str] = None) -> httpx.Response:
+    def change_username(self, new_username: Optional[str] = None) -> APIResponse:
         return self.put("/v1/auth/username", json={"new_username": new_username})
 
-    def get_audit_log(self, page: Optional[int] = None, page_size: Optional[int] = None) -> httpx.Response:
+    def get_audit_log(self, page: Optional[int] = None, page_size: Optional[int] = None) -> APIResponse:
         params = {"page": page, "page_size": page_size}
         return self.get("/v1/auth/audit-log", params=params)
+
+    def iter_audit_log(self, since: Optional[datetime] = None, until: Optional[datetime] = None,
+                       page_size: int = DEFAULT_PAGE_SIZE, lookahead: int = DEFAULT_LOOKAHEAD,
+                       parse: Optional[Callable[[dict], Any]] = None) -> Iterator[Any]:
+        """
+        Every audit log entry, streamed page by page with `lookahead` pages in flight.
+
+        `since`/`until` narrow the entries to [since, until); see TimeWindow. Entries are
+        dicts unless `parse` is given, e.g. `AuditLogEntry.model_validate`.
+        """
+        window = TimeWindow(since, until)
+        params = window.params()
+        pages = iter_pages(
+            lambda page: self._prefetch("/v1/auth/audit-log", {"page": page, "page_size": page_size, **params}),
+            page_size, lookahead,
+        )
+        for entry in iter_items(pages):
+            if window.contains(entry["timestamp"]):
+                yield parse(entry) if parse else entry
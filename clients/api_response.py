@@ -0,0 +1,51 @@
+import json
+import httpx
+from typing import Any
+
+try:
+    import orjson
+except ImportError:  # optional speedup, see the "speedups" extra
+    orjson = None
+
+
+def loads(data: bytes) -> Any:
+    """Decode JSON with orjson when it is installed, falling back to the stdlib."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+_NOT_DECODED = object()
+
+
+class APIResponse:
+    """
+    httpx.Response wrapper that decodes the JSON body at most once.
+
+    Everything except json() is delegated to the wrapped response, so tests keep using
+    status_code, headers, text etc. as before. The decoded body is cached and shared
+    between callers (logging, assertions, schema validation), so treat it as read-only.
+    """
+
+    __slots__ = ("raw", "_json")
+
+    def __init__(self, response: httpx.Response):
+        self.raw = response
+        self._json = _NOT_DECODED
+
+    def json(self, **kwargs: Any) -> Any:
+        if kwargs:
+            return self.raw.json(**kwargs)
+        if self._json is _NOT_DECODED:
+            self._json = loads(self.raw.content)
+        return self._json
+
+    @property
+    def is_json_decoded(self) -> bool:
+        return self._json is not _NOT_DECODED
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.raw, name)
+
+    def __repr__(self) -> str:
+        return repr(self.raw)
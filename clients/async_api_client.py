@@ -0,0 +1,309 @@
+import asyncio
+import httpx
+import allure
+from typing import Optional, Dict, Any, AsyncIterator, Callable, Iterable, List
+from config.settings import Settings
+from clients.api_client import BaseAPIClient
+from clients.api_response import APIResponse
+from clients.node_ledger import node_ledger
+from clients.node_waiter import ABSENT, NodeStatusTracker, NodeWaitError, statuses_from_list
+from clients.pagination import DEFAULT_LOOKAHEAD, DEFAULT_PAGE_SIZE, TimeWindow, aiter_items, aiter_pages
+from clients.transport_pool import transport_registry
+from utils.clock import clock
+from utils.node_timeline import node_timeline
+from control_panel.node import NodeState
+from datetime import datetime
+
+
+class AsyncAPIClient(BaseAPIClient):
+    """Asyncio twin of APIClient: same request surface, backed by httpx.AsyncClient."""
+
+    def _create_client(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(timeout=30.0, transport=transport_registry.create_async(self.base_url))
+
+    async def _send(self, method: str, endpoint: str, params: Optional[Dict[str, Any]] = None,
+                    json: Optional[Dict[str, Any]] = None,
+                    headers: Optional[Dict[str, str]] = None) -> APIResponse:
+        url = f"{self.base_url}{endpoint}"
+        params = self._given_params(params)
+        self._refresh_bound_token()
+        response = await self._exchange(method, endpoint, url, params, json, headers)
+        if self._renew_rejected_token(response):
+            self._log_response(response, f"{method} {endpoint}")
+            response = await self._exchange(method, endpoint, url, params, json, headers)
+        return self._log_response(response, f"{method} {endpoint}")
+
+    async def _exchange(self, method: str, endpoint: str, url: str, params: Optional[Dict[str, Any]],
+                        json: Optional[Dict[str, Any]], headers: Optional[Dict[str, str]]) -> APIResponse:
+        request_headers = self._get_headers(headers)
+        raw = await self.client.request(method, url, params=params, json=json, headers=request_headers)
+        # Allure nests a step under whichever step started last, so a step held open across the
+        # await would collect the exchanges of concurrent tasks. The exchange is reported as a
+        # whole once it is complete, without yielding to the loop.
+        with allure.step(f"{method} {endpoint}"), allure.step(f"Request: {method} {url}"):
+            self._attach_request(method, params, json)
+            response = APIResponse(raw)
+            self._attach_response(response)
+        return response
+
+    async def get(self, endpoint: str, params: Optional[Dict[str, Any]] = None,
+                  headers: Optional[Dict[str, str]] = None) -> APIResponse:
+        return await self._send("GET", endpoint, params=params, headers=headers)
+
+    async def post(self, endpoint: str, json: Optional[Dict[str, Any]] = None,
+                   headers: Optional[Dict[str, str]] = None) -> APIResponse:
+        return await self._send("POST", endpoint, json=json, headers=headers)
+
+    async def put(self, endpoint: str, json: Optional[Dict[str, Any]] = None,
+                  headers: Optional[Dict[str, str]] = None) -> APIResponse:
+        return await self._send("PUT", endpoint, json=json, headers=headers)
+
+    async def delete(self, endpoint: str, headers: Optional[Dict[str, str]] = None) -> APIResponse:
+        return await self._send("DELETE", endpoint, headers=headers)
+
+    async def patch(self, endpoint: str, json: Optional[Dict[str, Any]] = None,
+                    headers: Optional[Dict[str, str]] = None) -> APIResponse:
+        return await self._send("PATCH", endpoint, json=json, headers=headers)
+
+    async def send_custom_request(self, method: str, endpoint: str,
+                                  json: Optional[Dict[str, Any]] = None,
+                                  params: Optional[Dict[str, Any]] = None,
+                                  headers: Optional[Dict[str, str]] = None) -> APIResponse:
+        if method.upper() == "GET":
+            return await self.get(endpoint, params=params, headers=headers)
+        elif method.upper() == "POST":
+            return await self.post(endpoint, json=json, headers=headers)
+        elif method.upper() == "PUT":
+            return await self.put(endpoint, json=json, headers=headers)
+        elif method.upper() == "PATCH":
+            return await self.patch(endpoint, json=json, headers=headers)
+        elif method.upper() == "DELETE":
+            return await self.delete(endpoint, headers=headers)
+        else:
+            raise ValueError(f"Unsupported HTTP method: {method}")
+
+    async def aclose(self):
+        await self.client.aclose()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.aclose()
+
+
+class AsyncNodesAPIClient(AsyncAPIClient):
+    def __init__(self, settings: Settings, token: Optional[str] = None):
+        super().__init__(
+            base_url=settings.cp_nodes_api_url,
+            token=token or settings.api_token
+        )
+        self.settings = settings
+        self.nodes_list = []
+        self.sleep_period = 1
+        self.max_sleep_period = 10
+        self.node_status_timeout = 60
+        self.teardown_concurrency = settings.node_teardown_concurrency
+
+    async def create_node(self, preset_instance_id: str, preset_override_values: Optional[Dict[str, Any]] = None) -> APIResponse:
+        payload = {"preset_instance_id": preset_instance_id}
+        if preset_override_values:
+            payload["preset_override_values"] = preset_override_values
+        response = await self.post("/v1/ui/nodes", json=payload)
+        if response.status_code == 201:
+            node_id = response.json()["deployment_id"]
+            node_timeline.record_body(response.json())
+            # The ledger fsyncs each entry; off the loop, so concurrent creates don't queue behind it.
+            await asyncio.to_thread(node_ledger.record_created, node_id, self.base_url)
+            self.nodes_list.append(node_id)
+        return response
+
+    async def list_nodes(self) -> APIResponse:
+        response = await self.get("/v1/ui/nodes")
+        if response.status_code == 200:
+            node_timeline.record_body(response.json())
+        return response
+
+    async def get_node(self, node_id: str) -> APIResponse:
+        response = await self.get(f"/v1/ui/nodes/{node_id}")
+        if response.status_code == 200:
+            node_timeline.record_body(response.json())
+        return response
+
+    async def schedule_delete_node(self, node_id: str) -> APIResponse:
+        operational_node_id = node_id.lower()
+        response = await self.post(f"/v1/ui/nodes/{node_id}/schedule-delete")
+        if response.status_code == 200:
+            await asyncio.to_thread(node_ledger.record_deleted, node_id, self.base_url)
+            node_timeline.record_body(response.json())
+            if operational_node_id in self.nodes_list:
+                self.nodes_list.remove(operational_node_id)
+        return response
+
+    async def _teardown(self):
+        semaphore = asyncio.Semaphore(self.teardown_concurrency)
+
+        async def delete(node_id: str):
+            async with semaphore:
+                await self.schedule_delete_node(node_id)
+
+        await asyncio.gather(*(delete(node_id) for node_id in list(self.nodes_list)))
+
+    async def _poll_statuses(self, node_ids: List[str]) -> Optional[Dict[str, Optional[str]]]:
+        if len(node_ids) == 1:
+            response = await self.get_node(node_ids[0])
+            if response.status_code == 404:
+                node_timeline.record(node_ids[0], ABSENT)
+                return {}
+            if response.status_code != 200:
+                return None
+            return {node_ids[0]: response.json()["status"]}
+        response = await self.list_nodes()
+        if response.status_code != 200:
+            return None
+        return statuses_from_list(response.json())
+
+    async def wait_nodes_until_status(self, node_ids: Iterable[str], expected_status: NodeState,
+                                      timeout: int = None) -> Dict[str, Dict[str, float]]:
+        tracker = NodeStatusTracker(
+            node_ids, expected_status,
+            timeout=self.node_status_timeout if timeout is None else timeout,
+            min_interval=self.sleep_period, max_interval=self.max_sleep_period,
+        )
+        # No step around the loop: held open across awaits it would nest concurrent waits (see _send).
+        while True:
+            statuses = await self._poll_statuses(tracker.pending)
+            try:
+                changed = statuses is not None and tracker.observe(statuses)
+            except NodeWaitError:
+                tracker.report(False)
+                raise
+            if tracker.done:
+                tracker.report(True)
+                return tracker.timeline
+            if tracker.remaining() <= 0:
+                tracker.report(False)
+                raise tracker.timeout_error()
+            await clock.asleep(tracker.next_delay(changed))
+
+    async def _wait_node_until_status(self, node_id: str, expected_status: NodeState, timeout: int = None):
+        return (await self.wait_nodes_until_status([node_id], expected_status, timeout))[node_id]
+
+
+class AsyncDeploymentsAPIClient(AsyncNodesAPIClient):
+    """Asyncio twin of DeploymentsAPIClient; the iter_* methods are async generators."""
+
+    async def create_deployment(self, preset_instance_id: str,
+                                preset_override_values: Optional[Dict[str, Any]] = None) -> APIResponse:
+        payload = {"preset_instance_id": preset_instance_id}
+        if preset_override_values:
+            payload["preset_override_values"] = preset_override_values
+        response = await self.post("/v1/ui/deployments", json=payload)
+        if response.status_code == 201:
+            node_id = response.json()["deployment_id"]
+            node_timeline.record_body(response.json())
+            await asyncio.to_thread(node_ledger.record_created, node_id, self.base_url)
+            self.nodes_list.append(node_id)
+        return response
+
+    async def list_deployments(self, page: Optional[int] = None, page_size: Optional[int] = None) -> APIResponse:
+        return await self.get("/v1/ui/deployments", params={"page": page, "page_size": page_size})
+
+    def iter_deployments(self, page_size: int = DEFAULT_PAGE_SIZE, lookahead: int = DEFAULT_LOOKAHEAD,
+                         parse: Optional[Callable[[dict], Any]] = None) -> AsyncIterator[Any]:
+        pages = aiter_pages(lambda page: self.list_deployments(page, page_size), page_size, lookahead)
+        return aiter_items(pages, parse)
+
+    async def get_deployment(self, deployment_id: str) -> APIResponse:
+        return await self.get(f"/v1/ui/deployments/{deployment_id}")
+
+    async def schedule_delete_deployment(self, deployment_id: str) -> APIResponse:
+        response = await self.post(f"/v1/ui/deployments/{deployment_id}/schedule-delete")
+        if response.status_code == 200:
+            node_timeline.record_body(response.json())
+            await asyncio.to_thread(node_ledger.record_deleted, deployment_id, self.base_url)
+            if deployment_id.lower() in self.nodes_list:
+                self.nodes_list.remove(deployment_id.lower())
+        return response
+
+    async def list_revisions(self, deployment_id: str, page: Optional[int] = None,
+                             page_size: Optional[int] = None) -> APIResponse:
+        return await self.get(f"/v1/ui/deployments/{deployment_id}/revisions",
+                              params={"page": page, "page_size": page_size})
+
+    def iter_revisions(self, deployment_id: str, page_size: int = DEFAULT_PAGE_SIZE,
+                       lookahead: int = DEFAULT_LOOKAHEAD,
+                       parse: Optional[Callable[[dict], Any]] = None) -> AsyncIterator[Any]:
+        pages = aiter_pages(lambda page: self.list_revisions(deployment_id, page, page_size), page_size, lookahead)
+        return aiter_items(pages, parse)
+
+    async def get_revision(self, deployment_id: str, revision_id: str) -> APIResponse:
+        return await self.get(f"/v1/ui/deployments/{deployment_id}/revisions/{revision_id}")
+
+    async def create_revision(self, deployment_id: str, preset_instance_id: str,
+                              preset_override_values: Optional[Dict[str, Any]] = None) -> APIResponse:
+        payload = {"preset_instance_id": preset_instance_id}
+        if preset_override_values:
+            payload["preset_override_values"] = preset_override_values
+        return await self.post(f"/v1/ui/deployments/{deployment_id}/revisions", json=payload)
+
+
+class AsyncInternalAPIClient(AsyncAPIClient):
+
+    def __init__(self, settings: Settings):
+        super().__init__(
+            base_url=settings.cp_internal_api_url,
+            api_key=settings.api_key
+        )
+
+    async def register_worker(self, worker_id: str, worker_data: Dict[str, Any]) -> APIResponse:
+        return await self.put(f"/internal/workers/{worker_id}", json=worker_data)
+
+    async def confirm_deletion(self, node_id: str) -> APIResponse:
+        return await self.post(f"/internal/nodes/{node_id}/confirm-delete")
+
+
+class AsyncAuthAPIClient(AsyncAPIClient):
+
+    def __init__(self, settings: Settings, token: Optional[str] = None, refresh_token: Optional[str] = None):
+        super().__init__(
+            base_url=settings.cp_nodes_api_url,
+            token=token,
+            refresh_token=refresh_token
+        )
+
+    async def login(self, username: Optional[str] = None, password: Optional[str] = None) -> APIResponse:
+        return await self.post("/v1/auth/login", json={"username": username, "password": password})
+
+    async def post_refresh(self, refresh_token: str) -> APIResponse:
+        return await self.post("/v1/auth/refresh", json={"refresh_token": refresh_token})
+
+    async def logout(self, refresh_token: Optional[str] = None) -> APIResponse:
+        payload = {"refresh_token": refresh_token} if refresh_token else {}
+        return await self.post("/v1/auth/logout", json=payload)
+
+    async def get_profile(self) -> APIResponse:
+        return await self.get("/v1/auth/profile")
+
+    async def change_password(self, old_password: Optional[str] = None, new_password: Optional[str] = None) -> APIResponse:
+        return await self.put("/v1/auth/password", json={"old_password": old_password, "new_password": new_password})
+
+    async def change_username(self, new_username: Optional[str] = None) -> APIResponse:
+        return await self.put("/v1/auth/username", json={"new_username": new_username})
+
+    async def get_audit_log(self, page: Optional[int] = None, page_size: Optional[int] = None) -> APIResponse:
+        params = {"page": page, "page_size": page_size}
+        return await self.get("/v1/auth/audit-log", params=params)
+
+    async def iter_audit_log(self, since: Optional[datetime] = None, until: Optional[datetime] = None,
+                             page_size: int = DEFAULT_PAGE_SIZE, lookahead: int = DEFAULT_LOOKAHEAD,
+                             parse: Optional[Callable[[dict], Any]] = None) -> AsyncIterator[Any]:
+        window = TimeWindow(since, until)
+        params = window.params()
+        pages = aiter_pages(
+            lambda page: self.get("/v1/auth/audit-log", params={"page": page, "page_size": page_size, **params}),
+            page_size, lookahead,
+        )
+        async for entry in aiter_items(pages):
+            if window.contains(entry["timestamp"]):
+                yield parse(entry) if parse else entry
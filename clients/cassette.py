@@ -0,0 +1,350 @@
+"""
+Record/replay of HTTP interactions for offline API runs.
+
+A cassette is a gzip-compressed JSON-lines file: a version header, then one interaction
+(request fingerprint plus the full response) per line. On load the interactions go into a
+hash index keyed by the normalized request, so replay is a dict lookup:
+
+    method + templated path + canonical query + canonical body hash + auth identity
+
+Normalization is what makes a recording reusable: node ids collapse into the route
+template, JSON bodies are compared with sorted keys, and bearer tokens count as the user
+they were issued to rather than their bytes. Password and secret fields are left out of
+body hashes altogether, so nothing derived from a credential is written. Several
+interactions under one key (polling the same node, logins that only differ in the
+password) replay in recorded order; an exact match on URL, body and token wins over
+order when one is still unused.
+
+Modes:
+    record   - every request goes to the network; the cassette is written from scratch.
+    replay   - nothing goes to the network; a request without a recording raises CassetteMiss.
+    rerecord - recorded requests replay, mismatched ones go to the network and are added;
+               recordings the run did not use are dropped, so run the full selection.
+
+Request bodies are never stored, only their hashes; responses are stored verbatim and
+include issued tokens, so cassettes recorded against a real environment must not be
+committed.
+"""
+import base64
+import binascii
+import gzip
+import hashlib
+import json
+import os
+import re
+import threading
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set
+
+import httpx
+from filelock import FileLock
+
+from utils.endpoints import template_path
+
+CASSETTE_VERSION = 2
+MODES = ("off", "record", "replay", "rerecord")
+# The stored body is already decoded and its length follows from it.
+_DROPPED_HEADERS = frozenset({"content-encoding", "content-length", "transfer-encoding", "connection"})
+# Body fields whose values never go into a hash, not even a salted one.
+_SECRET_FIELD = re.compile(r"password|secret", re.IGNORECASE)
+_REDACTED = "<redacted>"
+
+
+class CassetteMiss(httpx.TransportError):
+    """Replay mode met a request the cassette has no recording for."""
+
+
+def _sha(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def _jwt_claims(token: str) -> Optional[dict]:
+    parts = token.split(".")
+    if len(parts) < 2:
+        return None
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(parts[1] + "=" * (-len(parts[1]) % 4)))
+    except (binascii.Error, ValueError):
+        return None
+    if not isinstance(payload, dict) or "sub" not in payload:
+        return None
+    return payload
+
+
+def _jwt_identity(token: str, issued: Set[str]) -> Optional[str]:
+    """
+    The user a token stands for, and whether the server issued it or a test made it up.
+
+    Tokens from recorded responses come back byte for byte on replay; tampered or
+    generated ones differ every run, so they only keep their subject and shape.
+    """
+    claims = _jwt_claims(token)
+    if claims is None:
+        return None
+    origin = "issued" if _sha(token.encode()) in issued else f"forged{token.count('.') + 1}"
+    return f"{origin}:{claims['sub']}:{claims.get('type', '')}"
+
+
+def _issued_tokens(value) -> Iterable[str]:
+    if isinstance(value, dict):
+        value = list(value.values())
+    if isinstance(value, list):
+        for item in value:
+            yield from _issued_tokens(item)
+    elif isinstance(value, str) and value.count(".") == 2 and _jwt_claims(value) is not None:
+        yield value
+
+
+def auth_identity(request: httpx.Request, issued: Set[str] = frozenset()) -> str:
+    """Who the request is sent as: the token's subject for JWTs, a digest for anything else."""
+    authorization = request.headers.get("Authorization")
+    if authorization is None:
+        return "anonymous"
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() == "bearer":
+        identity = _jwt_identity(token.strip(), issued)
+        if identity:
+            return identity
+    return "raw:" + _sha(authorization.encode())[:16]
+
+
+def _canonical(value, issued: Set[str], exact: bool = False):
+    if isinstance(value, dict):
+        return {key: _REDACTED if _SECRET_FIELD.search(key) else _canonical(item, issued, exact)
+                for key, item in value.items()}
+    if isinstance(value, list):
+        return [_canonical(item, issued, exact) for item in value]
+    if isinstance(value, str) and not exact:
+        # Refresh tokens in bodies differ on every recording; the user they belong to does not.
+        return _jwt_identity(value, issued) or value
+    return value
+
+
+def body_hash(content: bytes, issued: Set[str] = frozenset(), exact: bool = False) -> str:
+    """Digest of a JSON body without its secret fields; `exact` keeps tokens as they are."""
+    if not content:
+        return ""
+    try:
+        document = json.loads(content)
+    except ValueError:
+        return _sha(content)
+    return _sha(json.dumps(_canonical(document, issued, exact), sort_keys=True, separators=(",", ":")).encode())
+
+
+def request_key(request: httpx.Request, issued: Set[str] = frozenset()) -> str:
+    query = "&".join(f"{name}={value}" for name, value in sorted(request.url.params.multi_items()))
+    parts = (request.method.upper(), template_path(request.url.path), query,
+             body_hash(request.read(), issued), auth_identity(request, issued))
+    return _sha("\n".join(parts).encode())
+
+
+def request_fingerprint(request: httpx.Request) -> str:
+    """Exact identity of the request, used to prefer a byte-for-byte match within a key."""
+    parts = (request.method.upper(), str(request.url), body_hash(request.read(), exact=True),
+             request.headers.get("Authorization", ""), request.headers.get("Content-Type", ""))
+    return _sha("\n".join(parts).encode())
+
+
+class Cassette:
+    """Hash index of recorded interactions plus the ones recorded during this run."""
+
+    def __init__(self, path, mode: str = "replay"):
+        if mode not in MODES or mode == "off":
+            raise ValueError(f"cassette mode must be one of {', '.join(MODES[1:])}, got {mode!r}")
+        self.path = Path(path)
+        self.mode = mode
+        self.stats = {"replayed": 0, "recorded": 0, "missed": 0}
+        self._index: Dict[str, List[dict]] = defaultdict(list)
+        # Interactions read from the file, in file order; xdist workers refer to them by position.
+        self._loaded: List[dict] = []
+        self._used = set()
+        self._new: List[dict] = []
+        # Digests of the tokens the server handed out, see _jwt_identity().
+        self._issued: Set[str] = set()
+        self._lock = threading.Lock()
+        if mode != "record":
+            for interaction in self.read(self.path):
+                self._loaded.append(interaction)
+                self._add(interaction)
+
+    @staticmethod
+    def read(path: Path) -> Iterable[dict]:
+        if not path.exists():
+            return []
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            lines = [json.loads(line) for line in f if line.strip()]
+        if not lines or lines[0].get("cassette") != CASSETTE_VERSION:
+            raise ValueError(f"{path} is not a version {CASSETTE_VERSION} cassette")
+        return lines[1:]
+
+    @property
+    def records(self) -> bool:
+        return self.mode in ("record", "rerecord")
+
+    def __len__(self) -> int:
+        return sum(len(interactions) for interactions in self._index.values())
+
+    def _add(self, interaction: dict):
+        self._index[interaction["key"]].append(interaction)
+        if interaction["encoding"] != "utf-8" or not interaction["body"].startswith(("{", "[")):
+            return
+        try:
+            document = json.loads(interaction["body"])
+        except ValueError:
+            return
+        self._issued.update(_sha(token.encode()) for token in _issued_tokens(document))
+
+    def lookup(self, request: httpx.Request) -> Optional[dict]:
+        """The recorded interaction to answer `request` with, or None when it must go to the network."""
+        if self.mode == "record":
+            return None
+        with self._lock:
+            key, fingerprint = request_key(request, self._issued), request_fingerprint(request)
+            candidates = self._index.get(key, [])
+            unused = [item for item in candidates if id(item) not in self._used]
+            exact = [item for item in unused if item["fingerprint"] == fingerprint]
+            chosen = (exact or unused or [None])[0]
+            if chosen is None and self.mode == "replay" and candidates:
+                # Polling past the end of the recording keeps seeing the last state.
+                exact = [item for item in candidates if item["fingerprint"] == fingerprint]
+                chosen = (exact or candidates)[-1]
+            if chosen is None:
+                self.stats["missed"] += 1
+                return None
+            self._used.add(id(chosen))
+            self.stats["replayed"] += 1
+            return chosen
+
+    def record(self, request: httpx.Request, response: httpx.Response) -> dict:
+        """Store a response that was read in full; returns the new interaction."""
+        content = response.content
+        try:
+            body, encoding = content.decode("utf-8"), "utf-8"
+        except UnicodeDecodeError:
+            body, encoding = base64.b64encode(content).decode(), "base64"
+        with self._lock:
+            key = request_key(request, self._issued)
+        interaction = {
+            "key": key,
+            "fingerprint": request_fingerprint(request),
+            "method": request.method,
+            "url": str(request.url),
+            "status": response.status_code,
+            "headers": [[name, value] for name, value in response.headers.multi_items()
+                        if name.lower() not in _DROPPED_HEADERS],
+            "body": body,
+            "encoding": encoding,
+        }
+        with self._lock:
+            self._add(interaction)
+            self._used.add(id(interaction))
+            self._new.append(interaction)
+            self.stats["recorded"] += 1
+        return interaction
+
+    @staticmethod
+    def response(interaction: dict, request: httpx.Request) -> httpx.Response:
+        body = interaction["body"]
+        content = base64.b64decode(body) if interaction["encoding"] == "base64" else body.encode("utf-8")
+        headers = [*interaction["headers"], ["Content-Length", str(len(content))]]
+        # A stream rather than content=, so the client reads (and times) it like a wire response.
+        return httpx.Response(interaction["status"], headers=headers, stream=httpx.ByteStream(content),
+                              request=request)
+
+    def recorded(self) -> List[dict]:
+        """Interactions recorded in this process, e.g. to hand over from an xdist worker."""
+        with self._lock:
+            return list(self._new)
+
+    def replayed(self) -> List[int]:
+        """Positions of the interactions from the file that this process answered requests with."""
+        with self._lock:
+            return [position for position, item in enumerate(self._loaded) if id(item) in self._used]
+
+    def merge(self, interactions: Iterable[dict], stats: Dict[str, int], replayed: Iterable[int] = ()):
+        """Take over what an xdist worker replayed and recorded."""
+        with self._lock:
+            self._used.update(id(self._loaded[position]) for position in replayed)
+            for interaction in interactions:
+                self._add(interaction)
+                self._new.append(interaction)
+            for name, value in stats.items():
+                self.stats[name] = self.stats.get(name, 0) + value
+
+    def save(self):
+        """
+        Write the cassette; in rerecord mode the old interactions this run replayed stay, in
+        file order, and new ones are appended. Recordings nothing asked for are dropped.
+        """
+        if not self.records:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with FileLock(f"{self.path}.lock"):
+            with self._lock:
+                kept = [item for item in self._loaded if id(item) in self._used]
+                interactions = kept + self._new
+            tmp = self.path.with_name(self.path.name + ".tmp")
+            with gzip.open(tmp, "wt", encoding="utf-8") as f:
+                f.write(json.dumps({"cassette": CASSETTE_VERSION}) + "\n")
+                for interaction in interactions:
+                    f.write(json.dumps(interaction, separators=(",", ":")) + "\n")
+            os.replace(tmp, self.path)
+
+
+class CassetteTransport(httpx.BaseTransport, httpx.AsyncBaseTransport):
+    """
+    Answers from the cassette when it can and records what had to go to the network.
+
+    Sits outside retries, so a recording holds the response the client finally saw.
+    """
+
+    def __init__(self, transport, cassette: Cassette):
+        self._transport = transport
+        self.cassette = cassette
+
+    def _replay(self, request: httpx.Request) -> Optional[httpx.Response]:
+        interaction = self.cassette.lookup(request)
+        if interaction is not None:
+            return Cassette.response(interaction, request)
+        if not self.cassette.records:
+            raise CassetteMiss(
+                f"{self.cassette.path} has no recording for {request.method} {request.url.path} "
+                f"(run with CASSETTE_MODE=rerecord to add it)", request=request)
+        return None
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        response = self._replay(request)
+        if response is not None:
+            return response
+        response = self._transport.handle_request(request)
+        try:
+            response.read()
+        finally:
+            response.close()
+        return Cassette.response(self.cassette.record(request, response), request)
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        response = self._replay(request)
+        if response is not None:
+            return response
+        response = await self._transport.handle_async_request(request)
+        try:
+            await response.aread()
+        finally:
+            await response.aclose()
+        return Cassette.response(self.cassette.record(request, response), request)
+
+    def close(self):
+        self._transport.close()
+
+    async def aclose(self):
+        await self._transport.aclose()
+
+
+def format_cassette_stats(cassette: Optional[Cassette]) -> Optional[str]:
+    if cassette is None:
+        return None
+    stats = cassette.stats
+    return (f"{cassette.path} ({cassette.mode}): {stats['replayed']} replayed, {stats['recorded']} recorded, "
+            f"{stats['missed']} not in the cassette")
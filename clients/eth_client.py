@@ -1,15 +1,224 @@
+import re
 import allure
-from typing import Optional, Dict, Any, List
+import httpx
+from typing import Optional, Dict, Any, List, Iterable, Sequence
 from web3 import Web3
+from web3._utils.blocks import select_method_for_block_identifier
+from web3._utils.method_formatters import get_request_formatters, get_result_formatters
+from web3.datastructures import AttributeDict
+from web3.providers.rpc.utils import ExceptionRetryConfiguration
 from eth_account import Account
 from collections import namedtuple
+from utils.clock import clock
+
+# Many hosted nodes cap batches at 100 calls; geth allows 1000.
+DEFAULT_BATCH_SIZE = 100
+# Same retry policy web3 applies to requests errors, expressed in httpx terms.
+RETRY_CONFIGURATION = ExceptionRetryConfiguration(errors=(httpx.TransportError, httpx.HTTPStatusError))
+# How nodes turn down an oversized batch: geth "batch too large", Erigon "batch limit exceeded",
+# hosted providers "batch size too large" or "maximum batch size exceeded".
+BATCH_LIMIT_MESSAGE = re.compile(r"batch.*(too large|limit|exceed)", re.IGNORECASE)
+
+
+class _HttpxSession:
+    """Stands in for web3's requests-based session manager and posts RPC payloads through httpx."""
+
+    def __init__(self, client: httpx.Client):
+        self.client = client
+
+    def make_post_request(self, endpoint_uri: str, data: bytes, **kwargs) -> bytes:
+        response = self.client.post(endpoint_uri, content=data, headers=kwargs.get("headers"),
+                                    timeout=kwargs.get("timeout", 30.0))
+        response.raise_for_status()
+        return response.content
+
+
+class RPCCallError(Exception):
+    """The node answered one call of a batch with a JSON-RPC error."""
+
+    def __init__(self, method: str, params: Sequence, error: Dict[str, Any]):
+        self.method = method
+        self.params = params
+        self.code = error.get("code")
+        self.message = error.get("message", "")
+        self.data = error.get("data")
+        super().__init__(f"{method}: {self.message} (code {self.code})")
+
+
+def _plain(value):
+    # Same shape as the single-call methods, which return dict(AttributeDict).
+    if isinstance(value, AttributeDict):
+        return dict(value)
+    if isinstance(value, list):
+        return [_plain(item) for item in value]
+    return value
+
+
+class RPCBatch:
+    """
+    Calls queued for as few round trips as possible.
+
+    The getters mirror EthereumClient's and return the call's position in the results.
+    execute() sends the queue as JSON-RPC batch arrays of at most `size` calls; when the node
+    rejects a batch as too large (HTTP 413 or a batch limit error), the chunk is split in half
+    and retried, and later chunks keep the smaller size. Any other answer that is not an array
+    raises RPCCallError. Results come back in queue order, formatted as web3 would.
+    """
+
+    def __init__(self, client: "EthereumClient", size: int):
+        self.client = client
+        self.size = max(size, 1)
+        self.calls: List[tuple] = []
+
+    def __len__(self) -> int:
+        return len(self.calls)
+
+    def add(self, method: str, params: Sequence = ()) -> int:
+        self.calls.append((method, list(get_request_formatters(method)(list(params)))))
+        return len(self.calls) - 1
+
+    def get_block_number(self) -> int:
+        return self.add("eth_blockNumber")
+
+    def get_block(self, block_identifier="latest", full_transactions: bool = False) -> int:
+        method = select_method_for_block_identifier(
+            block_identifier, if_predefined="eth_getBlockByNumber", if_hash="eth_getBlockByHash",
+            if_number="eth_getBlockByNumber")
+        return self.add(method, (block_identifier, full_transactions))
+
+    def get_balance(self, address: str, block_identifier="latest") -> int:
+        return self.add("eth_getBalance", (address, block_identifier))
+
+    def get_transaction_count(self, address: str, block_identifier="latest") -> int:
+        return self.add("eth_getTransactionCount", (address, block_identifier))
+
+    def get_code(self, address: str, block_identifier="latest") -> int:
+        return self.add("eth_getCode", (address, block_identifier))
+
+    def get_transaction(self, tx_hash: str) -> int:
+        return self.add("eth_getTransactionByHash", (tx_hash,))
+
+    def get_transaction_receipt(self, tx_hash: str) -> int:
+        return self.add("eth_getTransactionReceipt", (tx_hash,))
+
+    def get_logs(self, filter_params: Dict[str, Any]) -> int:
+        return self.add("eth_getLogs", (filter_params,))
+
+    def call(self, transaction: Dict[str, Any], block_identifier="latest") -> int:
+        return self.add("eth_call", (transaction, block_identifier))
+
+    def _post(self, chunk: List[tuple], start: int) -> Any:
+        payload = [{"jsonrpc": "2.0", "id": start + offset, "method": method, "params": params}
+                   for offset, (method, params) in enumerate(chunk)]
+        retry = RETRY_CONFIGURATION
+        for attempt in range(retry.retries + 1):
+            # Web3's retry policy for single calls; a batch of reads is as safe to resend.
+            try:
+                response = self.client.http.post(self.client.rpc_url, json=payload)
+                if response.status_code < 500 or attempt == retry.retries:
+                    break
+            except httpx.TransportError:
+                if attempt == retry.retries:
+                    raise
+            clock.sleep(retry.backoff_factor * 2 ** attempt)
+        if response.status_code == 413:
+            return {"error": {"code": 413, "message": "batch too large"}}
+        response.raise_for_status()
+        return response.json()
+
+    @staticmethod
+    def _too_large(error: Dict[str, Any]) -> bool:
+        return error.get("code") == 413 or bool(BATCH_LIMIT_MESSAGE.search(str(error.get("message", ""))))
+
+    def _send(self, chunk: List[tuple], start: int) -> List[Dict[str, Any]]:
+        answer = self._post(chunk, start)
+        if isinstance(answer, list):
+            return answer
+        # A single object instead of an array: the node turned the whole batch down.
+        error = answer.get("error") if isinstance(answer, dict) else None
+        if not isinstance(error, dict):
+            error = {"message": f"expected a batch array, got {answer!r}"}
+        if len(chunk) > 1 and self._too_large(error):
+            half = len(chunk) // 2
+            self.size = min(self.size, half)
+            return self._send(chunk[:half], start) + self._send(chunk[half:], start + half)
+        raise RPCCallError(f"batch of {len(chunk)} calls", [method for method, _ in chunk], error)
+
+    def execute(self, return_errors: bool = False) -> List[Any]:
+        """
+        Results in queue order. A failed call raises its RPCCallError, or with `return_errors`
+        stands in its slot so the other results survive. Null answers (unknown receipt) are None.
+        """
+        responses: Dict[int, Dict[str, Any]] = {}
+        start = 0
+        with allure.step(f"Send {len(self.calls)} JSON-RPC calls in batches of up to {self.size}"):
+            while start < len(self.calls):
+                chunk = self.calls[start:start + self.size]
+                for response in self._send(chunk, start):
+                    if isinstance(response.get("id"), int):
+                        responses[response["id"]] = response
+                start += len(chunk)
+        self.calls, calls = [], self.calls
+        results = [self._result(method, params, responses.get(index))
+                   for index, (method, params) in enumerate(calls)]
+        errors = [result for result in results if isinstance(result, RPCCallError)]
+        if errors:
+            allure.attach("\n".join(str(error) for error in errors), "Batch Errors", allure.attachment_type.TEXT)
+            if not return_errors:
+                raise errors[0]
+        return results
+
+    def _result(self, method: str, params: Sequence, response: Optional[Dict[str, Any]]):
+        if response is None:
+            return RPCCallError(method, params, {"message": "no answer in the batch response"})
+        if response.get("error") is not None:
+            return RPCCallError(method, params, response["error"])
+        if response.get("result") is None:
+            return None
+        return _plain(get_result_formatters(method, self.client.w3.eth)(response["result"]))
 
 
 class EthereumClient:
 
-    def __init__(self, rpc_url: str):
+    def __init__(self, rpc_url: str, transport: Optional[httpx.BaseTransport] = None,
+                 batch_size: int = DEFAULT_BATCH_SIZE):
         self.rpc_url = rpc_url
-        self.w3 = Web3(Web3.HTTPProvider(rpc_url))
+        self.batch_size = batch_size
+        # Batches go out on their own; web3's provider keeps serving single calls.
+        self.http = httpx.Client(transport=transport, timeout=30.0)
+        if transport is None:
+            self.w3 = Web3(Web3.HTTPProvider(rpc_url))
+            return
+        provider = Web3.HTTPProvider(rpc_url, exception_retry_configuration=RETRY_CONFIGURATION)
+        provider._request_session_manager = _HttpxSession(self.http)
+        self.w3 = Web3(provider)
+
+    def close(self):
+        self.http.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def batch(self, size: Optional[int] = None) -> RPCBatch:
+        """An empty RPCBatch; queue calls on it, then execute() them in as few round trips as the node allows."""
+        return RPCBatch(self, size or self.batch_size)
+
+    @allure.step("Get blocks in batch")
+    def get_blocks(self, block_identifiers: Iterable, full_transactions: bool = False) -> List[Optional[Dict]]:
+        batch = self.batch()
+        for block_identifier in block_identifiers:
+            batch.get_block(block_identifier, full_transactions)
+        return batch.execute()
+
+    @allure.step("Get balances in batch")
+    def get_balances(self, addresses: Iterable[str]) -> List[int]:
+        batch = self.batch()
+        for address in addresses:
+            batch.get_balance(address)
+        return batch.execute()
 
     @allure.step("Check node connectivity")
     def is_connected(self) -> bool:
@@ -85,7 +294,7 @@ class EthereumClient:
     @allure.step("Send raw transaction")
     def send_raw_transaction(self, signed_tx: bytes) -> str:
         tx_hash = self.w3.eth.send_raw_transaction(signed_tx)
-        tx_hash_hex = tx_hash.hex()
+        tx_hash_hex = tx_hash.to_0x_hex()
         allure.attach(tx_hash_hex, "Transaction Hash", allure.attachment_type.TEXT)
         return tx_hash_hex
 
@@ -126,7 +335,7 @@ class EthereumClient:
         })
         
         signed_tx = self.w3.eth.account.sign_transaction(transaction, private_key)
-        tx_hash = self.send_raw_transaction(signed_tx.rawTransaction)
+        tx_hash = self.send_raw_transaction(signed_tx.raw_transaction)
         
         receipt = self.wait_for_transaction_receipt(tx_hash)
         
@@ -148,6 +357,6 @@ class EthereumClient:
         }
         
         signed_tx = self.w3.eth.account.sign_transaction(transaction, from_private_key)
-        tx_hash = self.send_raw_transaction(signed_tx.rawTransaction)
+        tx_hash = self.send_raw_transaction(signed_tx.raw_transaction)
         
         return tx_hash
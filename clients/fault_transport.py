@@ -0,0 +1,297 @@
+"""
+Client-side network degradation, in the spirit of tc/netem.
+
+A FaultProfile is a list of FaultRules matched by endpoint pattern (fnmatch against
+"METHOD /route/{template}", or "RPC eth_method" for JSON-RPC). The first matching rule
+decides the latency, the share of 5xx answers, timeouts and connection resets, and the
+bandwidth cap for a request. Draws come from a seeded random.Random, so a run with the
+same profile, seed and request order degrades the same way. Waits go through the run
+clock, so under VIRTUAL_CLOCK a degraded run costs no wall time.
+"""
+import fnmatch
+import json
+import random
+import threading
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Tuple
+
+import httpx
+
+from utils.clock import clock
+from utils.endpoints import endpoint_key
+
+# Standard deviation of random.paretovariate(3), used to scale pareto jitter.
+_PARETO_ALPHA = 3.0
+_PARETO_MEAN = _PARETO_ALPHA / (_PARETO_ALPHA - 1)
+_PARETO_STDDEV = (_PARETO_ALPHA / ((_PARETO_ALPHA - 1) ** 2 * (_PARETO_ALPHA - 2))) ** 0.5
+DEFAULT_TIMEOUT = 30.0
+
+
+@dataclass(frozen=True)
+class Latency:
+    """Delay of `mean` seconds give or take `jitter`, drawn from a uniform, normal or pareto distribution."""
+    mean: float = 0.0
+    jitter: float = 0.0
+    distribution: str = "normal"
+
+    def sample(self, rng: random.Random) -> float:
+        if not self.jitter:
+            return max(self.mean, 0.0)
+        if self.distribution == "uniform":
+            value = rng.uniform(self.mean - self.jitter, self.mean + self.jitter)
+        elif self.distribution == "pareto":
+            # Heavy tail: most requests close to the mean, a few far above it.
+            value = self.mean + self.jitter * (rng.paretovariate(_PARETO_ALPHA) - _PARETO_MEAN) / _PARETO_STDDEV
+        else:
+            value = rng.gauss(self.mean, self.jitter)
+        return max(value, 0.0)
+
+
+@dataclass(frozen=True)
+class FaultRule:
+    """
+    Degradation for the endpoints matching `pattern`.
+
+    Rates are per request and exclusive: a request is reset, timed out, answered with one of
+    `error_statuses` or passed through. `bandwidth` caps body transfer in bytes per second.
+    """
+    pattern: str = "*"
+    latency: Latency = field(default_factory=Latency)
+    error_rate: float = 0.0
+    error_statuses: Tuple[int, ...] = (502, 503, 504)
+    timeout_rate: float = 0.0
+    reset_rate: float = 0.0
+    bandwidth: int = 0
+
+    def matches(self, endpoint: str) -> bool:
+        return fnmatch.fnmatchcase(endpoint, self.pattern)
+
+
+@dataclass(frozen=True)
+class FaultProfile:
+    name: str
+    rules: Tuple[FaultRule, ...]
+
+    def rule_for(self, endpoint: str) -> Optional[FaultRule]:
+        for rule in self.rules:
+            if rule.matches(endpoint):
+                return rule
+        return None
+
+
+PROFILES = {
+    profile.name: profile for profile in (
+        # A long, lossy path: steady latency, resets and the odd lost response, ~10 Mbit/s.
+        FaultProfile("lossy-wan", (
+            FaultRule("*", Latency(0.08, 0.02, "normal"), error_rate=0.01, timeout_rate=0.005, reset_rate=0.02,
+                      bandwidth=1_250_000),
+        )),
+        # An overloaded ingress: heavy-tailed queueing, 503/504 under load, writes hit hardest.
+        FaultProfile("slow-ingress", (
+            FaultRule("POST *", Latency(0.5, 0.3, "pareto"), error_rate=0.08, error_statuses=(503, 504),
+                      timeout_rate=0.02, bandwidth=262_144),
+            FaultRule("*", Latency(0.25, 0.15, "pareto"), error_rate=0.03, error_statuses=(503, 504),
+                      bandwidth=262_144),
+        )),
+    )
+}
+
+
+def fault_profile(name: str) -> Optional[FaultProfile]:
+    """The named profile, or None for an empty name."""
+    if not name:
+        return None
+    try:
+        return PROFILES[name]
+    except KeyError:
+        raise ValueError(f"Unknown fault profile {name!r}, expected one of {', '.join(sorted(PROFILES))}")
+
+
+class FaultStats:
+    """Per-endpoint count of what was injected, for the run report."""
+
+    FIELDS = ("requests", "errors", "timeouts", "resets")
+
+    def __init__(self):
+        self.profile = ""
+        self.endpoints: Dict[str, Dict[str, float]] = defaultdict(self._empty)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def _empty(cls) -> Dict[str, float]:
+        return {**{name: 0 for name in cls.FIELDS}, "delay": 0.0, "throttled": 0.0}
+
+    def record(self, endpoint: str, **counters):
+        with self._lock:
+            entry = self.endpoints[endpoint]
+            for name, value in counters.items():
+                entry[name] += value
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            return {"profile": self.profile, "endpoints": {key: dict(value) for key, value in self.endpoints.items()}}
+
+    @staticmethod
+    def merge(total: dict, other: dict) -> dict:
+        total["profile"] = total.get("profile") or other.get("profile", "")
+        endpoints = total.setdefault("endpoints", {})
+        for key, counters in other.get("endpoints", {}).items():
+            merged = endpoints.setdefault(key, FaultStats._empty())
+            for name, value in counters.items():
+                merged[name] += value
+        return total
+
+
+fault_stats = FaultStats()
+
+
+class _ThrottledStream(httpx.SyncByteStream, httpx.AsyncByteStream):
+    """Response body delivered no faster than `bandwidth` bytes per second."""
+
+    def __init__(self, stream, bandwidth: int, on_wait):
+        self._stream = stream
+        self._bandwidth = bandwidth
+        self._on_wait = on_wait
+
+    def __iter__(self):
+        for chunk in self._stream:
+            wait = len(chunk) / self._bandwidth
+            clock.sleep(wait)
+            self._on_wait(wait)
+            yield chunk
+
+    async def __aiter__(self):
+        async for chunk in self._stream:
+            wait = len(chunk) / self._bandwidth
+            await clock.asleep(wait)
+            self._on_wait(wait)
+            yield chunk
+
+    def close(self):
+        self._stream.close()
+
+    async def aclose(self):
+        await self._stream.aclose()
+
+
+class FaultTransport(httpx.BaseTransport, httpx.AsyncBaseTransport):
+    """
+    Degrades requests according to a FaultProfile before and after they reach the wire.
+
+    Sits directly on the connection pool, so retries and rate limiting above it see
+    injected failures exactly as they would see real ones. Injected 5xx and timeouts never
+    reach the server; a reset happens after the server got the request, like a dropped
+    keep-alive connection.
+    """
+
+    def __init__(self, transport, profile: FaultProfile, rng: Optional[random.Random] = None, rpc: bool = False,
+                 stats: FaultStats = fault_stats):
+        self._transport = transport
+        self.profile = profile
+        self.rpc = rpc
+        self.stats = stats
+        self._rng = rng or random.Random()
+        self._lock = threading.Lock()
+
+    def _endpoint(self, request: httpx.Request) -> str:
+        if not self.rpc:
+            return endpoint_key(request.method, request.url.path)
+        try:
+            payload = json.loads(request.read())
+        except ValueError:
+            return "RPC unknown"
+        return f"RPC {payload.get('method')}" if isinstance(payload, dict) else "RPC batch"
+
+    def _plan(self, request: httpx.Request):
+        """Decide the fate of one request: (endpoint, rule, delay before sending, fault or None)."""
+        endpoint = self._endpoint(request)
+        rule = self.profile.rule_for(endpoint)
+        if rule is None:
+            return endpoint, None, 0.0, None
+        with self._lock:
+            delay = rule.latency.sample(self._rng)
+            roll = self._rng.random()
+            status = self._rng.choice(rule.error_statuses) if rule.error_statuses else 503
+        if rule.bandwidth:
+            delay += len(request.read()) / rule.bandwidth
+        fault = None
+        if roll < rule.reset_rate:
+            fault = "reset"
+        elif roll < rule.reset_rate + rule.timeout_rate:
+            fault = "timeout"
+        elif roll < rule.reset_rate + rule.timeout_rate + rule.error_rate:
+            fault = status
+        self.stats.record(endpoint, requests=1, delay=delay)
+        return endpoint, rule, delay, fault
+
+    @staticmethod
+    def _timeout(request: httpx.Request) -> float:
+        return (request.extensions.get("timeout") or {}).get("read") or DEFAULT_TIMEOUT
+
+    def _error_response(self, endpoint: str, status: int, request: httpx.Request) -> httpx.Response:
+        self.stats.record(endpoint, errors=1)
+        # Passed as a stream, not json=: a body read up front never closes, and httpx then leaves .elapsed unset.
+        body = json.dumps({"detail": f"Injected by fault profile {self.profile.name}"}).encode()
+        return httpx.Response(status, headers={"Content-Type": "application/json"}, stream=httpx.ByteStream(body),
+                              request=request)
+
+    def _throttle(self, endpoint: str, rule: Optional[FaultRule], response: httpx.Response) -> httpx.Response:
+        if rule is not None and rule.bandwidth:
+            response.stream = _ThrottledStream(response.stream, rule.bandwidth,
+                                               lambda wait: self.stats.record(endpoint, throttled=wait))
+        return response
+
+    def _reset(self, endpoint: str, request: httpx.Request) -> httpx.ReadError:
+        self.stats.record(endpoint, resets=1)
+        return httpx.ReadError("[Errno 104] Connection reset by peer (injected)", request=request)
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        endpoint, rule, delay, fault = self._plan(request)
+        clock.sleep(delay)
+        if fault == "timeout":
+            self.stats.record(endpoint, timeouts=1)
+            clock.sleep(self._timeout(request))
+            raise httpx.ReadTimeout("Read timed out (injected)", request=request)
+        if isinstance(fault, int):
+            return self._error_response(endpoint, fault, request)
+        response = self._transport.handle_request(request)
+        if fault == "reset":
+            response.close()
+            raise self._reset(endpoint, request)
+        return self._throttle(endpoint, rule, response)
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        endpoint, rule, delay, fault = self._plan(request)
+        await clock.asleep(delay)
+        if fault == "timeout":
+            self.stats.record(endpoint, timeouts=1)
+            await clock.asleep(self._timeout(request))
+            raise httpx.ReadTimeout("Read timed out (injected)", request=request)
+        if isinstance(fault, int):
+            return self._error_response(endpoint, fault, request)
+        response = await self._transport.handle_async_request(request)
+        if fault == "reset":
+            await response.aclose()
+            raise self._reset(endpoint, request)
+        return self._throttle(endpoint, rule, response)
+
+    def close(self):
+        self._transport.close()
+
+    async def aclose(self):
+        await self._transport.aclose()
+
+
+def format_fault_stats(stats: dict) -> Optional[str]:
+    endpoints = stats.get("endpoints")
+    if not endpoints:
+        return None
+    lines = [f"profile: {stats.get('profile')}"]
+    for endpoint, counters in sorted(endpoints.items()):
+        lines.append(
+            f"{endpoint}: {int(counters['requests'])} requests, +{counters['delay']:.1f}s latency, "
+            f"+{counters['throttled']:.1f}s throttled, {int(counters['errors'])} 5xx, "
+            f"{int(counters['timeouts'])} timeouts, {int(counters['resets'])} resets"
+        )
+    return "\n".join(lines)
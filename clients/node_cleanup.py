@@ -0,0 +1,78 @@
+import asyncio
+from typing import Dict, Iterable, List
+
+from clients.api_client import NodesAPIClient
+from clients.async_api_client import AsyncNodesAPIClient
+from clients.node_ledger import NodeLedger, node_ledger
+from clients.node_registry import NodeRegistry, RETIRED
+from control_panel.node import NodeState
+from utils.async_bridge import run_sync
+
+# The node is gone or on its way out; nothing left to clean up.
+_GONE_STATES = (NodeState.DELETING, NodeState.DELETED)
+
+
+async def _delete_all(client: AsyncNodesAPIClient, node_ids: List[str], concurrency: int) -> Dict[str, bool]:
+    semaphore = asyncio.Semaphore(max(concurrency, 1))
+
+    async def delete(node_id: str) -> bool:
+        async with semaphore:
+            response = await client.schedule_delete_node(node_id)
+            if response.status_code in (200, 404):
+                return True
+            status = await client.get_node(node_id)
+            return status.status_code == 404 or (
+                status.status_code == 200 and status.json().get("status") in _GONE_STATES
+            )
+
+    results = await asyncio.gather(*(delete(node_id) for node_id in node_ids), return_exceptions=True)
+    return {node_id: result is True for node_id, result in zip(node_ids, results)}
+
+
+def delete_nodes(client: NodesAPIClient, node_ids: Iterable[str], concurrency: int,
+                 ledger: NodeLedger = node_ledger) -> Dict[str, bool]:
+    """
+    Schedule deletion of many nodes at once, at most `concurrency` requests in flight.
+
+    Runs the requests as tasks on an event loop of their own, also when called from a running
+    one; the async client reports each exchange as one step once it completes, so concurrent
+    deletions do not nest in each other's steps.
+    Returns whether each node is gone or being deleted; those are closed in the ledger and
+    dropped from the client's nodes_list.
+    """
+    node_ids = list(node_ids)
+    if not node_ids:
+        return {}
+    client._refresh_bound_token()
+
+    async def run() -> Dict[str, bool]:
+        async with AsyncNodesAPIClient(client.settings, token=client.token) as async_client:
+            return await _delete_all(async_client, node_ids, concurrency)
+
+    results = run_sync(run())
+    for node_id, gone in results.items():
+        if gone:
+            ledger.record_deleted(node_id, client.base_url)
+            if node_id.lower() in client.nodes_list:
+                client.nodes_list.remove(node_id.lower())
+    return results
+
+
+def reap_orphans(client: NodesAPIClient, ledger: NodeLedger = node_ledger, concurrency: int = 8) -> Dict[str, List[str]]:
+    """Delete nodes that earlier, killed runs created against this environment and never removed."""
+    entries = ledger.outstanding(api_url=client.base_url)
+    results = delete_nodes(client, [entry["node_id"] for entry in entries], concurrency, ledger)
+    ledger.compact()
+    return {
+        "deleted": [node_id for node_id, gone in results.items() if gone],
+        "failed": [node_id for node_id, gone in results.items() if not gone],
+    }
+
+
+def delete_registered_nodes(client: NodesAPIClient, registry: NodeRegistry, concurrency: int = 8) -> List[str]:
+    """Delete every pool node of the run; called once, by the controller. Returns the nodes left behind."""
+    results = delete_nodes(client, [row["node_id"] for row in registry.nodes()], concurrency)
+    for node_id, gone in results.items():
+        if gone:
+            registry.set_state(node_id, RETIRED)
+    return [node_id for node_id, gone in results.items() if not gone]
@@ -0,0 +1,111 @@
+import json
+import os
+import socket
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from filelock import FileLock
+
+from config.settings import Settings
+
+CREATED = "created"
+DELETED = "deleted"
+
+
+class NodeLedger:
+    """
+    Append-only JSON-lines record of every node this checkout created and deleted.
+
+    Each event is a single small O_APPEND write, so a killed run loses at most the line being
+    written. Appends and compaction take the same file lock, so an event appended by another
+    worker or run can never land between compaction's read and its replace. Replaying the
+    file gives the nodes that were created but never deleted, which the startup reaper cleans up.
+    """
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = Path(path) if path else None
+
+    def configure(self, settings: Settings, root: Path):
+        self.path = root / settings.node_ledger_path if settings.node_ledger_path else None
+
+    def _lock(self) -> FileLock:
+        return FileLock(str(self.path) + ".lock")
+
+    def _append(self, event: str, node_id: str, api_url: str):
+        if self.path is None:
+            return
+        entry = {
+            "ts": time.time(),
+            "event": event,
+            "node_id": node_id.lower(),
+            "api_url": api_url,
+            "host": socket.gethostname(),
+            "pid": os.getpid(),
+        }
+        with self._lock():
+            fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                os.write(fd, (json.dumps(entry) + "\n").encode())
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+
+    def record_created(self, node_id: str, api_url: str):
+        self._append(CREATED, node_id, api_url)
+
+    def record_deleted(self, node_id: str, api_url: str):
+        self._append(DELETED, node_id, api_url)
+
+    def _replay(self) -> Dict[str, dict]:
+        outstanding: Dict[str, dict] = {}
+        if self.path is None or not self.path.exists():
+            return outstanding
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue  # torn last line of a killed run
+                if entry["event"] == CREATED:
+                    outstanding[entry["node_id"]] = entry
+                else:
+                    outstanding.pop(entry["node_id"], None)
+        return outstanding
+
+    def outstanding(self, api_url: Optional[str] = None, include_live_runs: bool = False) -> List[dict]:
+        """Nodes created but not deleted, optionally limited to one environment."""
+        entries = []
+        for entry in self._replay().values():
+            if api_url is not None and entry["api_url"] != api_url:
+                continue
+            if not include_live_runs and _is_running(entry):
+                continue
+            entries.append(entry)
+        return entries
+
+    def compact(self):
+        """Rewrite the ledger with only the outstanding entries."""
+        if self.path is None or not self.path.exists():
+            return
+        with self._lock():
+            entries = sorted(self._replay().values(), key=lambda entry: entry["ts"])
+            tmp_path = self.path.with_suffix(".tmp")
+            tmp_path.write_text("".join(json.dumps(entry) + "\n" for entry in entries))
+            tmp_path.replace(self.path)
+
+
+def _is_running(entry: dict) -> bool:
+    """Whether the process that created the node is still alive, i.e. belongs to a concurrent run."""
+    if entry.get("host") != socket.gethostname():
+        return False
+    if entry.get("pid") == os.getpid():
+        return True
+    try:
+        os.kill(entry["pid"], 0)
+    except (OSError, KeyError, TypeError):
+        return False
+    return True
+
+
+node_ledger = NodeLedger()
@@ -0,0 +1,234 @@
+import asyncio
+from typing import Dict, List, Optional, Tuple, Union
+
+import allure
+
+from clients.api_client import NodesAPIClient
+from clients.api_response import APIResponse
+from clients.async_api_client import AsyncNodesAPIClient
+from clients.node_registry import NodeRegistry, PENDING, READY, EXCLUSIVE, RETIRED, FAILED, CREATING
+from clients.node_waiter import NodeWaitError, statuses_from_list
+from control_panel.node import NodeState
+from utils.async_bridge import run_sync
+from utils.clock import clock
+
+
+# How often a lease checks back while another worker's create request is in flight.
+CREATE_POLL_INTERVAL = 1.0
+
+
+class NodePoolError(Exception):
+    pass
+
+
+class NodePool:
+    """
+    Run-wide pool of RUNNING nodes handed out to tests as leases.
+
+    Pool state lives in a NodeRegistry, so every xdist worker draws from the same `size`
+    nodes instead of provisioning its own. Shared leases (read-only tests) may hand the same
+    node to many tests. An exclusive lease takes a node out of the pool for good: a
+    replacement is requested right away, and the leased node is deleted on release unless
+    the test already did so. Filling the pool sends all its create requests at once on the
+    async client, as node_cleanup does for deletions; provisioning then runs server-side in
+    the background, and readiness is checked lazily, with one list_nodes call, when a lease
+    is taken. Pool nodes are owned by the registry, not the worker's client: the controller
+    deletes them once at the end of the run. Registry transactions only claim rows; the
+    HTTP calls they lead to are made after the commit, so workers never queue behind them.
+
+    A lease gives up with NodePoolError after `lease_timeout` seconds, and the run stops
+    replacing nodes that failed to provision once `max_replacements` of them did.
+    """
+
+    def __init__(self, client: NodesAPIClient, preset_instance_id: str, size: int, registry: NodeRegistry,
+                 ready_timeout: Optional[int] = None, lease_timeout: float = 900, max_replacements: int = 10):
+        self.client = client
+        self.preset_instance_id = preset_instance_id
+        self.size = max(size, 1)
+        self.registry = registry
+        self.ready_timeout = ready_timeout
+        self.lease_timeout = lease_timeout
+        self.max_replacements = max_replacements
+        self._shared_leases: Dict[str, List[int]] = {}
+        # Why the last attempt to get a ready node came to nothing; reported when a lease gives up.
+        self._last_problem: Optional[str] = None
+
+    def _ids(self, *states: str) -> List[str]:
+        return [row["node_id"] for row in self.registry.nodes(self.preset_instance_id, states)]
+
+    @allure.step("Fill node pool")
+    def start(self):
+        with self.registry.transaction():
+            self.registry.drop_abandoned_claims()
+            claims = [self._claim() for _ in range(self.size - len(self._ids(PENDING, READY, CREATING)))]
+        self._provision_all(claims)
+
+    def _claim(self) -> str:
+        return self.registry.claim(self.preset_instance_id, self.client.base_url)
+
+    def _provision(self, claim: str) -> Optional[str]:
+        """Create the node a claim was made for; the claim is dropped if that fails."""
+        try:
+            response = self.client.create_node(preset_instance_id=self.preset_instance_id)
+        except BaseException:
+            self.registry.drop_claim(claim)
+            raise
+        node_id = self._settle(claim, response)
+        if node_id is not None:
+            # Owned by the registry from now on, so a worker's teardown must not delete it.
+            self.client.nodes_list.remove(node_id)
+        return node_id
+
+    def _settle(self, claim: str, response: Union[APIResponse, BaseException]) -> Optional[str]:
+        """The registered node id, or None if the claim expired meanwhile and the node was deleted again."""
+        if isinstance(response, BaseException):
+            self.registry.drop_claim(claim)
+            raise response
+        if response.status_code != 201:
+            self.registry.drop_claim(claim)
+            raise NodePoolError(f"Could not create pool node: {response.status_code} {response.text}")
+        node_id = response.json()["deployment_id"]
+        if not self.registry.settle_claim(claim, node_id):
+            # The slot may already be refilled, so the node would only push the pool over its size.
+            self._last_problem = f"claim for pool node {node_id} expired before it was created"
+            self.client.schedule_delete_node(node_id)
+            return None
+        return node_id
+
+    async def _create_all(self, count: int) -> List[Union[APIResponse, BaseException]]:
+        # A client of its own: the nodes it tracks belong to the registry, not to a worker's teardown.
+        async with AsyncNodesAPIClient(self.client.settings, token=self.client.token) as client:
+            return await asyncio.gather(
+                *(client.create_node(preset_instance_id=self.preset_instance_id) for _ in range(count)),
+                return_exceptions=True,
+            )
+
+    def _provision_all(self, claims: List[str]):
+        """Create the nodes for `claims` concurrently; every claim is settled or dropped, then the first failure raised."""
+        if len(claims) <= 1:
+            for claim in claims:
+                self._provision(claim)
+            return
+        self.client._refresh_bound_token()
+        try:
+            responses = run_sync(self._create_all(len(claims)))
+        except BaseException:
+            for claim in claims:
+                self.registry.drop_claim(claim)
+            raise
+        failure = None
+        for claim, response in zip(claims, responses):
+            try:
+                self._settle(claim, response)
+            except Exception as error:
+                failure = failure or error
+        if failure is not None:
+            raise failure
+
+    def _refresh(self):
+        """Promote pending nodes that became RUNNING and replace nodes that failed to provision."""
+        pending = self._ids(PENDING)
+        if not pending:
+            return
+        response = self.client.list_nodes()
+        if response.status_code != 200:
+            self._last_problem = f"list_nodes returned {response.status_code}"
+            return
+        statuses = {node_id.lower(): status for node_id, status in statuses_from_list(response.json()).items()}
+        failed = []
+        with self.registry.transaction():
+            for node_id in pending:
+                status = statuses.get(node_id.lower())
+                if status == NodeState.RUNNING:
+                    self.registry.transition(node_id, PENDING, READY)
+                elif status in (NodeState.ERROR, NodeState.DELETED, NodeState.DELETING):
+                    # Only the worker that moves the node replaces it.
+                    if self.registry.transition(node_id, PENDING, FAILED):
+                        self._last_problem = f"pool node {node_id} went {status} while provisioning"
+                        failed.append(node_id)
+            failed_in_run = len(self._ids(FAILED))
+            over_cap = failed_in_run > self.max_replacements
+            claims = [] if over_cap else [self._claim() for _ in failed]
+        for node_id in failed:
+            self.client.schedule_delete_node(node_id)
+        if over_cap:
+            raise NodePoolError(f"{failed_in_run} pool nodes failed to provision, more than the "
+                                f"{self.max_replacements} replacements allowed; last: {self._last_problem}")
+        self._provision_all(claims)
+
+    def _next_pending(self) -> Tuple[Optional[str], Optional[str]]:
+        """Inside a transaction: a pending node to wait for, or else a claim for a new one."""
+        pending = self._ids(PENDING)
+        if pending:
+            return pending[0], None
+        if self._ids(CREATING):
+            return None, None  # another worker is creating one right now
+        return None, self._claim()
+
+    def _wait(self, node_id: Optional[str], deadline: float):
+        remaining = deadline - clock.monotonic()
+        if remaining <= 0:
+            raise NodePoolError(f"No pool node became ready within {self.lease_timeout}s; "
+                                f"last: {self._last_problem or f'still waiting for {node_id}'}")
+        if node_id is None:
+            clock.sleep(min(CREATE_POLL_INTERVAL, remaining))
+            return
+        timeout = remaining if self.ready_timeout is None else min(self.ready_timeout, remaining)
+        # Another worker may be waiting on the same node; that is fine, the wait only reads.
+        try:
+            self.client._wait_node_until_status(node_id, NodeState.RUNNING, timeout)
+        except NodeWaitError as error:
+            # A failed node is replaced by the next _refresh(), a slow one waited for again.
+            self._last_problem = str(error)
+
+    def lease_shared(self) -> str:
+        deadline = clock.monotonic() + self.lease_timeout
+        while True:
+            self._refresh()
+            with self.registry.transaction():
+                ready = self._ids(READY)
+                if ready:
+                    in_use = [node_id for node_id in ready if self.registry.shared_lease_count(node_id)]
+                    node_id = (in_use or ready)[0]
+                    self._shared_leases.setdefault(node_id, []).append(self.registry.add_shared_lease(node_id))
+                    return node_id
+                waiting_for, claim = self._next_pending()
+            if claim is not None:
+                waiting_for = self._provision(claim)
+            self._wait(waiting_for, deadline)
+
+    def lease_exclusive(self) -> str:
+        deadline = clock.monotonic() + self.lease_timeout
+        while True:
+            self._refresh()
+            node_id = None
+            with self.registry.transaction():
+                # Never hand out a node somebody holds a shared lease on.
+                free = [node_id for node_id in self._ids(READY) if not self.registry.shared_lease_count(node_id)]
+                if free:
+                    node_id = free[0]
+                    self.registry.set_state(node_id, EXCLUSIVE, self.registry.owner)
+                    claim = self._claim()
+                else:
+                    waiting_for, claim = self._next_pending()
+            if node_id is not None:
+                # Tracked by this client again, so its teardown covers a test that never releases.
+                self.client.nodes_list.append(node_id)
+                try:
+                    self._provision(claim)
+                except BaseException:
+                    self.release(node_id)
+                    raise
+                return node_id
+            if claim is not None:
+                waiting_for = self._provision(claim)
+            self._wait(waiting_for, deadline)
+
+    def release(self, node_id: str):
+        lease_ids = self._shared_leases.get(node_id)
+        if lease_ids:
+            self.registry.remove_shared_lease(lease_ids.pop())
+            return
+        self.registry.set_state(node_id, RETIRED, self.registry.owner)
+        if node_id.lower() in self.client.nodes_list:
+            self.client.schedule_delete_node(node_id)
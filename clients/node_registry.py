@@ -0,0 +1,240 @@
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, List, Optional
+
+PENDING = "pending"
+READY = "ready"
+EXCLUSIVE = "exclusive"
+RETIRED = "retired"
+# Never became RUNNING; already scheduled for deletion and replaced.
+FAILED = "failed"
+# Placeholder row of a create request in flight, so concurrent workers don't over-provision.
+CREATING = "creating"
+ACTIVE_STATES = (PENDING, READY, EXCLUSIVE)
+
+# Every registry refreshes the heartbeat of the rows it owns this often; an owner whose
+# heartbeat is older than HEARTBEAT_TIMEOUT counts as gone, wherever it runs.
+HEARTBEAT_INTERVAL = 10.0
+HEARTBEAT_TIMEOUT = 60.0
+
+SCHEMA_VERSION = 3
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS nodes (
+    node_id TEXT PRIMARY KEY,
+    preset TEXT NOT NULL,
+    api_url TEXT NOT NULL,
+    state TEXT NOT NULL,
+    owner TEXT,
+    updated_at REAL NOT NULL,
+    created_at REAL NOT NULL,
+    heartbeat_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS shared_leases (
+    lease_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    node_id TEXT NOT NULL,
+    owner TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    heartbeat_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS shared_leases_node ON shared_leases (node_id);
+"""
+
+
+def current_owner() -> str:
+    """Lease owner id: xdist worker, host and pid, so dead owners can be detected."""
+    worker = os.environ.get("PYTEST_XDIST_WORKER", "master")
+    return f"{worker}@{socket.gethostname()}:{os.getpid()}"
+
+
+def _process_gone(owner: str) -> bool:
+    """True if `owner` ran on this host and its process has exited; owners elsewhere can't be checked."""
+    try:
+        host_pid = owner.split("@", 1)[1]
+        host, pid = host_pid.rsplit(":", 1)
+    except (IndexError, ValueError):
+        return True
+    if host != socket.gethostname():
+        return False
+    try:
+        os.kill(int(pid), 0)
+    except OSError:
+        return True
+    return False
+
+
+class NodeRegistry:
+    """
+    sqlite (WAL) table of pool nodes shared by every xdist worker of a run.
+
+    Rows hold node id, preset, state and lease owner. Writers serialise on BEGIN IMMEDIATE,
+    readers never block, so callers keep HTTP calls out of transactions: they claim rows
+    inside one and report the outcome in the next. Claims and leases carry their owner's
+    heartbeat, which a background thread refreshes every `heartbeat_interval` seconds; they
+    count as abandoned once it is `heartbeat_timeout` seconds old, or sooner if the owner ran
+    on this host and its process is gone.
+    """
+
+    def __init__(self, path: Path, heartbeat_interval: float = HEARTBEAT_INTERVAL,
+                 heartbeat_timeout: float = HEARTBEAT_TIMEOUT):
+        self.path = Path(path)
+        self.owner = current_owner()
+        self.heartbeat_interval = heartbeat_interval
+        self.heartbeat_timeout = heartbeat_timeout
+        self._lock = threading.RLock()
+        self._depth = 0
+        self._conn = sqlite3.connect(str(self.path), timeout=60, isolation_level=None, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        with self.transaction() as conn:
+            # The registry only lives for one run, so an older layout is simply replaced.
+            if conn.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+                conn.execute("DROP TABLE IF EXISTS shared_leases")
+                conn.execute("DROP TABLE IF EXISTS nodes")
+                conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+            for statement in _SCHEMA.split(";"):
+                if statement.strip():
+                    conn.execute(statement)
+        self._closed = threading.Event()
+        self._heartbeat_thread = threading.Thread(target=self._beat, name="node-registry-heartbeat", daemon=True)
+        self._heartbeat_thread.start()
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """Write transaction; nested calls join the outermost one."""
+        with self._lock:
+            if self._depth:
+                self._depth += 1
+                try:
+                    yield self._conn
+                finally:
+                    self._depth -= 1
+                return
+            self._conn.execute("BEGIN IMMEDIATE")
+            self._depth = 1
+            try:
+                yield self._conn
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            else:
+                self._conn.execute("COMMIT")
+            finally:
+                self._depth = 0
+
+    def close(self):
+        self._closed.set()
+        self._heartbeat_thread.join()
+        self._conn.close()
+
+    def _beat(self):
+        while not self._closed.wait(self.heartbeat_interval):
+            try:
+                self.heartbeat()
+            except sqlite3.Error:
+                pass  # a busy database only delays the beat; the next one catches up
+
+    def heartbeat(self):
+        """Mark every claim and lease of this process as still held."""
+        now = time.time()
+        with self.transaction() as conn:
+            conn.execute("UPDATE nodes SET heartbeat_at = ? WHERE owner = ?", (now, self.owner))
+            conn.execute("UPDATE shared_leases SET heartbeat_at = ? WHERE owner = ?", (now, self.owner))
+
+    def _alive(self, row: sqlite3.Row) -> bool:
+        if time.time() - row["heartbeat_at"] > self.heartbeat_timeout:
+            return False
+        return not _process_gone(row["owner"])
+
+    def reset(self):
+        with self.transaction() as conn:
+            conn.execute("DELETE FROM shared_leases")
+            conn.execute("DELETE FROM nodes")
+
+    def add(self, node_id: str, preset: str, api_url: str, state: str = PENDING):
+        now = time.time()
+        with self.transaction() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO nodes VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (node_id, preset, api_url, state, self.owner, now, now, now),
+            )
+
+    def set_state(self, node_id: str, state: str, owner: Optional[str] = None):
+        now = time.time()
+        with self.transaction() as conn:
+            conn.execute("UPDATE nodes SET state = ?, owner = ?, updated_at = ?, heartbeat_at = ? WHERE node_id = ?",
+                         (state, owner, now, now, node_id))
+
+    def transition(self, node_id: str, from_state: str, to_state: str, owner: Optional[str] = None) -> bool:
+        """Move a node between states unless another worker already moved it."""
+        now = time.time()
+        with self.transaction() as conn:
+            cursor = conn.execute("UPDATE nodes SET state = ?, owner = ?, updated_at = ?, heartbeat_at = ? "
+                                  "WHERE node_id = ? AND state = ?",
+                                  (to_state, owner, now, now, node_id, from_state))
+            return cursor.rowcount == 1
+
+    def claim(self, preset: str, api_url: str) -> str:
+        """Reserve a pool slot for a node that is about to be created; returns the claim id."""
+        claim_id = f"claim-{uuid.uuid4()}"
+        self.add(claim_id, preset, api_url, CREATING)
+        return claim_id
+
+    def settle_claim(self, claim_id: str, node_id: str) -> bool:
+        """
+        Replace a claim with the node created for it. False if the claim is gone: it was
+        dropped as abandoned (or the registry reset) and someone else may hold its slot.
+        """
+        with self.transaction() as conn:
+            row = conn.execute("SELECT preset, api_url FROM nodes WHERE node_id = ? AND state = ?",
+                               (claim_id, CREATING)).fetchone()
+            if row is None:
+                return False
+            conn.execute("DELETE FROM nodes WHERE node_id = ?", (claim_id,))
+            self.add(node_id, row["preset"], row["api_url"])
+            return True
+
+    def drop_claim(self, claim_id: str):
+        with self.transaction() as conn:
+            conn.execute("DELETE FROM nodes WHERE node_id = ? AND state = ?", (claim_id, CREATING))
+
+    def drop_abandoned_claims(self):
+        """Forget create requests of workers that died, or went silent, before they got an answer."""
+        with self.transaction() as conn:
+            rows = conn.execute("SELECT node_id, owner, heartbeat_at FROM nodes WHERE state = ?",
+                                (CREATING,)).fetchall()
+            for row in rows:
+                if not self._alive(row):
+                    conn.execute("DELETE FROM nodes WHERE node_id = ?", (row["node_id"],))
+
+    def nodes(self, preset: Optional[str] = None, states=ACTIVE_STATES) -> List[sqlite3.Row]:
+        query = f"SELECT * FROM nodes WHERE state IN ({','.join('?' * len(states))})"
+        params = list(states)
+        if preset is not None:
+            query += " AND preset = ?"
+            params.append(preset)
+        with self._lock:
+            return self._conn.execute(query + " ORDER BY created_at", params).fetchall()
+
+    def shared_lease_count(self, node_id: str) -> int:
+        with self._lock:
+            rows = self._conn.execute("SELECT owner, heartbeat_at FROM shared_leases WHERE node_id = ?",
+                                      (node_id,)).fetchall()
+        return sum(1 for row in rows if self._alive(row))
+
+    def add_shared_lease(self, node_id: str) -> int:
+        now = time.time()
+        with self.transaction() as conn:
+            cursor = conn.execute("INSERT INTO shared_leases (node_id, owner, created_at, heartbeat_at) "
+                                  "VALUES (?, ?, ?, ?)", (node_id, self.owner, now, now))
+            return cursor.lastrowid
+
+    def remove_shared_lease(self, lease_id: int):
+        with self.transaction() as conn:
+            conn.execute("DELETE FROM shared_leases WHERE lease_id = ?", (lease_id,))
@@ -0,0 +1,107 @@
+import random
+from typing import Dict, Iterable, List, Optional
+
+from control_panel.node import NodeState
+from utils.clock import clock
+from utils.wait_helper import wait_report
+
+TERMINAL_STATES = (NodeState.ERROR, NodeState.DELETED)
+# Reported for nodes that vanished from the API, which is how deleted nodes usually end up.
+ABSENT = "absent"
+
+
+class NodeWaitError(Exception):
+    """A node reached a terminal state other than the expected one, or the wait timed out."""
+
+    def __init__(self, message: str, timeline: Dict[str, Dict[str, float]]):
+        super().__init__(f"{message}; state timeline (seconds since start): {timeline}")
+        self.timeline = timeline
+
+
+class NodeStatusTracker:
+    """
+    Polling state for waiting on several nodes at once; the HTTP calls are left to the client.
+
+    Every observation records when each node was first seen in each state. The poll interval
+    starts at `min_interval`, grows by `backoff` on every tick where nothing changed and
+    snaps back once a node moves, with equal jitter so parallel waiters don't poll in lockstep.
+    """
+
+    def __init__(self, node_ids: Iterable[str], expected_status: str, timeout: float,
+                 min_interval: float = 1.0, max_interval: float = 10.0, backoff: float = 1.5,
+                 fail_on: Iterable[str] = TERMINAL_STATES):
+        self.node_ids: List[str] = list(node_ids)
+        self.expected_status = expected_status
+        self.timeout = timeout
+        self.min_interval = min_interval
+        self.max_interval = max(max_interval, min_interval)
+        self.backoff = backoff
+        self.fail_on = tuple(state for state in fail_on if state != expected_status)
+        self.timeline: Dict[str, Dict[str, float]] = {node_id: {} for node_id in self.node_ids}
+        self._pending = {node_id.lower(): node_id for node_id in self.node_ids}
+        self._last_status: Dict[str, Optional[str]] = {}
+        self._interval = min_interval
+        self._started = clock.monotonic()
+        self.polls = 0
+
+    @property
+    def done(self) -> bool:
+        return not self._pending
+
+    @property
+    def pending(self) -> List[str]:
+        return list(self._pending.values())
+
+    def remaining(self) -> float:
+        return self.timeout - (clock.monotonic() - self._started)
+
+    def observe(self, statuses: Dict[str, Optional[str]]) -> bool:
+        """
+        Record a poll result mapping node id to status (None when the node is missing).
+
+        Returns whether any node changed state and raises NodeWaitError on a terminal state.
+        """
+        self.polls += 1
+        elapsed = round(clock.monotonic() - self._started, 3)
+        statuses = {node_id.lower(): status for node_id, status in statuses.items()}
+        changed = False
+        for key, node_id in list(self._pending.items()):
+            status = statuses.get(key)
+            if status is None:
+                if self.expected_status != NodeState.DELETED:
+                    continue
+                status = ABSENT
+            self.timeline[node_id].setdefault(status, elapsed)
+            if self._last_status.get(key) != status:
+                self._last_status[key] = status
+                changed = True
+            if status in (self.expected_status, ABSENT):
+                del self._pending[key]
+            elif status in self.fail_on:
+                raise NodeWaitError(f"Node {node_id} is {status} while waiting for {self.expected_status}",
+                                    self.timeline)
+        return changed
+
+    def next_delay(self, changed: bool) -> float:
+        """Seconds to sleep before the next poll, never past the deadline."""
+        if changed:
+            self._interval = self.min_interval
+        else:
+            self._interval = min(self._interval * self.backoff, self.max_interval)
+        delay = random.uniform(self._interval / 2, self._interval)
+        return max(min(delay, self.remaining()), 0.0)
+
+    def report(self, success: bool):
+        """Add this wait to the run-wide wait report."""
+        wait_report.record(f"nodes to be {self.expected_status}", clock.monotonic() - self._started,
+                           self.polls, success)
+
+    def timeout_error(self) -> NodeWaitError:
+        return NodeWaitError(
+            f"Nodes {self.pending} are not {self.expected_status} after {self.timeout} seconds", self.timeline
+        )
+
+
+def statuses_from_list(data: dict) -> Dict[str, Optional[str]]:
+    """Map a GET /v1/ui/nodes body to {node_id: status}."""
+    return {item["id"]: item.get("status") for item in data.get("results", [])}
@@ -0,0 +1,164 @@
+import asyncio
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Awaitable, Callable, Deque, Dict, Iterator, Optional, Union
+
+from clients.api_response import APIResponse
+
+DEFAULT_PAGE_SIZE = 100
+DEFAULT_LOOKAHEAD = 2
+
+# Page fetches only wait on the network, so one small pool serves every client in the process.
+_prefetch_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="page-prefetch")
+
+
+class PaginationError(Exception):
+    """A page request failed part-way through a listing."""
+
+    def __init__(self, response: APIResponse, page: int):
+        super().__init__(f"Page {page} failed: {response.status_code} {response.text}")
+        self.response = response
+        self.page = page
+
+
+class PrefetchedRequest:
+    """
+    A request running on the prefetch pool.
+
+    Only the network round-trip happens in the background: `finish` is called on the thread
+    that asks for the result, so allure steps, attachments and metrics stay on the test's
+    thread (the allure lifecycle is not thread-safe).
+    """
+
+    def __init__(self, send: Callable[[], Any], finish: Callable[[Any], APIResponse]):
+        self._future: Future = _prefetch_executor.submit(send)
+        self._finish = finish
+
+    def result(self) -> APIResponse:
+        return self._finish(self._future.result())
+
+    def cancel(self):
+        self._future.cancel()
+
+
+@dataclass(frozen=True)
+class TimeWindow:
+    """
+    [since, until) filter for time-stamped listings.
+
+    Sent as `since`/`until` query parameters for servers that filter on their side, and
+    also applied to every item, so the result is the same when the server ignores them.
+    Naive datetimes are taken as UTC.
+    """
+    since: Optional[datetime] = None
+    until: Optional[datetime] = None
+
+    @staticmethod
+    def _aware(value: Optional[datetime]) -> Optional[datetime]:
+        if value is not None and value.tzinfo is None:
+            return value.replace(tzinfo=timezone.utc)
+        return value
+
+    def params(self) -> Dict[str, str]:
+        bounds = {"since": self._aware(self.since), "until": self._aware(self.until)}
+        return {name: value.isoformat() for name, value in bounds.items() if value is not None}
+
+    def contains(self, timestamp: Union[datetime, str]) -> bool:
+        if isinstance(timestamp, str):
+            timestamp = datetime.fromisoformat(timestamp)
+        timestamp = self._aware(timestamp)
+        since, until = self._aware(self.since), self._aware(self.until)
+        return (since is None or timestamp >= since) and (until is None or timestamp < until)
+
+
+def _is_last_page(body: Dict[str, Any], page_size: int, seen: int) -> bool:
+    results = body.get("results") or []
+    page_size = body.get("page_size") or page_size
+    if body.get("total") is not None:
+        return not results or seen >= body["total"]
+    # More than a page means the endpoint ignores paging and returned everything at once.
+    return len(results) != page_size
+
+
+def _page_exists(body: Dict[str, Any], page: int, page_size: int, first_page: int) -> bool:
+    """Whether `page` can hold results, judged by the total of an already-fetched page."""
+    total = body.get("total")
+    page_size = body.get("page_size") or page_size
+    return total is None or (page - first_page) * page_size < total
+
+
+def iter_pages(request_page: Callable[[int], PrefetchedRequest], page_size: int = DEFAULT_PAGE_SIZE,
+               lookahead: int = DEFAULT_LOOKAHEAD, first_page: int = 1) -> Iterator[Dict[str, Any]]:
+    """
+    Yield page bodies in order while up to `lookahead` further pages are already in flight.
+
+    At most `lookahead + 1` pages are held at a time, so memory stays bounded however long
+    the listing is. Stops at the first short page or once `total` results were seen; pages
+    still in flight when the caller stops iterating are cancelled or discarded.
+    """
+    pending: Deque[tuple] = deque((page, request_page(page)) for page in range(first_page, first_page + lookahead + 1))
+    next_page = first_page + lookahead + 1
+    seen = 0
+    try:
+        while pending:
+            page, request = pending.popleft()
+            response = request.result()
+            if response.status_code != 200:
+                raise PaginationError(response, page)
+            body = response.json()
+            seen += len(body.get("results") or [])
+            if _is_last_page(body, page_size, seen):
+                yield body
+                return
+            if _page_exists(body, next_page, page_size, first_page):
+                pending.append((next_page, request_page(next_page)))
+                next_page += 1
+            yield body
+    finally:
+        for _, request in pending:
+            request.cancel()
+
+
+def iter_items(pages: Iterator[Dict[str, Any]], parse: Optional[Callable[[dict], Any]] = None) -> Iterator[Any]:
+    for body in pages:
+        for item in body.get("results") or []:
+            yield parse(item) if parse else item
+
+
+async def aiter_pages(request_page: Callable[[int], Awaitable[APIResponse]], page_size: int = DEFAULT_PAGE_SIZE,
+                      lookahead: int = DEFAULT_LOOKAHEAD, first_page: int = 1) -> AsyncIterator[Dict[str, Any]]:
+    """Asyncio twin of iter_pages(): prefetched pages are tasks on the running loop."""
+    pending: Deque[tuple] = deque(
+        (page, asyncio.ensure_future(request_page(page))) for page in range(first_page, first_page + lookahead + 1)
+    )
+    next_page = first_page + lookahead + 1
+    seen = 0
+    try:
+        while pending:
+            page, task = pending.popleft()
+            response = await task
+            if response.status_code != 200:
+                raise PaginationError(response, page)
+            body = response.json()
+            seen += len(body.get("results") or [])
+            if _is_last_page(body, page_size, seen):
+                yield body
+                return
+            if _page_exists(body, next_page, page_size, first_page):
+                pending.append((next_page, asyncio.ensure_future(request_page(next_page))))
+                next_page += 1
+            yield body
+    finally:
+        for _, task in pending:
+            task.cancel()
+        # Let cancelled requests unwind (and release their connections) before returning.
+        await asyncio.gather(*(task for _, task in pending), return_exceptions=True)
+
+
+async def aiter_items(pages: AsyncIterator[Dict[str, Any]],
+                      parse: Optional[Callable[[dict], Any]] = None) -> AsyncIterator[Any]:
+    async for body in pages:
+        for item in body.get("results") or []:
+            yield parse(item) if parse else item
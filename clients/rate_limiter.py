@@ -0,0 +1,229 @@
+import asyncio
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+import httpx
+from filelock import FileLock
+
+from config.settings import Settings
+
+# Checked in order, the first matching path prefix wins.
+ENDPOINT_GROUPS = (
+    ("auth", "/v1/auth"),
+    ("internal", "/internal"),
+    ("nodes", "/v1/ui"),
+)
+DEFAULT_GROUP = "nodes"
+_IN_FLIGHT_POLL = 0.01
+
+
+def endpoint_group(path: str) -> str:
+    for group, prefix in ENDPOINT_GROUPS:
+        if path.startswith(prefix):
+            return group
+    return DEFAULT_GROUP
+
+
+class TokenBucket:
+    """
+    Token bucket that hands out reservations instead of blocking.
+
+    reserve() always takes a token and returns how long the caller has to wait for it,
+    which lets the same bucket serve threads (time.sleep) and coroutines (asyncio.sleep).
+    """
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self._tokens = float(self.burst)
+        self._updated = time.time()
+        self._lock = threading.Lock()
+
+    def _take(self, tokens: float, updated: float) -> tuple:
+        now = time.time()
+        tokens = min(self.burst, tokens + (now - updated) * self.rate) - 1
+        wait = -tokens / self.rate if tokens < 0 else 0.0
+        return tokens, now, wait
+
+    def reserve(self) -> float:
+        with self._lock:
+            self._tokens, self._updated, wait = self._take(self._tokens, self._updated)
+            return wait
+
+    async def reserve_async(self) -> float:
+        return self.reserve()
+
+
+class FileTokenBucket(TokenBucket):
+    """TokenBucket whose state lives in a file-locked JSON file shared by all xdist workers."""
+
+    def __init__(self, rate: float, burst: int, path: Path):
+        super().__init__(rate, burst)
+        self.path = Path(path)
+        self._file_lock = FileLock(str(self.path) + ".lock")
+
+    def reserve(self) -> float:
+        with self._lock, self._file_lock:
+            try:
+                state = json.loads(self.path.read_text())
+                tokens, updated = state["tokens"], state["updated"]
+            except (FileNotFoundError, ValueError, KeyError):
+                tokens, updated = float(self.burst), time.time()
+            tokens, updated, wait = self._take(tokens, updated)
+            self.path.write_text(json.dumps({"tokens": tokens, "updated": updated}))
+            return wait
+
+    async def reserve_async(self) -> float:
+        # The file lock blocks while other workers hold it; keep that off the event loop.
+        return await asyncio.to_thread(self.reserve)
+
+
+class GroupLimit:
+    """Rate and in-flight limits of one endpoint group in this process."""
+
+    def __init__(self, bucket: Optional[TokenBucket], max_in_flight: int):
+        self.bucket = bucket
+        self.max_in_flight = max_in_flight
+        self._in_flight = threading.BoundedSemaphore(max_in_flight) if max_in_flight else None
+        self.requests = 0
+        self.waited = 0.0
+        self._lock = threading.Lock()
+
+    def _record(self, waited: float):
+        with self._lock:
+            self.requests += 1
+            self.waited += waited
+
+    def acquire(self):
+        started = time.monotonic()
+        if self.bucket is not None:
+            wait = self.bucket.reserve()
+            if wait:
+                time.sleep(wait)
+        if self._in_flight is not None:
+            self._in_flight.acquire()
+        self._record(time.monotonic() - started)
+
+    async def acquire_async(self):
+        started = time.monotonic()
+        if self.bucket is not None:
+            wait = await self.bucket.reserve_async()
+            if wait:
+                await asyncio.sleep(wait)
+        if self._in_flight is not None:
+            # The semaphore is shared with threads, so it can't be awaited; poll it instead.
+            while not self._in_flight.acquire(blocking=False):
+                await asyncio.sleep(_IN_FLIGHT_POLL)
+        self._record(time.monotonic() - started)
+
+    def release(self):
+        if self._in_flight is not None:
+            self._in_flight.release()
+
+
+class RateGovernor:
+    """
+    Per endpoint group (auth, nodes, internal) request rate and concurrency limits.
+
+    Rates are totals for the whole run: with a `state_dir` the buckets are shared by every
+    xdist worker through files, and the max-in-flight limit is split between workers, so it
+    has to be at least the number of workers. A rate or limit of 0 leaves the group unthrottled.
+    """
+
+    def __init__(self):
+        self._limits: Dict[str, GroupLimit] = {}
+
+    def configure(self, settings: Settings, state_dir: Optional[Path] = None):
+        workers = int(os.environ.get("PYTEST_XDIST_WORKER_COUNT", "1"))
+        worker = os.environ.get("PYTEST_XDIST_WORKER", "gw0")
+        index = int(worker[2:]) if worker.startswith("gw") and worker[2:].isdigit() else 0
+        limits = {}
+        for group, _ in ENDPOINT_GROUPS:
+            rate = getattr(settings, f"rate_limit_{group}_rps")
+            max_in_flight = getattr(settings, f"max_in_flight_{group}")
+            if not rate and not max_in_flight:
+                continue
+            bucket = None
+            if rate:
+                if state_dir is None:
+                    bucket = TokenBucket(rate, settings.rate_limit_burst)
+                else:
+                    bucket = FileTokenBucket(rate, settings.rate_limit_burst, Path(state_dir) / f"rate-{group}.json")
+            limits[group] = GroupLimit(bucket, _worker_share(max_in_flight, workers, index, group))
+        self._limits = limits
+
+    def limit(self, path: str) -> Optional[GroupLimit]:
+        if not self._limits:
+            return None
+        return self._limits.get(endpoint_group(path))
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        return {group: {"requests": limit.requests, "waited": round(limit.waited, 3)}
+                for group, limit in self._limits.items()}
+
+    @staticmethod
+    def merge(total: dict, other: dict) -> dict:
+        for group, value in other.items():
+            merged = total.setdefault(group, {"requests": 0, "waited": 0.0})
+            merged["requests"] += value["requests"]
+            merged["waited"] = round(merged["waited"] + value["waited"], 3)
+        return total
+
+
+def _worker_share(max_in_flight: int, workers: int, index: int, group: str) -> int:
+    """This worker's part of a run-wide in-flight limit; the parts add up to exactly the limit."""
+    if not max_in_flight:
+        return 0
+    if max_in_flight < workers:
+        raise ValueError(f"max_in_flight_{group}={max_in_flight} is lower than the {workers} xdist workers; "
+                         f"raise it or run fewer workers")
+    return max_in_flight // workers + (1 if index < max_in_flight % workers else 0)
+
+
+rate_governor = RateGovernor()
+
+
+class GovernedTransport(httpx.BaseTransport, httpx.AsyncBaseTransport):
+    """Applies the RateGovernor limits to every request attempt before it goes on the wire."""
+
+    def __init__(self, transport, governor: RateGovernor = rate_governor):
+        self._transport = transport
+        self.governor = governor
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        limit = self.governor.limit(request.url.path)
+        if limit is None:
+            return self._transport.handle_request(request)
+        limit.acquire()
+        try:
+            # The slot is held while the request is in flight, not while the body is streamed.
+            return self._transport.handle_request(request)
+        finally:
+            limit.release()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        limit = self.governor.limit(request.url.path)
+        if limit is None:
+            return await self._transport.handle_async_request(request)
+        await limit.acquire_async()
+        try:
+            return await self._transport.handle_async_request(request)
+        finally:
+            limit.release()
+
+    def close(self):
+        self._transport.close()
+
+    async def aclose(self):
+        await self._transport.aclose()
+
+
+def format_rate_limit_stats(stats: dict) -> Optional[str]:
+    if not stats:
+        return None
+    return "\n".join(f"{group}: {value['requests']} requests, {value['waited']:.1f}s waiting for the limiter"
+                     for group, value in sorted(stats.items()))
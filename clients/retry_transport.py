@@ -0,0 +1,215 @@
+import asyncio
+import json
+import random
+import threading
+import time
+from collections import defaultdict
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+from typing import Dict, Optional
+
+import httpx
+from filelock import FileLock
+
+from config.settings import Settings
+from utils.endpoints import endpoint_key
+
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+RETRY_STATUSES = frozenset({502, 503, 504})
+# Nothing reached the server, so even POST is safe to send again.
+NOT_SENT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout)
+RETRYABLE_ERRORS = NOT_SENT_ERRORS + (httpx.ReadError, httpx.WriteError, httpx.RemoteProtocolError)
+
+
+class RetryStats:
+    """
+    Run-wide retry budget plus per-endpoint counters for the run report.
+
+    With a `state_dir` the spent budget is kept in a file-locked JSON file, so every xdist
+    worker draws from the same budget; `used` and `exhausted` count this process only.
+    """
+
+    def __init__(self, budget: int = 50):
+        self.budget = budget
+        self.used = 0
+        self.exhausted = 0
+        self.endpoints: Dict[str, Dict[str, int]] = defaultdict(lambda: {"retries": 0, "recovered": 0, "failed": 0})
+        self._lock = threading.Lock()
+        self._path: Optional[Path] = None
+        self._file_lock: Optional[FileLock] = None
+
+    def configure(self, settings: Settings, state_dir: Optional[Path] = None):
+        self.budget = settings.http_retry_budget
+        self._path = Path(state_dir) / "retry-budget.json" if state_dir is not None else None
+        self._file_lock = FileLock(str(self._path) + ".lock") if self._path is not None else None
+
+    def _spend(self) -> bool:
+        if self._path is None:
+            return self.used < self.budget
+        with self._file_lock:
+            try:
+                spent = json.loads(self._path.read_text())["used"]
+            except (FileNotFoundError, ValueError, KeyError):
+                spent = 0
+            if spent >= self.budget:
+                return False
+            self._path.write_text(json.dumps({"used": spent + 1}))
+            return True
+
+    def try_acquire(self) -> bool:
+        with self._lock:
+            if not self._spend():
+                self.exhausted += 1
+                return False
+            self.used += 1
+            return True
+
+    async def try_acquire_async(self) -> bool:
+        # The shared budget is file I/O behind a lock; keep it off the event loop.
+        return await asyncio.to_thread(self.try_acquire)
+
+    def record(self, endpoint: str, retries: int, recovered: bool):
+        with self._lock:
+            counters = self.endpoints[endpoint]
+            counters["retries"] += retries
+            counters["recovered" if recovered else "failed"] += 1
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            return {
+                "budget": self.budget,
+                "used": self.used,
+                "exhausted": self.exhausted,
+                "endpoints": {key: dict(value) for key, value in self.endpoints.items()},
+            }
+
+    @staticmethod
+    def merge(total: dict, other: dict) -> dict:
+        # Every worker reports the same shared budget; only what was drawn from it adds up.
+        total["budget"] = max(total.get("budget", 0), other.get("budget", 0))
+        total["used"] = total.get("used", 0) + other.get("used", 0)
+        total["exhausted"] = total.get("exhausted", 0) + other.get("exhausted", 0)
+        endpoints = total.setdefault("endpoints", {})
+        for key, counters in other.get("endpoints", {}).items():
+            merged = endpoints.setdefault(key, {"retries": 0, "recovered": 0, "failed": 0})
+            for name, value in counters.items():
+                merged[name] += value
+        return total
+
+
+retry_stats = RetryStats()
+
+
+class RetryTransport(httpx.BaseTransport, httpx.AsyncBaseTransport):
+    """
+    Retries transient ingress failures (502/503/504, resets) with exponential backoff and full jitter.
+
+    Only idempotent methods are retried after the request may have reached the server;
+    connection failures are retried for every method. Retry-After is honoured up to
+    `max_delay`. Every retry draws from the run-wide RetryStats budget, so a systemic outage
+    turns into failures instead of being silently absorbed.
+    """
+
+    def __init__(self, transport, max_retries: int = 2, backoff: float = 0.5, max_delay: float = 30.0,
+                 stats: RetryStats = retry_stats):
+        self._transport = transport
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_delay = max_delay
+        self.stats = stats
+
+    def _should_retry_response(self, request: httpx.Request, response: httpx.Response) -> bool:
+        return response.status_code in RETRY_STATUSES and request.method in IDEMPOTENT_METHODS
+
+    def _should_retry_error(self, request: httpx.Request, error: Exception) -> bool:
+        if isinstance(error, NOT_SENT_ERRORS):
+            return True
+        return request.method in IDEMPOTENT_METHODS
+
+    def _delay(self, attempt: int, response: Optional[httpx.Response] = None) -> float:
+        retry_after = self._retry_after(response) if response is not None else None
+        if retry_after is not None:
+            return min(retry_after, self.max_delay)
+        return random.uniform(0, min(self.max_delay, self.backoff * (2 ** attempt)))
+
+    @staticmethod
+    def _retry_after(response: httpx.Response) -> Optional[float]:
+        value = response.headers.get("Retry-After")
+        if not value:
+            return None
+        try:
+            return max(float(value), 0.0)
+        except ValueError:
+            pass
+        try:
+            return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+        except (TypeError, ValueError):
+            return None
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        endpoint = endpoint_key(request.method, request.url.path)
+        attempt = 0
+        while True:
+            try:
+                response = self._transport.handle_request(request)
+            except RETRYABLE_ERRORS as error:
+                if attempt >= self.max_retries or not self._should_retry_error(request, error) \
+                        or not self.stats.try_acquire():
+                    if attempt:
+                        self.stats.record(endpoint, attempt, recovered=False)
+                    raise
+                time.sleep(self._delay(attempt))
+                attempt += 1
+                continue
+            if attempt >= self.max_retries or not self._should_retry_response(request, response) \
+                    or not self.stats.try_acquire():
+                if attempt:
+                    self.stats.record(endpoint, attempt, recovered=response.status_code not in RETRY_STATUSES)
+                return response
+            # Drain the (small) error body so the connection goes back to the pool.
+            response.read()
+            response.close()
+            time.sleep(self._delay(attempt, response))
+            attempt += 1
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        endpoint = endpoint_key(request.method, request.url.path)
+        attempt = 0
+        while True:
+            try:
+                response = await self._transport.handle_async_request(request)
+            except RETRYABLE_ERRORS as error:
+                if attempt >= self.max_retries or not self._should_retry_error(request, error) \
+                        or not await self.stats.try_acquire_async():
+                    if attempt:
+                        self.stats.record(endpoint, attempt, recovered=False)
+                    raise
+                await asyncio.sleep(self._delay(attempt))
+                attempt += 1
+                continue
+            if attempt >= self.max_retries or not self._should_retry_response(request, response) \
+                    or not await self.stats.try_acquire_async():
+                if attempt:
+                    self.stats.record(endpoint, attempt, recovered=response.status_code not in RETRY_STATUSES)
+                return response
+            await response.aread()
+            await response.aclose()
+            await asyncio.sleep(self._delay(attempt, response))
+            attempt += 1
+
+    def close(self):
+        self._transport.close()
+
+    async def aclose(self):
+        await self._transport.aclose()
+
+
+def format_retry_stats(stats: dict) -> Optional[str]:
+    if not stats.get("used") and not stats.get("exhausted"):
+        return None
+    lines = [f"retry budget: {stats['used']} of {stats['budget']} used, "
+             f"{stats['exhausted']} retries refused after the budget ran out"]
+    for endpoint, counters in sorted(stats.get("endpoints", {}).items()):
+        lines.append(f"{endpoint}: {counters['retries']} retries, "
+                     f"{counters['recovered']} recovered, {counters['failed']} still failed")
+    return "\n".join(lines)
@@ -0,0 +1,176 @@
+import json
+import os
+import threading
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import Callable, Dict, Optional, Tuple
+
+from filelock import FileLock
+
+from clients.api_client import AuthAPIClient
+from config.settings import Settings
+from utils.clock import clock
+
+
+@dataclass
+class TokenSet:
+    access_token: str
+    refresh_token: Optional[str]
+    # Wall-clock (or shared virtual) times, because the cache is shared between processes.
+    expires_at: float
+    refresh_at: float
+
+    @property
+    def is_fresh(self) -> bool:
+        return clock.time() < self.refresh_at
+
+
+class TokenBroker:
+    """
+    Caches access/refresh tokens per credentials and shares them between xdist workers.
+
+    Tokens are refreshed through /v1/auth/refresh once they get within `refresh_margin`
+    seconds of expiry, and only fall back to /v1/auth/login when there is nothing to
+    refresh. The on-disk cache is guarded by a file lock so that parallel workers log in
+    once per credentials instead of once per test. It is the source of truth: a worker
+    keeps serving its in-memory copy only while the cache file is unchanged, so tokens
+    another worker renewed or invalidated are picked up on the next request.
+
+    Entries are keyed by API URL and username only, so nothing derived from a password is
+    written to disk; each process checks the password it was given against the one it
+    first used for that user. The tokens themselves are stored in plain text, in a file
+    only the current user can read.
+    """
+
+    def __init__(self, settings: Settings, cache_path: Optional[Path] = None, refresh_margin: Optional[int] = None):
+        self.settings = settings
+        self.cache_path = Path(cache_path) if cache_path else None
+        self.refresh_margin = settings.token_refresh_margin if refresh_margin is None else refresh_margin
+        self._memory: Dict[str, TokenSet] = {}
+        self._passwords: Dict[str, str] = {}
+        # Identity of the cache file the in-memory tokens were taken from.
+        self._seen: Optional[Tuple[int, int, int]] = None
+        self._lock = threading.Lock()
+        self.logins = 0
+        self.refreshes = 0
+
+    def _key(self, username: str) -> str:
+        return f"{username}@{self.settings.cp_nodes_api_url}"
+
+    def _other_password(self, key: str, password: str) -> bool:
+        """Whether `password` differs from the one this process first used for the user behind `key`."""
+        with self._lock:
+            return self._passwords.setdefault(key, password) != password
+
+    def _login_again(self, key: str, username: str, password: str) -> TokenSet:
+        # Tokens cached for the user were issued for another password; only a login proves this one.
+        tokens = self._update(key, lambda cached: self._renew(username, password, None))
+        with self._lock:
+            self._passwords[key] = password
+        return tokens
+
+    def _issue(self, access_token: str, refresh_token: Optional[str], expires_in: float) -> TokenSet:
+        now = clock.time()
+        # Short-lived tokens would otherwise be due for refresh as soon as they are issued.
+        margin = min(self.refresh_margin, expires_in / 2)
+        return TokenSet(
+            access_token=access_token,
+            refresh_token=refresh_token,
+            expires_at=now + expires_in,
+            refresh_at=now + expires_in - margin,
+        )
+
+    def _cache_identity(self) -> Optional[Tuple[int, int, int]]:
+        # Every write replaces the file, so inode, mtime and size together change on each one.
+        try:
+            stat = os.stat(self.cache_path)
+        except FileNotFoundError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+    def get_tokens(self, username: str, password: str) -> TokenSet:
+        key = self._key(username)
+        if self._other_password(key, password):
+            return self._login_again(key, username, password)
+        tokens = self._memory.get(key)
+        if tokens and tokens.is_fresh and (self.cache_path is None or self._cache_identity() == self._seen):
+            return tokens
+        return self._update(key, lambda cached: self._renew(username, password, cached))
+
+    def renew(self, username: str, password: str, rejected: str) -> TokenSet:
+        """
+        New tokens after the server answered 401 to `rejected`, e.g. because a test refreshed
+        or logged out the shared session. Tokens another worker already replaced it with are
+        reused; otherwise the refresh token is tried before logging in again.
+        """
+        key = self._key(username)
+        if self._other_password(key, password):
+            return self._login_again(key, username, password)
+
+        def replace(cached: Optional[TokenSet]) -> TokenSet:
+            if cached and cached.access_token != rejected:
+                return self._renew(username, password, cached)
+            return self._renew(username, password, cached, force=True)
+
+        return self._update(key, replace)
+
+    def _update(self, key: str, renew: Callable[[Optional[TokenSet]], TokenSet]) -> TokenSet:
+        with self._lock:
+            if self.cache_path is None:
+                tokens = renew(self._memory.get(key))
+            else:
+                with FileLock(str(self.cache_path) + ".lock"):
+                    cache = self._read_cache()
+                    cached = cache.get(key)
+                    cached = TokenSet(**cached) if cached else None
+                    tokens = renew(cached)
+                    if tokens is not cached:
+                        cache[key] = asdict(tokens)
+                        self._write_cache(cache)
+                    self._seen = self._cache_identity()
+            self._memory[key] = tokens
+            return tokens
+
+    def invalidate(self, username: str, password: str):
+        """Forget cached tokens, e.g. after a test revoked them despite sharing them."""
+        key = self._key(username)
+        with self._lock:
+            self._memory.pop(key, None)
+            if self.cache_path is not None:
+                with FileLock(str(self.cache_path) + ".lock"):
+                    cache = self._read_cache()
+                    cache.pop(key, None)
+                    self._write_cache(cache)
+
+    def _renew(self, username: str, password: str, cached: Optional[TokenSet], force: bool = False) -> TokenSet:
+        if cached and cached.is_fresh and not force:
+            return cached
+        with AuthAPIClient(self.settings) as client:
+            if cached and cached.refresh_token:
+                response = client.post_refresh(cached.refresh_token)
+                if response.status_code == 200:
+                    self.refreshes += 1
+                    data = response.json()
+                    return self._issue(data["access_token"], data.get("refresh_token", cached.refresh_token),
+                                       data["expires_in"])
+            response = client.login(username, password)
+            if response.status_code != 200:
+                raise Exception(f"Login failed for {username}: {response.status_code}")
+            self.logins += 1
+            data = response.json()
+            return self._issue(data["access_token"], data.get("refresh_token"), data["expires_in"])
+
+    def _read_cache(self) -> Dict[str, dict]:
+        if not self.cache_path.exists():
+            return {}
+        try:
+            return json.loads(self.cache_path.read_text())
+        except ValueError:
+            return {}
+
+    def _write_cache(self, cache: Dict[str, dict]):
+        tmp_path = self.cache_path.with_suffix(".tmp")
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w") as f:
+            f.write(json.dumps(cache))
+        tmp_path.replace(self.cache_path)
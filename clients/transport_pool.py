@@ -0,0 +1,222 @@
+import os
+import random
+import threading
+import httpx
+from dataclasses import dataclass, asdict
+from typing import Dict, Optional
+from clients.cassette import Cassette, CassetteTransport
+from clients.fault_transport import FaultProfile, FaultTransport, fault_profile, fault_stats
+from clients.rate_limiter import GovernedTransport
+from clients.retry_transport import RetryTransport
+from config.settings import Settings
+
+
+@dataclass
+class ConnectionStats:
+    """Connection counters for one origin, aggregated over every client that shares it."""
+    requests: int = 0
+    connections_opened: int = 0
+    tls_handshakes: int = 0
+
+    @property
+    def reused(self) -> int:
+        return max(self.requests - self.connections_opened, 0)
+
+    @property
+    def reuse_ratio(self) -> float:
+        return self.reused / self.requests if self.requests else 0.0
+
+    def to_dict(self) -> Dict[str, int]:
+        return asdict(self)
+
+    def merge(self, other: Dict[str, int]):
+        self.requests += other.get("requests", 0)
+        self.connections_opened += other.get("connections_opened", 0)
+        self.tls_handshakes += other.get("tls_handshakes", 0)
+
+
+class _StatsRecorder:
+
+    def __init__(self, stats: ConnectionStats, lock: threading.Lock):
+        self.stats = stats
+        self.lock = lock
+
+    def on_event(self, event_name: str):
+        # Counted on the wire, so every retry attempt is a request of its own.
+        if event_name in ("http11.send_request_headers.started", "http2.send_request_headers.started"):
+            with self.lock:
+                self.stats.requests += 1
+        elif event_name == "connection.connect_tcp.complete":
+            with self.lock:
+                self.stats.connections_opened += 1
+        elif event_name == "connection.start_tls.complete":
+            with self.lock:
+                self.stats.tls_handshakes += 1
+
+
+class PooledTransport(httpx.BaseTransport):
+    """
+    Shared, counted view of an httpx.HTTPTransport.
+
+    Every APIClient for the same origin gets the same instance, so closing a client
+    must not tear the pool down: close() is a no-op and the registry owns the lifecycle.
+    """
+
+    def __init__(self, transport: httpx.BaseTransport, recorder: _StatsRecorder):
+        self._transport = transport
+        self._recorder = recorder
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        upstream_trace = request.extensions.get("trace")
+
+        def trace(event_name, info):
+            self._recorder.on_event(event_name)
+            if upstream_trace is not None:
+                upstream_trace(event_name, info)
+
+        request.extensions = {**request.extensions, "trace": trace}
+        return self._transport.handle_request(request)
+
+    def close(self):
+        pass
+
+    def shutdown(self):
+        self._transport.close()
+
+
+class AsyncPooledTransport(httpx.AsyncBaseTransport):
+    """
+    Counted httpx.AsyncHTTPTransport.
+
+    Async connection pools are bound to the event loop that opened them, so each async
+    client owns its transport; the counters are still shared per origin.
+    """
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, recorder: _StatsRecorder):
+        self._transport = transport
+        self._recorder = recorder
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        upstream_trace = request.extensions.get("trace")
+
+        async def trace(event_name, info):
+            self._recorder.on_event(event_name)
+            if upstream_trace is not None:
+                await upstream_trace(event_name, info)
+
+        request.extensions = {**request.extensions, "trace": trace}
+        return await self._transport.handle_async_request(request)
+
+    async def aclose(self):
+        await self._transport.aclose()
+
+
+class TransportRegistry:
+    """Session-wide registry of pooled transports, keyed by origin (scheme, host, port)."""
+
+    def __init__(self, max_connections: int = 100, max_keepalive_connections: int = 20,
+                 keepalive_expiry: float = 30.0, http2: bool = False, retries: int = 2,
+                 retry_backoff: float = 0.5, retry_max_delay: float = 30.0):
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.http2 = http2
+        self.retries = retries
+        self.retry_backoff = retry_backoff
+        self.retry_max_delay = retry_max_delay
+        self.cassette: Optional[Cassette] = None
+        self.faults: Optional[FaultProfile] = None
+        self.fault_rng = random.Random()
+        self._transports: Dict[str, PooledTransport] = {}
+        self._stats: Dict[str, ConnectionStats] = {}
+        self._lock = threading.Lock()
+
+    def configure(self, settings: Settings):
+        """Apply pool, retry and fault settings. Transports built before are shut down and rebuilt on next use."""
+        self.limits = httpx.Limits(
+            max_connections=settings.http_max_connections,
+            max_keepalive_connections=settings.http_max_keepalive_connections,
+            keepalive_expiry=settings.http_keepalive_expiry,
+        )
+        self.http2 = settings.http2
+        self.retries = settings.http_retries
+        self.retry_backoff = settings.http_retry_backoff
+        self.retry_max_delay = settings.http_retry_max_delay
+        self.faults = fault_profile(settings.fault_profile)
+        # One stream of draws per xdist worker, so a rerun degrades the same requests.
+        self.fault_rng = random.Random(f"{settings.fault_seed}:{os.environ.get('PYTEST_XDIST_WORKER', '')}")
+        fault_stats.profile = settings.fault_profile
+        self.close()
+
+    def _with_retries(self, transport):
+        if self.faults is not None:
+            transport = FaultTransport(transport, self.faults, self.fault_rng)
+        # Retries sit outside the governor, so every attempt is rate limited.
+        transport = RetryTransport(GovernedTransport(transport), max_retries=self.retries, backoff=self.retry_backoff,
+                                   max_delay=self.retry_max_delay)
+        # A replayed response never reaches the wire, so it is neither retried nor counted.
+        return CassetteTransport(transport, self.cassette) if self.cassette is not None else transport
+
+    @staticmethod
+    def origin(base_url: str) -> str:
+        url = httpx.URL(base_url)
+        port = f":{url.port}" if url.port else ""
+        return f"{url.scheme}://{url.host}{port}"
+
+    def _recorder(self, key: str) -> _StatsRecorder:
+        return _StatsRecorder(self._stats.setdefault(key, ConnectionStats()), self._lock)
+
+    def get(self, base_url: str) -> PooledTransport:
+        key = self.origin(base_url)
+        with self._lock:
+            transport = self._transports.get(key)
+            if transport is None:
+                transport = PooledTransport(
+                    self._with_retries(httpx.HTTPTransport(limits=self.limits, http2=self.http2)),
+                    self._recorder(key),
+                )
+                self._transports[key] = transport
+            return transport
+
+    def create_async(self, base_url: str) -> AsyncPooledTransport:
+        key = self.origin(base_url)
+        with self._lock:
+            recorder = self._recorder(key)
+        return AsyncPooledTransport(
+            self._with_retries(httpx.AsyncHTTPTransport(limits=self.limits, http2=self.http2)),
+            recorder,
+        )
+
+    def rpc_transport(self) -> Optional[httpx.BaseTransport]:
+        """Transport for a JSON-RPC client when a fault profile is active, otherwise None."""
+        if self.faults is None:
+            return None
+        return FaultTransport(httpx.HTTPTransport(), self.faults, self.fault_rng, rpc=True)
+
+    def stats(self) -> Dict[str, ConnectionStats]:
+        with self._lock:
+            return {key: ConnectionStats(**value.to_dict()) for key, value in self._stats.items()}
+
+    def close(self):
+        with self._lock:
+            transports = list(self._transports.values())
+            self._transports.clear()
+        for transport in transports:
+            transport.shutdown()
+
+
+transport_registry = TransportRegistry()
+
+
+def format_connection_stats(stats: Dict[str, ConnectionStats]) -> Optional[str]:
+    if not stats:
+        return None
+    lines = []
+    for origin, value in sorted(stats.items()):
+        lines.append(
+            f"{origin}: {value.requests} requests, {value.connections_opened} connections opened, "
+            f"{value.tls_handshakes} TLS handshakes, {value.reuse_ratio:.1%} reused"
+        )
+    return "\n".join(lines)
@@ -22,6 +22,7 @@ class Settings(BaseSettings):
     admin_pass: Optional[str] = None
 
     api_token: Optional[str] = None
+    token_refresh_margin: int = 60
     api_key: Optional[str] = None
     license_key: Optional[str] = None
 
@@ -29,6 +30,12 @@ class Settings(BaseSettings):
     eth_rpc_testnet_url: Optional[str] = None
     eth_private_key: Optional[str] = None
     eth_test_address: Optional[str] = None
+    # Without an ETH_RPC_*_URL, eth_client runs against an in-process eth-tester chain
+    # (control_panel/fake_eth_node.py); 0 mines every transaction at once.
+    local_eth_block_time: float = 0.0
+    local_eth_accounts: int = 10
+    # Calls per JSON-RPC batch array sent by EthereumClient.batch(); halved if the node refuses it.
+    eth_rpc_batch_size: int = 100
 
     kubeconfig: str = "~/.kube/config"
     k8s_namespace: str = "default"
@@ -48,6 +55,48 @@ class Settings(BaseSettings):
     test_timeout: int = 300
     node_creation_slo: int = 600
     parallel_deployments: int = 5
+    node_creation_baseline_path: str = "tests/nonfunctional/baselines/node_creation.json"
+    update_benchmark_baselines: bool = False
+    node_teardown_concurrency: int = 8
+    node_ledger_path: str = ".node-ledger.jsonl"
+    node_registry_path: str = ".node-registry.sqlite"
+    # A test waiting for a pool node fails after this long; failed pool nodes are replaced at most this often per run.
+    node_lease_timeout: int = 900
+    node_pool_max_replacements: int = 10
+    reap_orphan_nodes: bool = True
+
+    http_max_connections: int = 100
+    http_max_keepalive_connections: int = 20
+    http_keepalive_expiry: float = 30.0
+    http2: bool = False
+    http_retries: int = 2
+    http_retry_backoff: float = 0.5
+    http_retry_max_delay: float = 30.0
+    # Retries allowed in the whole run, shared by all xdist workers.
+    http_retry_budget: int = 50
+    # Run-wide limits per endpoint group, shared by all xdist workers; 0 disables them.
+    rate_limit_auth_rps: float = 0.0
+    rate_limit_nodes_rps: float = 0.0
+    rate_limit_internal_rps: float = 0.0
+    rate_limit_burst: int = 10
+    # Split between xdist workers, so a non-zero limit must be at least the number of workers.
+    max_in_flight_auth: int = 0
+    max_in_flight_nodes: int = 0
+    max_in_flight_internal: int = 0
+    # Degrade API and RPC traffic with a named profile from clients/fault_transport.py ("lossy-wan", "slow-ingress").
+    fault_profile: str = ""
+    fault_seed: int = 0
+
+    # Serve cp_nodes_api_url from an in-process fake (control_panel/fake_server.py) instead of a real deployment.
+    fake_control_panel: bool = False
+    fake_node_pending_delay: float = 1.0
+    fake_node_deleting_delay: float = 0.5
+    fake_node_error_rate: float = 0.0
+    # With the fake only: waits and the fake run on virtual time, so sleeping returns at once.
+    virtual_clock: bool = False
+    # record | replay | rerecord API traffic to a cassette (clients/cassette.py); replay needs no network.
+    cassette_mode: str = "off"
+    cassette_path: str = "cassettes/api.jsonl.gz"
 
     log_level: str = "INFO"
 
@@ -58,6 +107,11 @@ class Settings(BaseSettings):
     screenshot: str = "only-on-failure"
 
     allure_results_dir: str = "allure-results"
+    allure_http_attachments: str = "eager"
+    allure_attachment_budget: int = 1_048_576
+    allure_attachment_max_body: int = 65_536
+    # How bodies over allure_attachment_max_body are cut down: "truncate" (head and tail) or "sample".
+    allure_attachment_oversize: str = "truncate"
 
     @property
     def login_page_url(self) -> str:
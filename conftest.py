@@ -8,6 +8,12 @@ load_dotenv()
 
 pytest_plugins = [
     "fixtures.playwright_fixtures",
+    "fixtures.http_fixtures",
+    "fixtures.latency_fixtures",
+    "fixtures.wait_fixtures",
+    "fixtures.node_timeline_fixtures",
+    "fixtures.fake_cp_fixtures",
+    "fixtures.cassette_fixtures",
     "fixtures.api_fixtures",
     "fixtures.eth_fixtures",
     "fixtures.k8s_fixtures",
@@ -0,0 +1,404 @@
+"""
+Local Ethereum JSON-RPC endpoint backed by eth-tester/py-evm, for running EthereumClient offline.
+
+Serves the methods of the RPC smoke, contract deployment and transaction scenarios in
+concept.md over plain HTTP in wire format (hex quantities, camelCase fields), from pre-funded
+accounts with known keys. With `block_time` 0 every transaction is mined at once; otherwise
+transactions wait in a pool and a block (empty if need be) is mined every `block_time` seconds.
+
+eth-tester is optional: `uv sync --extra local-eth`.
+"""
+import json
+import threading
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from eth_account import Account
+from eth_utils import keccak
+
+from control_panel.fake_server import FakeHTTPServer
+
+try:
+    from eth_tester import EthereumTester, PyEVMBackend
+    from eth_tester.exceptions import (
+        BlockNotFound, TransactionFailed, TransactionNotFound, ValidationError as EthTesterValidationError
+    )
+except ImportError:
+    EthereumTester = PyEVMBackend = None
+
+CLIENT_VERSION = "FakeEthNode/py-evm"
+DEFAULT_BALANCE = 1_000_000 * 10 ** 18
+PRIORITY_FEE = 10 ** 9
+BLOCK_TAGS = ("latest", "earliest", "pending", "safe", "finalized")
+LOGS_BLOOM_BYTES = 256
+
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+INTERNAL_ERROR = -32603
+EXECUTION_REVERTED = 3
+
+_TX_QUANTITIES = ("gas", "gasPrice", "value", "nonce", "maxFeePerGas", "maxPriorityFeePerGas", "chainId", "type")
+
+
+class RPCError(Exception):
+
+    def __init__(self, code: int, message: str, data: Any = None):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+        self.data = data
+
+    def to_dict(self) -> Dict[str, Any]:
+        error = {"code": self.code, "message": self.message}
+        if self.data is not None:
+            error["data"] = self.data
+        return error
+
+
+@dataclass(frozen=True)
+class FundedAccount:
+    address: str
+    private_key: str
+
+
+def _camel(name: str) -> str:
+    head, *rest = name.split("_")
+    return head + "".join(part.title() for part in rest)
+
+
+def _wire(value):
+    """eth-tester's Python values to JSON-RPC wire format."""
+    if isinstance(value, bool) or value is None or isinstance(value, float):
+        return value
+    if isinstance(value, int):
+        return hex(value)
+    if isinstance(value, (bytes, bytearray)):
+        return "0x" + bytes(value).hex()
+    if isinstance(value, dict):
+        return {_camel(key): _wire(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_wire(item) for item in value]
+    return value
+
+
+def _format_transaction(transaction: Dict[str, Any]) -> Dict[str, Any]:
+    transaction = dict(transaction)
+    transaction["input"] = transaction.pop("data", "0x")
+    return _wire(transaction)
+
+
+def _format_block(block: Dict[str, Any]) -> Dict[str, Any]:
+    block = dict(block)
+    block["miner"] = block.pop("coinbase")
+    if isinstance(block.get("logs_bloom"), int):
+        block["logs_bloom"] = block["logs_bloom"].to_bytes(LOGS_BLOOM_BYTES, "big")
+    transactions = [_format_transaction(tx) if isinstance(tx, dict) else tx for tx in block.pop("transactions")]
+    formatted = _wire(block)
+    formatted["transactions"] = transactions
+    return formatted
+
+
+def _format_receipt(receipt: Dict[str, Any]) -> Dict[str, Any]:
+    receipt = dict(receipt)
+    # Pre-Byzantium field; receipts carry a status instead.
+    receipt.pop("state_root", None)
+    receipt.setdefault("logs_bloom", bytes(LOGS_BLOOM_BYTES))
+    return _wire(receipt)
+
+
+def _quantity(value) -> int:
+    if isinstance(value, int) and not isinstance(value, bool):
+        return value
+    if isinstance(value, str) and value.startswith("0x"):
+        return int(value, 16)
+    raise RPCError(INVALID_PARAMS, f"Invalid quantity: {value!r}")
+
+
+def _block_id(value):
+    if value in BLOCK_TAGS:
+        return "latest" if value in ("safe", "finalized") else value
+    return _quantity(value)
+
+
+def _inbound_transaction(transaction: Dict[str, Any], default_sender: str) -> Dict[str, Any]:
+    """A JSON-RPC call object (camelCase, hex quantities) as eth-tester expects it."""
+    if not isinstance(transaction, dict):
+        raise RPCError(INVALID_PARAMS, "Transaction must be an object")
+    result = {}
+    for key, value in transaction.items():
+        if key in ("input", "data"):
+            result["data"] = value
+        elif key in _TX_QUANTITIES:
+            result[_snake(key)] = _quantity(value)
+        elif key in ("from", "to"):
+            result[key] = value
+    # Nodes run calls without a sender from the zero address for free; py-evm charges the
+    # sender even in a call, so a funded account stands in.
+    result.setdefault("from", default_sender)
+    return result
+
+
+def _snake(name: str) -> str:
+    return "".join(f"_{char.lower()}" if char.isupper() else char for char in name)
+
+
+class FakeEthNode:
+    """
+    An eth-tester chain plus a ThreadingHTTPServer speaking JSON-RPC for it, single requests and batches.
+
+    `accounts` addresses are funded with `balance` wei in genesis; their keys are in
+    `self.accounts`. Batches longer than `max_batch_size` (0: unlimited) are turned down
+    with a single error, like geth's BatchRequestLimit.
+    """
+
+    def __init__(self, accounts: int = 10, balance: int = DEFAULT_BALANCE, block_time: float = 0.0,
+                 max_batch_size: int = 0):
+        if EthereumTester is None:
+            raise RuntimeError('FakeEthNode needs eth-tester: uv sync --extra local-eth')
+        backend = PyEVMBackend(genesis_state=PyEVMBackend.generate_genesis_state(
+            overrides={"balance": balance}, num_accounts=accounts))
+        self.tester = EthereumTester(backend)
+        self.chain_id: int = backend.chain.chain_id
+        self.accounts = [FundedAccount(Account.from_key(key.to_bytes()).address, key.to_hex())
+                         for key in backend.account_keys]
+        self.block_time = block_time
+        self.max_batch_size = max_batch_size
+        self.batches: List[int] = []
+        # Raw transactions waiting for the next block when block_time is set, by hash.
+        self._pool: Dict[str, str] = {}
+        self._lock = threading.RLock()
+        self._stop = threading.Event()
+        self._server: Optional[FakeHTTPServer] = None
+        self.methods: Dict[str, Callable[..., Any]] = {
+            "web3_clientVersion": lambda: CLIENT_VERSION,
+            "net_version": lambda: str(self.chain_id),
+            "net_listening": lambda: True,
+            "net_peerCount": lambda: "0x0",
+            "eth_chainId": lambda: hex(self.chain_id),
+            "eth_syncing": lambda: False,
+            "eth_accounts": lambda: [account.address for account in self.accounts],
+            "eth_blockNumber": lambda: hex(self.tester.get_block_by_number("latest")["number"]),
+            "eth_getBlockByNumber": self.get_block_by_number,
+            "eth_getBlockByHash": self.get_block_by_hash,
+            "eth_getBalance": lambda address, block="latest": hex(self.tester.get_balance(address, _block_id(block))),
+            "eth_getCode": lambda address, block="latest": self.tester.get_code(address, _block_id(block)),
+            "eth_getTransactionCount": self.get_transaction_count,
+            "eth_gasPrice": lambda: hex(self._base_fee() + PRIORITY_FEE),
+            "eth_maxPriorityFeePerGas": lambda: hex(PRIORITY_FEE),
+            "eth_feeHistory": self.fee_history,
+            "eth_estimateGas": lambda tx, block="latest": hex(
+                self.tester.estimate_gas(self._transaction(tx), _block_id(block))),
+            "eth_call": lambda tx, block="latest": self.tester.call(self._transaction(tx), _block_id(block)),
+            "eth_sendRawTransaction": self.send_raw_transaction,
+            "eth_getTransactionByHash": self.get_transaction_by_hash,
+            "eth_getTransactionReceipt": self.get_transaction_receipt,
+            "eth_getLogs": self.get_logs,
+        }
+
+    # -- lifecycle ---------------------------------------------------------------------------
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        self._server = FakeHTTPServer((host, port), _handler_for(self))
+        threading.Thread(target=self._server.serve_forever, name="fake-eth-node", daemon=True).start()
+        if self.block_time > 0:
+            self._stop.clear()
+            threading.Thread(target=self._produce_blocks, name="fake-eth-node-miner", daemon=True).start()
+        return self.url
+
+    def stop(self):
+        self._stop.set()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    def _produce_blocks(self):
+        while not self._stop.wait(self.block_time):
+            self.mine()
+
+    def mine(self) -> int:
+        """Include every pooled transaction and close the block; returns the new head number."""
+        with self._lock:
+            pool, self._pool = self._pool, {}
+            # eth-tester mines each submitted transaction into a block of its own; an idle tick
+            # still produces one, so the head moves every block_time like on a real chain.
+            for raw in pool.values():
+                try:
+                    self.tester.send_raw_transaction(raw)
+                except (TransactionFailed, EthTesterValidationError):
+                    pass
+            if not pool:
+                self.tester.mine_blocks(1)
+            return self.tester.get_block_by_number("latest")["number"]
+
+    # -- JSON-RPC ----------------------------------------------------------------------------
+
+    def handle(self, payload: Any) -> Any:
+        """Answer one request object or a batch array; notifications get no answer."""
+        if isinstance(payload, list):
+            if not payload:
+                return self._error(None, RPCError(INVALID_REQUEST, "Empty batch"))
+            if self.max_batch_size and len(payload) > self.max_batch_size:
+                return self._error(None, RPCError(INVALID_REQUEST, "batch too large"))
+            self.batches.append(len(payload))
+            responses = [self._handle_one(item) for item in payload]
+            return [response for response in responses if response is not None] or None
+        return self._handle_one(payload)
+
+    def _handle_one(self, request: Any) -> Optional[Dict[str, Any]]:
+        if not isinstance(request, dict) or request.get("jsonrpc") != "2.0" \
+                or not isinstance(request.get("method"), str):
+            return self._error(None, RPCError(INVALID_REQUEST, "Invalid request"))
+        request_id = request.get("id")
+        params = request.get("params", [])
+        method = self.methods.get(request["method"])
+        try:
+            if method is None:
+                raise RPCError(METHOD_NOT_FOUND, f"The method {request['method']} does not exist/is not available")
+            if not isinstance(params, list):
+                raise RPCError(INVALID_PARAMS, "params must be an array")
+            with self._lock:
+                result = method(*params)
+        except RPCError as e:
+            return self._error(request_id, e)
+        except TransactionFailed as e:
+            return self._error(request_id, RPCError(EXECUTION_REVERTED, "execution reverted", _revert_data(e)))
+        except (EthTesterValidationError, TypeError, ValueError) as e:
+            return self._error(request_id, RPCError(INVALID_PARAMS, str(e)))
+        except Exception as e:
+            return self._error(request_id, RPCError(INTERNAL_ERROR, str(e)))
+        if "id" not in request:
+            return None
+        return {"jsonrpc": "2.0", "id": request_id, "result": result}
+
+    @staticmethod
+    def _error(request_id, error: RPCError) -> Dict[str, Any]:
+        return {"jsonrpc": "2.0", "id": request_id, "error": error.to_dict()}
+
+    # -- methods -----------------------------------------------------------------------------
+
+    def _transaction(self, transaction) -> Dict[str, Any]:
+        return _inbound_transaction(transaction, self.accounts[0].address)
+
+    def _base_fee(self) -> int:
+        return self.tester.get_block_by_number("pending")["base_fee_per_gas"]
+
+    def get_block_by_number(self, block, full_transactions: bool = False):
+        try:
+            return _format_block(self.tester.get_block_by_number(_block_id(block), full_transactions))
+        except BlockNotFound:
+            return None
+
+    def get_block_by_hash(self, block_hash: str, full_transactions: bool = False):
+        try:
+            return _format_block(self.tester.get_block_by_hash(block_hash, full_transactions))
+        except BlockNotFound:
+            return None
+
+    def get_transaction_count(self, address: str, block="latest") -> str:
+        nonce = self.tester.get_nonce(address, "latest" if block == "pending" else _block_id(block))
+        if block == "pending":
+            nonce += sum(1 for raw in self._pool.values()
+                         if Account.recover_transaction(raw).lower() == address.lower())
+        return hex(nonce)
+
+    def fee_history(self, block_count, newest_block="latest", reward_percentiles: Optional[List[float]] = None):
+        # Built from the blocks: eth-tester's own answer comes back empty for short chains.
+        newest = self.tester.get_block_by_number(_block_id(newest_block))["number"]
+        oldest = max(newest - _quantity(block_count) + 1, 0)
+        blocks = [self.tester.get_block_by_number(number) for number in range(oldest, newest + 1)]
+        try:
+            next_base_fee = self.tester.get_block_by_number(newest + 1)["base_fee_per_gas"]
+        except BlockNotFound:
+            next_base_fee = self._base_fee()
+        history = {
+            "oldest_block": oldest,
+            "base_fee_per_gas": [block["base_fee_per_gas"] for block in blocks] + [next_base_fee],
+            "gas_used_ratio": [block["gas_used"] / block["gas_limit"] for block in blocks],
+        }
+        if reward_percentiles:
+            history["reward"] = [[PRIORITY_FEE] * len(reward_percentiles) for _ in blocks]
+        return _wire(history)
+
+    def send_raw_transaction(self, raw: str) -> str:
+        if self.block_time <= 0:
+            return self.tester.send_raw_transaction(raw)
+        tx_hash = "0x" + keccak(hexstr=raw).hex()
+        self._pool[tx_hash] = raw
+        return tx_hash
+
+    def get_transaction_by_hash(self, tx_hash: str):
+        try:
+            return _format_transaction(self.tester.get_transaction_by_hash(tx_hash))
+        except TransactionNotFound:
+            return None
+
+    def get_transaction_receipt(self, tx_hash: str):
+        try:
+            return _format_receipt(self.tester.get_transaction_receipt(tx_hash))
+        except TransactionNotFound:
+            return None
+
+    def get_logs(self, log_filter: Dict[str, Any]):
+        if not isinstance(log_filter, dict):
+            raise RPCError(INVALID_PARAMS, "Filter must be an object")
+        from_block, to_block = log_filter.get("fromBlock", "latest"), log_filter.get("toBlock", "latest")
+        if "blockHash" in log_filter:
+            number = self.tester.get_block_by_hash(log_filter["blockHash"])["number"]
+            from_block = to_block = number
+        logs = self.tester.get_logs(from_block=_block_id(from_block), to_block=_block_id(to_block),
+                                    address=log_filter.get("address"), topics=log_filter.get("topics"))
+        return _wire(list(logs))
+
+
+def _revert_data(error: Exception) -> Optional[str]:
+    reason = error.args[0] if error.args else None
+    if isinstance(reason, (bytes, bytearray)):
+        return "0x" + bytes(reason).hex()
+    return None
+
+
+def _handler_for(node: FakeEthNode):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+
+        def log_message(self, *args):
+            pass
+
+        def _send(self, status: int, body: Any):
+            payload = json.dumps(body).encode() if body is not None else b""
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            try:
+                payload = json.loads(self.rfile.read(length))
+            except ValueError:
+                self._send(200, FakeEthNode._error(None, RPCError(PARSE_ERROR, "Parse error")))
+                return
+            self._send(200, node.handle(payload))
+
+        def do_GET(self):
+            self._send(405, {"error": "JSON-RPC is served over POST"})
+
+    return Handler
@@ -0,0 +1,807 @@
+"""
+In-memory stand-in for the Control Panel API (auth, nodes, deployments, presets).
+
+Implements the endpoints of openapi.yaml closely enough for `pytest -m api` to run offline:
+JWT-shaped tokens signed with a per-server secret, the pending -> running and
+deleting -> deleted node life cycle driven by configurable delays, and fault injection.
+Where a test expects something openapi.yaml or another test contradicts, the fake follows
+the spec and the test is marked `fake_unsupported`, which deselects it in fake runs.
+Run-time knobs are also exposed over HTTP under /__fake__/ so xdist workers can reach
+a server started by the controller.
+"""
+import base64
+import hashlib
+import hmac
+import json
+import random
+import re
+import secrets
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+import httpx
+
+from control_panel.node import NodePreset, NodeState
+from utils.clock import VIRTUAL_TIME_HEADER, SystemClock, VirtualClock, clock as run_clock
+
+MAX_HEADER_BYTES = 16384
+ACCESS_TOKEN_TTL = 900
+REFRESH_TOKEN_TTL = 30 * 24 * 3600
+ETH_PRESETS = (NodePreset.ETH_HOODIE, NodePreset.ETH_SEPOLIA, NodePreset.ETH_MAINNET)
+USERNAME_MIN_LENGTH, USERNAME_MAX_LENGTH = 3, 50
+PENDING_DELAY_HEADER = "X-Fake-Pending-Delay"
+
+SECURITY_HEADERS = {
+    "X-Content-Type-Options": "nosniff",
+    "X-Frame-Options": "DENY",
+    "Strict-Transport-Security": "max-age=31536000; includeSubDomains",
+    "X-XSS-Protection": "1; mode=block",
+}
+AUTH_HEADERS = {
+    "Cache-Control": "no-cache, no-store, must-revalidate",
+    "Pragma": "no-cache",
+    "Access-Control-Allow-Origin": "*",
+    "Access-Control-Allow-Methods": "GET, POST, PUT, DELETE, OPTIONS",
+    "Access-Control-Allow-Headers": "Authorization, Content-Type",
+    "Access-Control-Allow-Credentials": "true",
+}
+# Endpoints that answer with the stricter no-store caching headers instead.
+NO_STORE_PATHS = ("/v1/auth/logout", "/v1/auth/password", "/v1/auth/audit-log")
+NO_STORE_HEADERS = {"Cache-Control": "no-store", "Expires": "0", "Pragma": "no-cache"}
+
+
+class HTTPError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+def _iso(timestamp: float) -> str:
+    return datetime.fromtimestamp(timestamp, timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+def _b64(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).decode().rstrip("=")
+
+
+def _unb64(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+
+def _is_v4_uuid(value: str) -> bool:
+    try:
+        return uuid.UUID(value).version == 4
+    except ValueError:
+        return False
+
+
+def _strong_password(password: str) -> bool:
+    return (len(password) >= 8 and any(c.islower() for c in password) and any(c.isupper() for c in password)
+            and any(c.isdigit() for c in password) and any(not c.isalnum() for c in password))
+
+
+@dataclass
+class FakeUser:
+    username: str
+    password: str
+    tenant_role: str = "admin"
+    id: str = field(default_factory=lambda: str(uuid.uuid4()))
+    tenant_id: str = field(default_factory=lambda: str(uuid.uuid4()))
+    created_at: float = field(default_factory=time.time)
+    last_login: Optional[float] = None
+
+    def profile(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "user_id": self.id,
+            "username": self.username,
+            # Not derived from the username, which may be renamed to anything openapi.yaml allows.
+            "email": f"user-{self.id[:8]}@example.com",
+            "tenant_id": self.tenant_id,
+            "tenant_name": "Fake tenant",
+            "tenant_role": self.tenant_role,
+            "created_at": _iso(self.created_at),
+            "last_login": _iso(self.last_login) if self.last_login else None,
+        }
+
+
+@dataclass
+class FakeNode:
+    """A node and its deployment. Delays are fixed when the node is created or deleted."""
+    id: str
+    preset_instance_id: str
+    created_at: float
+    pending_delay: float
+    fails: bool
+    revisions: List[Dict[str, Any]] = field(default_factory=list)
+    delete_requested_at: Optional[float] = None
+    deleting_delay: float = 0.0
+
+    def status(self, now: float) -> str:
+        if self.delete_requested_at is not None:
+            return NodeState.DELETED if now - self.delete_requested_at >= self.deleting_delay else NodeState.DELETING
+        if now - self.created_at < self.pending_delay:
+            return NodeState.PENDING
+        return NodeState.ERROR if self.fails else NodeState.RUNNING
+
+    @property
+    def network(self) -> str:
+        return self.preset_instance_id.rsplit("~", 1)[-1].split(".")[-3].rsplit("_", 1)[-1]
+
+
+@dataclass
+class Fault:
+    """Answer the next `count` requests matching `method` and `path` (a regex) with `status`, after `delay`."""
+    path: str
+    status: int = 500
+    method: str = "*"
+    count: int = 1
+    delay: float = 0.0
+
+    def matches(self, method: str, path: str) -> bool:
+        return self.count > 0 and self.method in ("*", method) and re.search(self.path, path) is not None
+
+
+Route = Tuple[str, "re.Pattern[str]", Callable]
+
+
+class FakeHTTPServer(ThreadingHTTPServer):
+    """ThreadingHTTPServer whose listen backlog holds a burst of parallel workers' connections."""
+    # The default of 5 overflows under tens of concurrent clients, and every dropped SYN costs a
+    # second-long retransmit, which showed up as the p90 of the fake's own latency.
+    request_queue_size = 128
+    daemon_threads = True
+
+
+class FakeControlPanel:
+    """
+    The server state plus a ThreadingHTTPServer serving it.
+
+    `pending_delay`/`deleting_delay` are the seconds a node stays pending/deleting,
+    `error_rate` the share of nodes that end up in error instead of running.
+    """
+
+    def __init__(self, users: Optional[List[Tuple[str, str]]] = None, pending_delay: float = 1.0,
+                 deleting_delay: float = 0.5, error_rate: float = 0.0, clock: Optional[SystemClock] = None):
+        self.pending_delay = pending_delay
+        self.deleting_delay = deleting_delay
+        self.error_rate = error_rate
+        # The run-wide clock by default, so a VirtualClock installed later is picked up too.
+        self.clock = clock or run_clock
+        self.users: Dict[str, FakeUser] = {}
+        for username, password in users or [("user", "Passw0rd!"), ("admin", "Passw0rd!")]:
+            self.add_user(username, password)
+        self.nodes: Dict[str, FakeNode] = {}
+        self.faults: List[Fault] = []
+        self.audit_log: List[Dict[str, Any]] = []
+        # Session id -> jti of its current access token, or None once logged out.
+        self._sessions: Dict[str, Optional[str]] = {}
+        self._secret = secrets.token_bytes(32)
+        # Virtual time of the worker whose request this thread is serving, if it sent one.
+        self._caller = threading.local()
+        self._lock = threading.RLock()
+        self._server: Optional[FakeHTTPServer] = None
+        self.routes: List[Route] = []
+        self._add_routes()
+
+    # -- lifecycle ---------------------------------------------------------------------------
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        self._server = FakeHTTPServer((host, port), _handler_for(self))
+        threading.Thread(target=self._server.serve_forever, name="fake-control-panel", daemon=True).start()
+        return self.url
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    def add_user(self, username: str, password: str, tenant_role: str = "admin") -> FakeUser:
+        user = FakeUser(username, password, tenant_role, created_at=self.clock.time())
+        self.users[user.id] = user
+        return user
+
+    def configure(self, **settings):
+        """Change pending_delay, deleting_delay or error_rate at run time."""
+        for name, value in settings.items():
+            if name not in ("pending_delay", "deleting_delay", "error_rate"):
+                raise ValueError(f"Unknown fake server setting: {name}")
+            setattr(self, name, float(value))
+
+    def inject(self, path: str, status: int = 500, method: str = "*", count: int = 1, delay: float = 0.0):
+        with self._lock:
+            self.faults.append(Fault(path, status, method.upper(), count, delay))
+
+    def reset(self):
+        with self._lock:
+            self.nodes.clear()
+            self.faults.clear()
+            self.audit_log.clear()
+
+    def _now(self) -> float:
+        """
+        The requesting worker's time, or else the server's.
+
+        Token and audit times follow the caller's clock, so one worker skipping 30 days
+        does not expire the tokens of the others. Node life cycles run on the server clock,
+        which every worker's sleeps advance.
+        """
+        caller_time = getattr(self._caller, "time", None)
+        return self.clock.time() if caller_time is None else caller_time
+
+    # -- tokens ------------------------------------------------------------------------------
+
+    def _issue(self, user: FakeUser, session: str, token_type: str, ttl: int) -> str:
+        now = self._now()
+        jti = uuid.uuid4().hex
+        if token_type == "access":
+            self._sessions[session] = jti
+        header = _b64(json.dumps({"alg": "HS256", "typ": "JWT"}).encode())
+        payload = _b64(json.dumps({"sub": user.id, "sid": session, "type": token_type, "jti": jti,
+                                   "iat": int(now), "exp": int(now + ttl)}).encode())
+        signature = _b64(hmac.new(self._secret, f"{header}.{payload}".encode(), hashlib.sha256).digest())
+        return f"{header}.{payload}.{signature}"
+
+    def _claims(self, token: Optional[str], token_type: str) -> Dict[str, Any]:
+        """Verified claims of a live token, or HTTPError 401."""
+        parts = (token or "").split(".")
+        if len(parts) != 3 or not all(parts):
+            raise HTTPError(401, "invalid token")
+        try:
+            expected = _b64(hmac.new(self._secret, f"{parts[0]}.{parts[1]}".encode(), hashlib.sha256).digest())
+            if not hmac.compare_digest(expected, parts[2]):
+                raise HTTPError(401, "invalid token signature")
+            claims = json.loads(_unb64(parts[1]))
+        except (ValueError, TypeError):
+            raise HTTPError(401, "invalid token")
+        if claims.get("type") != token_type or claims.get("sub") not in self.users:
+            raise HTTPError(401, "invalid token")
+        if claims.get("exp", 0) <= self._now():
+            raise HTTPError(401, "token expired")
+        current = self._sessions.get(claims.get("sid"))
+        if current is None or (token_type == "access" and claims.get("jti") != current):
+            raise HTTPError(401, "token revoked")
+        return claims
+
+    def _authenticate(self, request: "FakeRequest") -> Dict[str, Any]:
+        authorization = request.headers.get("Authorization", "")
+        if not authorization.startswith("Bearer "):
+            raise HTTPError(401, "missing or invalid authorization header")
+        return self._claims(authorization[len("Bearer "):], "access")
+
+    def _audit(self, user: FakeUser, action: str, request: "FakeRequest", **details):
+        self.audit_log.append({
+            "id": str(uuid.uuid4()), "user_id": user.id, "action": action,
+            "ip_address": request.client_ip, "user_agent": request.headers.get("User-Agent", ""),
+            "timestamp": _iso(self._now()), "at": self._now(), "details": details or None,
+        })
+
+    # -- routing -----------------------------------------------------------------------------
+
+    def _add_routes(self):
+        def route(method: str, pattern: str, handler: Callable):
+            self.routes.append((method, re.compile(f"^{pattern}$"), handler))
+
+        node_id = r"(?P<node_id>[^/]+)"
+        route("GET", "/healthz", lambda request: (200, {"status": "ok"}))
+        route("POST", "/v1/auth/login", self.login)
+        route("POST", "/v1/auth/refresh", self.refresh)
+        route("POST", "/v1/auth/logout", self.logout)
+        route("GET", "/v1/auth/profile", self.profile)
+        route("PUT", "/v1/auth/password", self.change_password)
+        route("PUT", "/v1/auth/username", self.change_username)
+        route("GET", "/v1/auth/audit-log", self.get_audit_log)
+        route("GET", "/v1/presets/types", self.list_preset_types)
+        route("GET", r"/v1/presets/types/(?P<preset_id>[^/]+)", self.get_preset_type)
+        route("GET", "/v1/presets/instances", self.list_preset_instances)
+        route("GET", r"/v1/presets/instances/(?P<preset_id>[^/]+)", self.get_preset_instance)
+        route("POST", "/v1/ui/nodes", self.create_node)
+        route("GET", "/v1/ui/nodes", self.list_nodes)
+        route("GET", f"/v1/ui/nodes/{node_id}", self.get_node)
+        route("POST", f"/v1/ui/nodes/{node_id}/schedule-delete", self.schedule_delete)
+        route("POST", "/v1/ui/deployments", self.create_node)
+        route("GET", "/v1/ui/deployments", self.list_deployments)
+        route("GET", f"/v1/ui/deployments/{node_id}", self.get_deployment)
+        route("POST", f"/v1/ui/deployments/{node_id}/schedule-delete", self.schedule_delete)
+        route("GET", f"/v1/ui/deployments/{node_id}/revisions", self.list_revisions)
+        route("POST", f"/v1/ui/deployments/{node_id}/revisions", self.create_revision)
+        route("GET", rf"/v1/ui/deployments/{node_id}/revisions/(?P<revision_id>[^/]+)", self.get_revision)
+        route("POST", "/__fake__/config", self._control_config)
+        route("POST", "/__fake__/faults", self._control_faults)
+        route("POST", "/__fake__/reset", self._control_reset)
+        route("GET", "/__fake__/clock", self._control_clock)
+        route("POST", "/__fake__/clock", self._control_clock)
+
+    def dispatch(self, request: "FakeRequest") -> Tuple[int, Any, Dict[str, str]]:
+        headers = dict(SECURITY_HEADERS)
+        is_auth = request.path.startswith("/v1/auth")
+        if is_auth:
+            headers.update(AUTH_HEADERS)
+        if request.path in NO_STORE_PATHS:
+            headers.update(NO_STORE_HEADERS)
+        if request.method == "OPTIONS":
+            return 204, "", {**headers, **AUTH_HEADERS}
+        if len(request.headers.get("Authorization", "")) > MAX_HEADER_BYTES:
+            if is_auth:
+                return 431, {"error": "request header fields too large"}, headers
+            # The nodes API sits behind nginx, which answers in HTML.
+            return 400, "<html><body><h1>400 Bad Request</h1>Request Header Or Cookie Too Large</body></html>", headers
+        with self._lock:
+            fault = next((fault for fault in self.faults if fault.matches(request.method, request.path)), None)
+            if fault is not None:
+                fault.count -= 1
+        if fault is not None:
+            self.clock.sleep(fault.delay)
+            return fault.status, {"error": "injected fault"}, headers
+        # Only the auth service answers 405; the nodes API router treats a wrong method as an unknown route.
+        allowed = False
+        for method, pattern, handler in self.routes:
+            match = pattern.match(request.path)
+            if match is None:
+                continue
+            if method != request.method:
+                allowed = is_auth
+                continue
+            try:
+                if is_auth and request.headers.get("Content-Type") != "application/json":
+                    raise HTTPError(400, "Content-Type must be application/json")
+                self._caller.time = request.virtual_time()
+                with self._lock:
+                    status, body = handler(request, **match.groupdict())
+            except HTTPError as error:
+                status, body = error.status, {"error": error.message}
+            finally:
+                self._caller.time = None
+            return status, body, headers
+        if allowed:
+            return 405, {"error": "method not allowed"}, headers
+        return 404, {"error": "not found"}, headers
+
+    # -- auth --------------------------------------------------------------------------------
+
+    def _user(self, claims: Dict[str, Any]) -> FakeUser:
+        return self.users[claims["sub"]]
+
+    def login(self, request: "FakeRequest"):
+        body = request.json_object()
+        username, password = body.get("username"), body.get("password")
+        if not isinstance(username, str) or not isinstance(password, str) \
+                or not username.strip() or not password.strip():
+            raise HTTPError(400, "username and password are required")
+        user = next((user for user in self.users.values() if user.username == username), None)
+        if user is None or not hmac.compare_digest(user.password, password):
+            raise HTTPError(401, "invalid credentials")
+        user.last_login = self._now()
+        self._audit(user, "login", request)
+        session = uuid.uuid4().hex
+        return 200, {
+            "access_token": self._issue(user, session, "access", ACCESS_TOKEN_TTL),
+            "refresh_token": self._issue(user, session, "refresh", REFRESH_TOKEN_TTL),
+            "expires_in": ACCESS_TOKEN_TTL,
+            "user": user.profile(),
+        }
+
+    def refresh(self, request: "FakeRequest"):
+        refresh_token = request.json_object().get("refresh_token")
+        if not isinstance(refresh_token, str):
+            raise HTTPError(400, "refresh_token is required")
+        claims = self._claims(refresh_token, "refresh")
+        # The refresh token is the credential here, but an access token sent along must still be valid.
+        if "Authorization" in request.headers:
+            self._authenticate(request)
+        # Issuing a new access token retires the previous one of the session.
+        return 200, {"access_token": self._issue(self._user(claims), claims["sid"], "access", ACCESS_TOKEN_TTL),
+                     "expires_in": ACCESS_TOKEN_TTL}
+
+    def logout(self, request: "FakeRequest"):
+        body = request.json_object()
+        access = self._authenticate(request)
+        if body.get("refresh_token") is not None:
+            refresh = self._claims(body["refresh_token"], "refresh")
+            self._sessions[refresh["sid"]] = None
+        self._sessions[access["sid"]] = None
+        self._audit(self._user(access), "logout", request)
+        return 200, {"message": "Successfully logged out"}
+
+    def profile(self, request: "FakeRequest"):
+        return 200, self._user(self._authenticate(request)).profile()
+
+    def change_password(self, request: "FakeRequest"):
+        user = self._user(self._authenticate(request))
+        body = request.json_object()
+        old, new = body.get("old_password"), body.get("new_password")
+        if not isinstance(old, str) or not isinstance(new, str) or not old.strip() or not new.strip():
+            raise HTTPError(400, "old_password and new_password are required")
+        if not hmac.compare_digest(user.password, old):
+            raise HTTPError(400, "old password is incorrect")
+        if old == new:
+            raise HTTPError(400, "new password must differ from the old one")
+        if not _strong_password(new):
+            raise HTTPError(400, "password is too weak")
+        user.password = new
+        self._audit(user, "change_password", request)
+        return 200, {"message": "Password changed successfully"}
+
+    def change_username(self, request: "FakeRequest"):
+        user = self._user(self._authenticate(request))
+        new_username = request.json_object().get("new_username")
+        # openapi.yaml only bounds the length.
+        if not isinstance(new_username, str) or not new_username.strip() \
+                or not USERNAME_MIN_LENGTH <= len(new_username) <= USERNAME_MAX_LENGTH:
+            raise HTTPError(400, f"new_username must be {USERNAME_MIN_LENGTH}-{USERNAME_MAX_LENGTH} characters")
+        if any(other.username == new_username for other in self.users.values()):
+            raise HTTPError(400, "username is taken")
+        user.username = new_username
+        self._audit(user, "change_username", request)
+        return 200, user.profile()
+
+    def get_audit_log(self, request: "FakeRequest"):
+        user = self._user(self._authenticate(request))
+        page, page_size = request.positive_int("page", 1), request.positive_int("page_size", 20)
+        since, until = request.timestamp("since"), request.timestamp("until")
+        entries = [entry for entry in reversed(self.audit_log) if entry["user_id"] == user.id
+                   and (since is None or entry["at"] >= since) and (until is None or entry["at"] < until)]
+        entries = [{key: value for key, value in entry.items() if key != "at"} for entry in entries]
+        start = (page - 1) * page_size
+        return 200, {"results": entries[start:start + page_size], "total": len(entries),
+                     "page": page, "page_size": page_size}
+
+    # -- presets -----------------------------------------------------------------------------
+
+    def _preset_instance(self, preset_id: str) -> Dict[str, Any]:
+        return {"id": preset_id, "type": preset_id.rsplit("~", 1)[0] + "~",
+                "name": preset_id.rsplit("~", 1)[-1].split(".")[-3], "values": {}}
+
+    def list_preset_types(self, request: "FakeRequest"):
+        self._authenticate(request)
+        types = sorted({preset.rsplit("~", 1)[0] + "~" for preset in ETH_PRESETS})
+        return 200, {"results": [{"id": type_id} for type_id in types]}
+
+    def get_preset_type(self, request: "FakeRequest", preset_id: str):
+        self._authenticate(request)
+        if not any(preset.startswith(preset_id) for preset in ETH_PRESETS):
+            raise HTTPError(404, "preset type not found")
+        return 200, {"id": preset_id}
+
+    def list_preset_instances(self, request: "FakeRequest"):
+        self._authenticate(request)
+        return 200, {"results": [self._preset_instance(preset) for preset in ETH_PRESETS]}
+
+    def get_preset_instance(self, request: "FakeRequest", preset_id: str):
+        self._authenticate(request)
+        if preset_id not in ETH_PRESETS:
+            raise HTTPError(404, "preset instance not found")
+        return 200, self._preset_instance(preset_id)
+
+    # -- nodes and deployments ---------------------------------------------------------------
+
+    def _status(self, node: FakeNode) -> str:
+        return node.status(self.clock.time())
+
+    def _node(self, node_id: str) -> FakeNode:
+        if not _is_v4_uuid(node_id):
+            raise HTTPError(400, "invalid node id")
+        node = self.nodes.get(node_id.lower())
+        if node is None:
+            raise HTTPError(404, "node not found")
+        return node
+
+    def _preset(self, request: "FakeRequest") -> Tuple[str, Dict[str, Any]]:
+        body = request.json_object()
+        preset_instance_id = body.get("preset_instance_id")
+        if not isinstance(preset_instance_id, str) or not preset_instance_id.strip():
+            raise HTTPError(400, "preset_instance_id is required")
+        if preset_instance_id not in ETH_PRESETS:
+            raise HTTPError(400, "unsupported preset instance")
+        overrides = body.get("preset_override_values") or {}
+        if not isinstance(overrides, dict):
+            raise HTTPError(400, "preset_override_values must be an object")
+        return preset_instance_id, overrides
+
+    def _new_revision(self, node: FakeNode, preset_instance_id: str, overrides: Dict[str, Any]) -> Dict[str, Any]:
+        now = self.clock.time()
+        revision = {
+            "id": str(uuid.uuid4()), "deployment_id": node.id, "preset_type": preset_instance_id.rsplit("~", 1)[0] + "~",
+            "preset_instance_values": overrides, "version": len(node.revisions) + 1, "created_at": now,
+        }
+        node.revisions.append(revision)
+        return revision
+
+    def _revision_body(self, node: FakeNode, revision: Dict[str, Any]) -> Dict[str, Any]:
+        applied = self.clock.time() - revision["created_at"] >= node.pending_delay
+        status = ("failed" if node.fails else "applied") if applied else "pending"
+        applied_at = revision["created_at"] + node.pending_delay if status == "applied" else None
+        return {
+            **{key: value for key, value in revision.items() if key != "created_at"},
+            "status": status, "error_message": "provisioning failed" if status == "failed" else None,
+            "created_at": _iso(revision["created_at"]), "updated_at": _iso(applied_at or revision["created_at"]),
+            "applied_at": _iso(applied_at) if applied_at else None, "metadata": [],
+        }
+
+    def create_node(self, request: "FakeRequest"):
+        self._authenticate(request)
+        preset_instance_id, overrides = self._preset(request)
+        # A test can slow down just its own node, without racing other xdist workers through configure().
+        try:
+            pending_delay = float(request.headers.get(PENDING_DELAY_HEADER, self.pending_delay))
+        except ValueError:
+            raise HTTPError(400, f"{PENDING_DELAY_HEADER} must be a number of seconds")
+        node = FakeNode(str(uuid.uuid4()), preset_instance_id, self.clock.time(), pending_delay,
+                        random.random() < self.error_rate)
+        revision = self._new_revision(node, preset_instance_id, overrides)
+        self.nodes[node.id] = node
+        return 201, {"deployment_id": node.id, "initial_revision_id": revision["id"], "state": NodeState.PENDING}
+
+    def _node_item(self, node: FakeNode) -> Dict[str, Any]:
+        return {
+            "id": node.id, "name": f"{node.network}-{node.id[:8]}", "protocol": "ethereum", "network": node.network,
+            "created_at": _iso(node.created_at), "updated_at": _iso(node.delete_requested_at or node.created_at),
+            "status": self._status(node),
+        }
+
+    def list_nodes(self, request: "FakeRequest"):
+        self._authenticate(request)
+        items = [self._node_item(node) for node in self.nodes.values()]
+        items = [item for item in items if item["status"] != NodeState.DELETED]
+        return 200, {"results": items, "total": len(items)}
+
+    def get_node(self, request: "FakeRequest", node_id: str):
+        self._authenticate(request)
+        node = self._node(node_id)
+        revision = node.revisions[-1]
+        return 200, {**self._node_item(node), "revision": {"id": revision["id"], "metadata": [
+            {"name": "client", "fields": [{"name": "network", "type": "string", "value": node.network}]}
+        ]}}
+
+    def schedule_delete(self, request: "FakeRequest", node_id: str):
+        self._authenticate(request)
+        node = self._node(node_id)
+        status = self._status(node)
+        if status not in (NodeState.RUNNING, NodeState.ERROR):
+            raise HTTPError(400, f"node is {status}")
+        node.delete_requested_at = self.clock.time()
+        node.deleting_delay = self.deleting_delay
+        return 200, {"deployment_id": node.id, "state": NodeState.DELETING}
+
+    def _deployment(self, node: FakeNode) -> Dict[str, Any]:
+        status = self._status(node)
+        return {
+            "id": node.id, "state": "failed" if status == NodeState.ERROR else status,
+            "created_at": _iso(node.created_at), "updated_at": _iso(node.delete_requested_at or node.created_at),
+            "gts": {"preset_instance_id": node.preset_instance_id},
+        }
+
+    def list_deployments(self, request: "FakeRequest"):
+        self._authenticate(request)
+        deployments = [self._deployment(node) for node in self.nodes.values()]
+        return 200, request.page_of(deployments)
+
+    def get_deployment(self, request: "FakeRequest", node_id: str):
+        self._authenticate(request)
+        return 200, self._deployment(self._node(node_id))
+
+    def list_revisions(self, request: "FakeRequest", node_id: str):
+        self._authenticate(request)
+        node = self._node(node_id)
+        return 200, request.page_of([self._revision_body(node, revision) for revision in node.revisions])
+
+    def create_revision(self, request: "FakeRequest", node_id: str):
+        self._authenticate(request)
+        node = self._node(node_id)
+        if self._status(node) in (NodeState.DELETING, NodeState.DELETED):
+            raise HTTPError(400, "deployment is being deleted")
+        revision = self._new_revision(node, *self._preset(request))
+        return 201, {"revision_id": revision["id"], "deployment_id": node.id,
+                     "version": revision["version"], "state": "pending"}
+
+    def get_revision(self, request: "FakeRequest", node_id: str, revision_id: str):
+        self._authenticate(request)
+        node = self._node(node_id)
+        revision = next((revision for revision in node.revisions if revision["id"] == revision_id.lower()), None)
+        if revision is None:
+            raise HTTPError(404 if _is_v4_uuid(revision_id) else 400, "revision not found")
+        return 200, self._revision_body(node, revision)
+
+    # -- control -----------------------------------------------------------------------------
+
+    def _control_config(self, request: "FakeRequest"):
+        try:
+            self.configure(**request.json_object())
+        except (TypeError, ValueError) as error:
+            raise HTTPError(400, str(error))
+        return 200, {"pending_delay": self.pending_delay, "deleting_delay": self.deleting_delay,
+                     "error_rate": self.error_rate}
+
+    def _control_clock(self, request: "FakeRequest"):
+        """The server time; POST {"advance": seconds} moves a virtual clock forward."""
+        if request.method == "POST":
+            advance = request.json_object().get("advance")
+            if not self.clock.is_virtual:
+                raise HTTPError(400, "the server clock is not virtual")
+            if not isinstance(advance, (int, float)) or isinstance(advance, bool):
+                raise HTTPError(400, "advance must be a number of seconds")
+            self.clock.advance(advance)
+        return 200, {"time": self.clock.time()}
+
+    def _control_reset(self, request: "FakeRequest"):
+        self.reset()
+        return 200, {"message": "reset"}
+
+    def _control_faults(self, request: "FakeRequest"):
+        try:
+            self.inject(**request.json_object())
+        except TypeError as error:
+            raise HTTPError(400, str(error))
+        return 200, {"faults": len(self.faults)}
+
+
+class FakeControlPanelRemote:
+    """Steers a FakeControlPanel over its /__fake__/ endpoints, e.g. from an xdist worker."""
+
+    def __init__(self, url: str):
+        self.url = url.rstrip("/")
+
+    def _post(self, endpoint: str, body: Dict[str, Any]) -> Dict[str, Any]:
+        response = httpx.post(f"{self.url}/__fake__/{endpoint}", json=body)
+        response.raise_for_status()
+        return response.json()
+
+    def configure(self, **settings) -> Dict[str, Any]:
+        return self._post("config", settings)
+
+    def inject(self, path: str, status: int = 500, method: str = "*", count: int = 1, delay: float = 0.0):
+        self._post("faults", {"path": path, "status": status, "method": method, "count": count, "delay": delay})
+
+    def reset(self):
+        self._post("reset", {})
+
+    def advance(self, seconds: float) -> float:
+        """Move the server's virtual clock forward; returns the new server time."""
+        return self._post("clock", {"advance": seconds})["time"]
+
+
+class RemoteClock(VirtualClock):
+    """
+    A worker's virtual clock when the FakeControlPanel runs in another process, e.g. the
+    xdist controller.
+
+    Sleeps and waits advance the server clock, which drives node life cycles, so nodes
+    follow the sleeps of all workers. advance() only moves this worker's own offset: a test
+    skipping 30 days expires its own tokens and leases, not those of the other workers.
+    API requests carry time() and the fake judges token expiry by it. The server time is
+    only read when this clock starts and when it sleeps.
+    """
+
+    def __init__(self, url: str):
+        self.url = url.rstrip("/")
+        self._client = httpx.Client()
+        response = self._client.get(f"{self.url}/__fake__/clock")
+        response.raise_for_status()
+        self._server_now = response.json()["time"]
+        super().__init__(start=self._server_now)
+
+    def _elapse(self, seconds: float):
+        response = self._client.post(f"{self.url}/__fake__/clock", json={"advance": max(seconds, 0)})
+        response.raise_for_status()
+        server_now = response.json()["time"]
+        with self._lock:
+            # Also takes in what the other workers slept since the last call; the offset stays.
+            self._now += server_now - self._server_now
+            self._server_now = server_now
+
+
+class FakeRequest:
+    def __init__(self, method: str, target: str, headers, body: bytes, client_ip: str):
+        parsed = urlparse(target)
+        self.method = method
+        self.path = parsed.path
+        # Blank values are kept: `page=` is a bad page number, not a missing one.
+        self.query = parse_qs(parsed.query, keep_blank_values=True)
+        self.headers = headers
+        self.body = body
+        self.client_ip = client_ip
+
+    def json_object(self) -> Dict[str, Any]:
+        if not self.body:
+            return {}
+        try:
+            data = json.loads(self.body)
+        except ValueError:
+            raise HTTPError(400, "malformed JSON body")
+        if not isinstance(data, dict):
+            raise HTTPError(400, "JSON body must be an object")
+        return data
+
+    def virtual_time(self) -> Optional[float]:
+        value = self.headers.get(VIRTUAL_TIME_HEADER)
+        if value is None:
+            return None
+        try:
+            return float(value)
+        except ValueError:
+            raise HTTPError(400, f"{VIRTUAL_TIME_HEADER} must be a Unix timestamp")
+
+    def param(self, name: str) -> Optional[str]:
+        """A query parameter given at most once, or HTTPError 400."""
+        values = self.query.get(name)
+        if values is None:
+            return None
+        if len(values) > 1:
+            raise HTTPError(400, f"{name} must be given once")
+        return values[0]
+
+    def positive_int(self, name: str, default: int) -> int:
+        value = self.param(name)
+        if value is None:
+            return default
+        if not re.fullmatch(r"\d+", value) or int(value) < 1:
+            raise HTTPError(400, f"{name} must be a positive integer")
+        return int(value)
+
+    def timestamp(self, name: str) -> Optional[float]:
+        value = self.param(name)
+        if value is None:
+            return None
+        try:
+            moment = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            raise HTTPError(400, f"{name} must be an ISO 8601 timestamp")
+        return (moment if moment.tzinfo else moment.replace(tzinfo=timezone.utc)).timestamp()
+
+    def page_of(self, items: List[Any]) -> Dict[str, Any]:
+        """Apply optional page/page_size query parameters to a listing."""
+        if "page" not in self.query and "page_size" not in self.query:
+            return {"results": items, "total": len(items)}
+        page, page_size = self.positive_int("page", 1), self.positive_int("page_size", 20)
+        start = (page - 1) * page_size
+        return {"results": items[start:start + page_size], "total": len(items)}
+
+
+def _handler_for(fake: FakeControlPanel):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # Headers and body go out in separate writes; with Nagle on, keep-alive requests stall on delayed ACKs.
+        disable_nagle_algorithm = True
+
+        def log_message(self, *args):
+            pass
+
+        def _handle(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            request = FakeRequest(self.command, self.path, self.headers, self.rfile.read(length), self.client_address[0])
+            status, body, headers = fake.dispatch(request)
+            if isinstance(body, str):
+                payload, content_type = body.encode(), "text/html"
+            else:
+                payload, content_type = json.dumps(body).encode(), "application/json"
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(payload)))
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(payload)
+
+        do_GET = do_POST = do_PUT = do_PATCH = do_DELETE = do_OPTIONS = _handle
+
+    return Handler
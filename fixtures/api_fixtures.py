@@ -1,9 +1,94 @@
 import pytest
-import time
-from clients.api_client import NodesAPIClient, InternalAPIClient, AuthAPIClient
+from pathlib import Path
+from pydantic import ValidationError
+from clients.api_client import NodesAPIClient, DeploymentsAPIClient, InternalAPIClient, AuthAPIClient
+from clients.async_api_client import (
+    AsyncNodesAPIClient, AsyncDeploymentsAPIClient, AsyncInternalAPIClient, AsyncAuthAPIClient
+)
+from clients.node_cleanup import reap_orphans, delete_registered_nodes
+from clients.node_ledger import node_ledger
+from clients.node_pool import NodePool
+from clients.node_registry import NodeRegistry
+from clients.token_broker import TokenBroker
 from config.settings import Settings
 from faker import Faker
-from control_panel.node import NodeState
+from utils.test_context import is_xdist_worker
+
+def _admin_nodes_client(settings: Settings) -> NodesAPIClient:
+    client = NodesAPIClient(settings)
+    if settings.admin_log and settings.admin_pass:
+        client.token = TokenBroker(settings).get_tokens(settings.admin_log, settings.admin_pass).access_token
+    return client
+
+
+def _report(session, message: str):
+    reporter = session.config.pluginmanager.get_plugin("terminalreporter")
+    if reporter is not None:
+        reporter.write_line(message)
+
+
+def _reap_orphans(session, settings: Settings):
+    if not node_ledger.outstanding(api_url=settings.cp_nodes_api_url.rstrip('/')):
+        return
+    try:
+        client = _admin_nodes_client(settings)
+        try:
+            result = reap_orphans(client, concurrency=settings.node_teardown_concurrency)
+        finally:
+            client.close()
+        message = f"Reaped {len(result['deleted'])} nodes left over by earlier runs"
+        if result["failed"]:
+            message += f", could not delete {result['failed']}"
+    except Exception as e:
+        message = f"Could not reap nodes left over by earlier runs: {e}"
+    _report(session, message)
+
+
+def pytest_sessionstart(session):
+    try:
+        settings = Settings()
+    except ValidationError:
+        return  # reported by the config fixture
+    root = Path(session.config.rootpath)
+    node_ledger.configure(settings, root)
+    if is_xdist_worker(session.config):
+        return
+    # Nodes "created" by a replayed run never existed, and reaping them would eat recorded responses.
+    if settings.reap_orphan_nodes and settings.cassette_mode != "replay":
+        _reap_orphans(session, settings)
+    # Every run starts with an empty pool; nodes a killed run left in it are in the ledger.
+    registry = NodeRegistry(root / settings.node_registry_path)
+    registry.reset()
+    registry.close()
+
+
+def pytest_sessionfinish(session):
+    # Pool nodes are shared by all workers, so only the controller (or a run without xdist) deletes them.
+    if is_xdist_worker(session.config):
+        return
+    try:
+        settings = Settings()
+    except ValidationError:
+        return
+    path = Path(session.config.rootpath) / settings.node_registry_path
+    if not path.exists():
+        return
+    registry = NodeRegistry(path)
+    try:
+        if not registry.nodes():
+            return
+        client = _admin_nodes_client(settings)
+        try:
+            left = delete_registered_nodes(client, registry, settings.node_teardown_concurrency)
+        finally:
+            client.close()
+        if left:
+            _report(session, f"Could not delete pool nodes {left}; the next run will reap them")
+    except Exception as e:
+        _report(session, f"Could not delete pool nodes: {e}; the next run will reap them")
+    finally:
+        registry.close()
+
 
 @pytest.fixture(scope="session")
 def faker():
@@ -29,20 +114,117 @@ def auth_client(config: Settings):
     client.close()
 
 
+@pytest.fixture(scope="session")
+def token_broker(config: Settings, tmp_path_factory, worker_id):
+    """Tokens shared by every test and, through a file-locked cache, every xdist worker."""
+    root = tmp_path_factory.getbasetemp()
+    if worker_id != "master":
+        root = root.parent
+    return TokenBroker(config, cache_path=root / "token_cache.json")
+
+
+def _uses_private_token(request) -> bool:
+    return request.node.get_closest_marker("private_token") is not None
+
+
+def _bind_broker(client, token_broker: TokenBroker, username: str, password: str):
+    """Take tokens from the shared broker; a 401 on them is renewed through the broker and retried once."""
+    client.bind_token_source(lambda: token_broker.get_tokens(username, password),
+                             renew=lambda rejected: token_broker.renew(username, password, rejected))
+
+
+def _restore_username(client: AuthAPIClient, username: str):
+    """Undo a rename of the test user, so later logins with the configured credentials still work."""
+    response = client.get_profile()
+    if response.status_code == 200 and response.json().get("username") != username:
+        client.change_username(username)
+
+
 @pytest.fixture(scope="function")
-def authenticated_auth_client(config: Settings):
+def authenticated_auth_client(config: Settings, request, token_broker: TokenBroker):
     client = AuthAPIClient(config)
+    private = _uses_private_token(request)
     if config.user_log and config.user_pass:
-        response = client.login(config.user_log, config.user_pass)
-        if response.status_code == 200:
-            token = response.json().get("access_token")
-            refresh_token = response.json().get("refresh_token")
-            client.token = token
-            client.refresh_token = refresh_token
+        if private:
+            response = client.login(config.user_log, config.user_pass)
+            if response.status_code == 200:
+                token = response.json().get("access_token")
+                refresh_token = response.json().get("refresh_token")
+                client.token = token
+                client.refresh_token = refresh_token
+            else:
+                raise Exception("Login failed")
         else:
-            raise Exception("Login failed")
+            _bind_broker(client, token_broker, config.user_log, config.user_pass)
     yield client
+    if private and config.user_log and config.user_pass:
+        _restore_username(client, config.user_log)
     client.close()
+    if private and config.user_log and config.user_pass:
+        # The server may revoke every session of the user (e.g. on password change).
+        token_broker.invalidate(config.user_log, config.user_pass)
+
+
+# Async client fixtures. They are function-scoped because an httpx.AsyncClient
+# is bound to the event loop it was first used on.
+
+@pytest.fixture
+async def async_nodes_api_client(config: Settings):
+    client = AsyncNodesAPIClient(config)
+    yield client
+    await client.aclose()
+
+
+@pytest.fixture
+async def async_internal_api_client(config: Settings):
+    client = AsyncInternalAPIClient(config)
+    yield client
+    await client.aclose()
+
+
+@pytest.fixture
+async def async_auth_client(config: Settings):
+    client = AsyncAuthAPIClient(config)
+    yield client
+    await client.aclose()
+
+
+@pytest.fixture
+async def async_authenticated_auth_client(config: Settings, request, token_broker: TokenBroker):
+    client = AsyncAuthAPIClient(config)
+    private = _uses_private_token(request)
+    if config.user_log and config.user_pass:
+        if private:
+            response = await client.login(config.user_log, config.user_pass)
+            if response.status_code == 200:
+                client.token = response.json().get("access_token")
+                client.refresh_token = response.json().get("refresh_token")
+            else:
+                raise Exception("Login failed")
+        else:
+            _bind_broker(client, token_broker, config.user_log, config.user_pass)
+    yield client
+    await client.aclose()
+    if private and config.user_log and config.user_pass:
+        token_broker.invalidate(config.user_log, config.user_pass)
+
+
+@pytest.fixture
+async def async_authenticated_nodes_client(config: Settings, token_broker: TokenBroker):
+    client = AsyncNodesAPIClient(config)
+    _bind_broker(client, token_broker, config.admin_log, config.admin_pass)
+    yield client
+    await client._teardown()
+    await client.aclose()
+
+
+@pytest.fixture
+async def async_authenticated_deployments_client(config: Settings, token_broker: TokenBroker):
+    client = AsyncDeploymentsAPIClient(config)
+    _bind_broker(client, token_broker, config.admin_log, config.admin_pass)
+    yield client
+    await client._teardown()
+    await client.aclose()
 
 
 @pytest.fixture
@@ -124,28 +306,49 @@ def password_reset_teardown(config: Settings):
 # Node-specific fixtures
 
 @pytest.fixture(scope="session")
-def authenticated_nodes_client(config: Settings):
-    
-    auth_client = AuthAPIClient(config)
-    response = auth_client.login(config.admin_log, config.admin_pass)
-    
-    if response.status_code == 200:
-        token = response.json().get("access_token")
-        client = NodesAPIClient(config, token=token)
-        yield client
-        client._teardown()
-    else:
-        raise Exception(f"Failed to authenticate for nodes client: {response.status_code}")
-    auth_client.close()
+def authenticated_nodes_client(config: Settings, token_broker: TokenBroker):
+    client = NodesAPIClient(config)
+    # Session-long client: the broker refreshes the admin token before it expires.
+    _bind_broker(client, token_broker, config.admin_log, config.admin_pass)
+    yield client
+    client._teardown()
+
+
+@pytest.fixture(scope="session")
+def authenticated_deployments_client(config: Settings, token_broker: TokenBroker):
+    client = DeploymentsAPIClient(config)
+    _bind_broker(client, token_broker, config.admin_log, config.admin_pass)
+    yield client
+    client._teardown()
+
+
+@pytest.fixture(scope="session")
+def node_registry(config: Settings, pytestconfig):
+    """Pool bookkeeping shared by all xdist workers of the run."""
+    registry = NodeRegistry(Path(pytestconfig.rootpath) / config.node_registry_path)
+    yield registry
+    registry.close()
+
+
+@pytest.fixture(scope="session")
+def node_pool(config: Settings, authenticated_nodes_client, valid_eth_preset_instance_id, node_registry: NodeRegistry):
+    """RUNNING nodes shared by the whole run; the controller deletes them in pytest_sessionfinish."""
+    pool = NodePool(authenticated_nodes_client, valid_eth_preset_instance_id,
+                    size=config.parallel_deployments, registry=node_registry,
+                    lease_timeout=config.node_lease_timeout, max_replacements=config.node_pool_max_replacements)
+    pool.start()
+    return pool
 
 
 @pytest.fixture(scope="function")
-def existing_node_id(authenticated_nodes_client, valid_eth_preset_instance_id):
-    if authenticated_nodes_client.nodes_list:
-        return authenticated_nodes_client.nodes_list[0]
-    node_id = authenticated_nodes_client.create_node(preset_instance_id=valid_eth_preset_instance_id).json()["deployment_id"]
-    authenticated_nodes_client._wait_node_until_status(node_id, NodeState.RUNNING)
-    return node_id
+def existing_node_id(request, node_pool: NodePool):
+    """A RUNNING node; shared with other tests unless the test is marked exclusive_node."""
+    if request.node.get_closest_marker("exclusive_node"):
+        node_id = node_pool.lease_exclusive()
+    else:
+        node_id = node_pool.lease_shared()
+    yield node_id
+    node_pool.release(node_id)
 
 
 @pytest.fixture(scope="session")
@@ -158,23 +361,8 @@ def invalid_eth_preset_instance_id():
 
 
 @pytest.fixture(scope="function")
-def created_node_for_deletion(authenticated_nodes_client, valid_eth_preset_instance_id):
+def created_node_for_deletion(node_pool: NodePool):
     """Create a node specifically for deletion tests."""
-    deployment_response = authenticated_nodes_client.create_node(
-        preset_instance_id=valid_eth_preset_instance_id
-    )
-    if deployment_response.status_code == 201:
-        max_wait = 30
-        waited = 0
-        while waited < max_wait:
-            response = authenticated_nodes_client.get_node(deployment_response.json()["deployment_id"])
-            if response.status_code == 200:
-                current_status = response.json().get("status")
-                if current_status != NodeState.PENDING:
-                    break
-            time.sleep(1)
-            waited += 1
-        # Use deployment_response for deployment_id (get_node returns 'id', not 'deployment_id')
-        yield {"deployment_id": deployment_response.json()["deployment_id"]}
-    else:
-        pytest.skip(f"Could not create node for deletion test: {deployment_response.status_code}")
+    node_id = node_pool.lease_exclusive()
+    yield {"deployment_id": node_id}
+    node_pool.release(node_id)
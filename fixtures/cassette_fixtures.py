@@ -0,0 +1,58 @@
+import random
+import pytest
+from faker import Faker
+from pydantic import ValidationError
+from clients.cassette import Cassette, format_cassette_stats
+from clients.transport_pool import transport_registry
+from config.settings import Settings
+from utils.test_context import is_xdist_worker
+
+CASSETTE_SEED = 0
+
+
+def pytest_configure(config):
+    # Installed before any client exists, so node reaping at session start is covered too.
+    try:
+        settings = Settings()
+    except ValidationError:
+        return  # reported by the config fixture
+    if settings.cassette_mode == "off":
+        return
+    try:
+        transport_registry.cassette = Cassette(settings.cassette_path, settings.cassette_mode)
+    except ValueError as error:
+        raise pytest.UsageError(f"CASSETTE_MODE/CASSETTE_PATH: {error}")
+    # Generated test data (parametrized tokens, faker usernames) goes into request keys, so it
+    # has to come out the same on every run for a recording to be replayable.
+    random.seed(CASSETTE_SEED)
+    Faker.seed(CASSETTE_SEED)
+
+
+def pytest_unconfigure(config):
+    transport_registry.cassette = None
+
+
+def pytest_sessionfinish(session):
+    cassette = transport_registry.cassette
+    if cassette is None:
+        return
+    if is_xdist_worker(session.config):
+        session.config.workeroutput["cassette"] = {"interactions": cassette.recorded(), "stats": cassette.stats,
+                                                    "replayed": cassette.replayed()}
+    else:
+        cassette.save()
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_testnodedown(node, error):
+    cassette = transport_registry.cassette
+    handover = getattr(node, "workeroutput", {}).get("cassette")
+    if cassette is not None and handover:
+        cassette.merge(handover["interactions"], handover["stats"], handover["replayed"])
+
+
+def pytest_terminal_summary(terminalreporter, config):
+    summary = format_cassette_stats(transport_registry.cassette)
+    if summary and not is_xdist_worker(config):
+        terminalreporter.write_sep("-", "HTTP cassette")
+        terminalreporter.write_line(summary)
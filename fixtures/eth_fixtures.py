@@ -1,25 +1,65 @@
 import pytest
 from clients.eth_client import EthereumClient
+from clients.transport_pool import transport_registry
 from config.settings import Settings
+from control_panel import fake_eth_node
+from control_panel.fake_eth_node import FakeEthNode
 
 
 @pytest.fixture(scope="session")
 def eth_mainnet_client(config: Settings):
     if not config.eth_rpc_mainnet_url:
         pytest.skip("ETH_RPC_MAINNET_URL not configured")
-    return EthereumClient(config.eth_rpc_mainnet_url)
+    client = EthereumClient(config.eth_rpc_mainnet_url, transport_registry.rpc_transport(),
+                            batch_size=config.eth_rpc_batch_size)
+    yield client
+    client.close()
 
 
 @pytest.fixture(scope="session")
 def eth_testnet_client(config: Settings):
     if not config.eth_rpc_testnet_url:
         pytest.skip("ETH_RPC_TESTNET_URL not configured")
-    return EthereumClient(config.eth_rpc_testnet_url)
+    client = EthereumClient(config.eth_rpc_testnet_url, transport_registry.rpc_transport(),
+                            batch_size=config.eth_rpc_batch_size)
+    yield client
+    client.close()
+
+
+@pytest.fixture(scope="session")
+def local_eth_node(config: Settings):
+    """In-process eth-tester chain served over JSON-RPC, with funded accounts in `.accounts`."""
+    if fake_eth_node.EthereumTester is None:
+        pytest.skip('Requires eth-tester: uv sync --extra local-eth')
+    with FakeEthNode(accounts=config.local_eth_accounts, block_time=config.local_eth_block_time) as node:
+        yield node
+
+
+@pytest.fixture(scope="session")
+def local_eth_client(local_eth_node: FakeEthNode, config: Settings):
+    client = EthereumClient(local_eth_node.url, transport_registry.rpc_transport(),
+                            batch_size=config.eth_rpc_batch_size)
+    yield client
+    client.close()
 
 
 @pytest.fixture
-def eth_client(config: Settings):
+def eth_client(request, config: Settings):
     rpc_url = config.eth_rpc_testnet_url or config.eth_rpc_mainnet_url
     if not rpc_url:
-        pytest.skip("No Ethereum RPC URL configured")
-    return EthereumClient(rpc_url)
+        # The session fixture owns the local client and closes it.
+        yield request.getfixturevalue("local_eth_client")
+        return
+    client = EthereumClient(rpc_url, transport_registry.rpc_transport(), batch_size=config.eth_rpc_batch_size)
+    yield client
+    client.close()
+
+
+@pytest.fixture
+def eth_private_key(request, config: Settings) -> str:
+    """A funded key on the chain eth_client talks to."""
+    if config.eth_rpc_testnet_url or config.eth_rpc_mainnet_url:
+        if not config.eth_private_key:
+            pytest.skip("ETH_PRIVATE_KEY not configured")
+        return config.eth_private_key
+    return request.getfixturevalue("local_eth_node").accounts[0].private_key
@@ -0,0 +1,83 @@
+import os
+import pytest
+from pydantic import ValidationError
+from config.settings import Settings
+from control_panel.fake_server import FakeControlPanel, FakeControlPanelRemote, RemoteClock
+from utils.clock import SystemClock, VirtualClock, clock
+from utils.test_context import is_xdist_worker
+
+FAKE_URL_ENV = "FAKE_CONTROL_PANEL_URL"
+DEFAULT_PASSWORD = "Passw0rd!"
+
+_server = None
+
+
+def pytest_configure(config):
+    # xdist workers inherit the environment the controller sets up here.
+    global _server
+    try:
+        settings = Settings()
+    except ValidationError:
+        return  # reported by the config fixture
+    # Virtual time needs a server that follows it: the fake, or none at all when replaying a cassette.
+    if settings.virtual_clock and not (settings.fake_control_panel or settings.cassette_mode == "replay"):
+        raise pytest.UsageError("VIRTUAL_CLOCK=true needs FAKE_CONTROL_PANEL=true or CASSETTE_MODE=replay")
+    if is_xdist_worker(config):
+        if settings.virtual_clock:
+            url = os.environ.get(FAKE_URL_ENV)
+            clock.use(RemoteClock(url) if url else VirtualClock())
+        return
+    if settings.virtual_clock:
+        clock.use(VirtualClock())
+    if not settings.fake_control_panel:
+        return
+    credentials = {
+        "USER_LOG": settings.user_log or "user", "USER_PASS": settings.user_pass or DEFAULT_PASSWORD,
+        "ADMIN_LOG": settings.admin_log or "admin", "ADMIN_PASS": settings.admin_pass or DEFAULT_PASSWORD,
+    }
+    os.environ.update(credentials)
+    _server = FakeControlPanel(
+        users=[(credentials["USER_LOG"], credentials["USER_PASS"]),
+               (credentials["ADMIN_LOG"], credentials["ADMIN_PASS"])],
+        pending_delay=settings.fake_node_pending_delay,
+        deleting_delay=settings.fake_node_deleting_delay,
+        error_rate=settings.fake_node_error_rate,
+    )
+    os.environ["CP_NODES_API_URL"] = os.environ[FAKE_URL_ENV] = _server.start()
+
+
+def pytest_collection_modifyitems(config, items):
+    if not os.environ.get(FAKE_URL_ENV):
+        return
+    unsupported = [item for item in items if item.get_closest_marker("fake_unsupported")]
+    if unsupported:
+        config.hook.pytest_deselected(items=unsupported)
+        items[:] = [item for item in items if item.get_closest_marker("fake_unsupported") is None]
+
+
+def pytest_unconfigure(config):
+    global _server
+    if _server is not None:
+        _server.stop()
+        _server = None
+    clock.use(SystemClock())
+
+
+@pytest.fixture(scope="session")
+def fake_control_panel():
+    """
+    Handle to the fake Control Panel serving this run: configure() delays and error rate,
+    inject() faults, reset() state. Skips the test against a real deployment.
+    """
+    url = os.environ.get(FAKE_URL_ENV)
+    if not url:
+        pytest.skip("Requires FAKE_CONTROL_PANEL=true")
+    return FakeControlPanelRemote(url)
+
+
+@pytest.fixture(scope="session")
+def virtual_clock():
+    """The run clock when it is virtual (VIRTUAL_CLOCK=true); advance() it to skip time."""
+    if not clock.is_virtual:
+        pytest.skip("Requires VIRTUAL_CLOCK=true")
+    return clock
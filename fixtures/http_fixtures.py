@@ -0,0 +1,127 @@
+import pytest
+from pydantic import ValidationError
+from clients.fault_transport import fault_stats, FaultStats, format_fault_stats
+from clients.rate_limiter import rate_governor, RateGovernor, format_rate_limit_stats
+from clients.retry_transport import retry_stats, RetryStats, format_retry_stats
+from clients.transport_pool import transport_registry, ConnectionStats, format_connection_stats
+from config.settings import Settings
+from utils.attachment_buffer import http_attachments
+from utils.test_context import RunContext, run_context, fixture_context, is_xdist_worker
+from utils import http_logger
+
+_connection_stats_key = pytest.StashKey[dict]()
+_worker_http_logs_key = pytest.StashKey[list]()
+_retry_stats_key = pytest.StashKey[dict]()
+_rate_limit_stats_key = pytest.StashKey[dict]()
+_fault_stats_key = pytest.StashKey[dict]()
+
+
+def pytest_configure(config):
+    http_logger.start_listener()
+    # Before any client exists: reaping orphans at session start already builds the nodes API transport.
+    try:
+        settings = Settings()
+    except ValidationError:
+        return  # reported by the config fixture
+    transport_registry.configure(settings)
+
+
+@pytest.fixture(scope="session", autouse=True)
+def http_transport_registry(config: Settings, tmp_path_factory, worker_id):
+    """Configure the shared retry and rate limit state once per session and close the pools at the end."""
+    # Rate limiter buckets and the retry budget live next to the per-worker temp dirs so that all workers share them.
+    root = tmp_path_factory.getbasetemp()
+    if worker_id != "master":
+        root = root.parent
+    retry_stats.configure(config, state_dir=root)
+    rate_governor.configure(config, state_dir=root)
+    http_attachments.configure(config)
+    http_logger.log.setLevel(config.log_level.upper())
+    yield transport_registry
+    transport_registry.close()
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_protocol(item, nextitem):
+    # Resolved once per test so that HTTP logging can read it in O(1) instead of walking the stack.
+    with run_context(RunContext(test_id=item.nodeid, test_name=item.name)):
+        yield
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_fixture_setup(fixturedef, request):
+    with fixture_context(fixturedef.argname):
+        yield
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_runtest_setup(item):
+    http_attachments.reset()
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_makereport(item, call):
+    outcome = yield
+    report = outcome.get_result()
+    # Deferred HTTP attachments are only worth writing when there is a failure to explain.
+    if report.failed:
+        http_attachments.flush()
+
+
+def pytest_sessionfinish(session):
+    stats = {origin: value.to_dict() for origin, value in transport_registry.stats().items()}
+    http_logger.stop_listener()
+    if is_xdist_worker(session.config):
+        session.config.workeroutput["http_connection_stats"] = stats
+        session.config.workeroutput["http_log"] = str(http_logger.JSONL_FILE)
+        session.config.workeroutput["http_retry_stats"] = retry_stats.to_dict()
+        session.config.workeroutput["http_rate_limit_stats"] = rate_governor.stats()
+        session.config.workeroutput["http_fault_stats"] = fault_stats.to_dict()
+    else:
+        session.config.stash[_connection_stats_key] = _merge_stats(session.config, stats)
+        RetryStats.merge(session.config.stash.setdefault(_retry_stats_key, {}), retry_stats.to_dict())
+        RateGovernor.merge(session.config.stash.setdefault(_rate_limit_stats_key, {}), rate_governor.stats())
+        FaultStats.merge(session.config.stash.setdefault(_fault_stats_key, {}), fault_stats.to_dict())
+        worker_logs = session.config.stash.get(_worker_http_logs_key, [])
+        http_logger.merge_jsonl_logs([http_logger.JSONL_FILE, *worker_logs])
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_testnodedown(node, error):
+    workeroutput = getattr(node, "workeroutput", {})
+    _merge_stats(node.config, workeroutput.get("http_connection_stats", {}))
+    if "http_log" in workeroutput:
+        node.config.stash.setdefault(_worker_http_logs_key, []).append(workeroutput["http_log"])
+    if "http_retry_stats" in workeroutput:
+        RetryStats.merge(node.config.stash.setdefault(_retry_stats_key, {}), workeroutput["http_retry_stats"])
+    if "http_rate_limit_stats" in workeroutput:
+        RateGovernor.merge(node.config.stash.setdefault(_rate_limit_stats_key, {}),
+                           workeroutput["http_rate_limit_stats"])
+    if "http_fault_stats" in workeroutput:
+        FaultStats.merge(node.config.stash.setdefault(_fault_stats_key, {}), workeroutput["http_fault_stats"])
+
+
+def pytest_terminal_summary(terminalreporter, config):
+    summary = format_connection_stats(config.stash.get(_connection_stats_key, {}))
+    if summary:
+        terminalreporter.write_sep("-", "HTTP connection reuse")
+        terminalreporter.write_line(summary)
+    retries = format_retry_stats(config.stash.get(_retry_stats_key, {}))
+    if retries:
+        terminalreporter.write_sep("-", "HTTP retries")
+        terminalreporter.write_line(retries)
+    throttling = format_rate_limit_stats(config.stash.get(_rate_limit_stats_key, {}))
+    if throttling:
+        terminalreporter.write_sep("-", "HTTP rate limits")
+        terminalreporter.write_line(throttling)
+    faults = format_fault_stats(config.stash.get(_fault_stats_key, {}))
+    if faults:
+        terminalreporter.write_sep("-", "Injected network faults")
+        terminalreporter.write_line(faults)
+
+
+def _merge_stats(config, stats: dict) -> dict:
+    merged = config.stash.setdefault(_connection_stats_key, {})
+    for origin, value in stats.items():
+        merged.setdefault(origin, ConnectionStats()).merge(value)
+    return merged
@@ -0,0 +1,32 @@
+import allure
+import pytest
+from utils import http_logger
+from utils.http_metrics import http_metrics, format_latency_report
+from utils.test_context import is_xdist_worker
+
+LATENCY_REPORT_FILE = http_logger.LOG_DIR / "http-latency.json"
+
+
+def pytest_sessionfinish(session):
+    if is_xdist_worker(session.config):
+        session.config.workeroutput["http_metrics"] = http_metrics.to_dict()
+        return
+    # Workers have been merged by now (pytest_testnodedown), so this is the whole run.
+    if http_metrics.endpoints:
+        http_metrics.write(LATENCY_REPORT_FILE)
+        allure.global_attach(format_latency_report(http_metrics.report()), "HTTP latency per endpoint",
+                             allure.attachment_type.TEXT)
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_testnodedown(node, error):
+    # Histograms merge bucket by bucket, so the controller ends up with exact run-wide percentiles.
+    http_metrics.merge(getattr(node, "workeroutput", {}).get("http_metrics", {}))
+
+
+def pytest_terminal_summary(terminalreporter, config):
+    if is_xdist_worker(config) or not http_metrics.endpoints:
+        return
+    terminalreporter.write_sep("-", "HTTP latency per endpoint")
+    terminalreporter.write_line(format_latency_report(http_metrics.report()))
+    terminalreporter.write_line(f"histograms: {LATENCY_REPORT_FILE}")
@@ -0,0 +1,24 @@
+import pytest
+from utils import http_logger
+from utils.node_timeline import node_timeline, write_chrome_trace
+from utils.test_context import is_xdist_worker
+
+NODE_TIMELINE_FILE = http_logger.LOG_DIR / "node-timeline.json"
+
+
+def pytest_sessionfinish(session):
+    if is_xdist_worker(session.config):
+        session.config.workeroutput["node_timeline"] = node_timeline.to_dict()
+    elif node_timeline.observed:
+        write_chrome_trace(node_timeline.trace_events(), NODE_TIMELINE_FILE)
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_testnodedown(node, error):
+    node_timeline.merge(getattr(node, "workeroutput", {}).get("node_timeline", {}))
+
+
+def pytest_terminal_summary(terminalreporter, config):
+    if is_xdist_worker(config) or not node_timeline.observed:
+        return
+    terminalreporter.write_line(f"node state timeline: {NODE_TIMELINE_FILE} (open in ui.perfetto.dev)")
@@ -0,0 +1,22 @@
+import pytest
+from utils.test_context import is_xdist_worker
+from utils.wait_helper import wait_report
+
+
+def pytest_sessionfinish(session):
+    if is_xdist_worker(session.config):
+        session.config.workeroutput["wait_report"] = wait_report.to_dict()
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_testnodedown(node, error):
+    wait_report.merge(getattr(node, "workeroutput", {}).get("wait_report", {}))
+
+
+def pytest_terminal_summary(terminalreporter, config):
+    if is_xdist_worker(config):
+        return
+    summary = wait_report.format()
+    if summary:
+        terminalreporter.write_sep("-", "Time spent waiting")
+        terminalreporter.write_line(summary)
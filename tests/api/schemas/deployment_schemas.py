@@ -0,0 +1,70 @@
+"""Pydantic schemas for Deployment API responses."""
+from pydantic import BaseModel
+from typing import Optional, List, Dict, Any
+from datetime import datetime
+
+
+class Deployment(BaseModel):
+    """Deployment item for GET /v1/ui/deployments and /v1/ui/deployments/{id}."""
+    id: str
+    state: str
+    created_at: datetime
+    updated_at: datetime
+    gts: Optional[Dict[str, Any]] = None
+
+
+class DeploymentListResponse(BaseModel):
+    """Response for GET /v1/ui/deployments."""
+    results: List[Deployment]
+    total: int
+
+
+class RevisionMetadata(BaseModel):
+    """Provisioned client (or other artifact) of a revision."""
+    id: str
+    type: str
+    data: Dict[str, Any]
+    created_at: datetime
+    updated_at: datetime
+
+
+class DeploymentRevision(BaseModel):
+    """Revision for GET /v1/ui/deployments/{id}/revisions[/{revision_id}]."""
+    id: str
+    deployment_id: str
+    preset_type: str
+    preset_instance_values: Dict[str, Any]
+    version: int
+    status: str
+    error_message: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+    applied_at: Optional[datetime] = None
+    metadata: List[RevisionMetadata] = []
+
+
+class RevisionListResponse(BaseModel):
+    """Response for GET /v1/ui/deployments/{id}/revisions."""
+    results: List[DeploymentRevision]
+    total: int
+
+
+class CreateDeploymentResponse(BaseModel):
+    """Response for POST /v1/ui/deployments."""
+    deployment_id: str
+    initial_revision_id: str
+    state: str
+
+
+class CreateRevisionResponse(BaseModel):
+    """Response for POST /v1/ui/deployments/{id}/revisions."""
+    revision_id: str
+    deployment_id: str
+    version: int
+    state: str
+
+
+class ScheduleDeleteDeploymentResponse(BaseModel):
+    """Response for POST /v1/ui/deployments/{id}/schedule-delete."""
+    deployment_id: str
+    state: str
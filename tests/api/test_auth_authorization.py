@@ -172,6 +172,7 @@ class TestAuthorization:
 
     @allure.title("CORS headers present in auth responses")
     @allure.severity(allure.severity_level.MINOR)
+    @pytest.mark.fake_unsupported(reason="contradicts test_login_cors_headers")
     def test_cors_headers_present(self, auth_client, valid_credentials):
         response = auth_client.login(
             valid_credentials["username"],
@@ -1,3 +1,4 @@
+import json
 import pytest
 import allure
 from pydantic import ValidationError
@@ -205,23 +206,22 @@ class TestLoginQueryManipulation:
     @allure.title("Login without content type")
     @allure.severity(allure.severity_level.NORMAL)
     def test_login_without_content_type(self, auth_client, valid_credentials):
-        headers = auth_client.headers.copy() 
-        headers.pop("Content-Type")
-        response = auth_client.login(valid_credentials["username"], valid_credentials["password"])       
+        response = auth_client.client.post(
+            f"{auth_client.base_url}/v1/auth/login",
+            content=json.dumps({"username": valid_credentials["username"], "password": valid_credentials["password"]}),
+        )
         assert response.status_code == 400, f"Expected 400, got {response.status_code}"
         ErrorResponse(**response.json())
-        auth_client.headers = headers
 
     @allure.title("Login with wrong content type")
     @allure.severity(allure.severity_level.NORMAL)
     @pytest.mark.parametrize("content_type", ["text/plain", "application/xml", "application/json; charset=utf-8"])
     def test_login_with_wrong_content_type(self, auth_client, valid_credentials, content_type):
-        headers = auth_client.headers.copy() 
-        headers["Content-Type"] = content_type
-        response = auth_client.login(valid_credentials["username"], valid_credentials["password"])       
+        headers = {"Content-Type": content_type}
+        response = auth_client.send_custom_request("POST", "/v1/auth/login", json={
+            "username": valid_credentials["username"], "password": valid_credentials["password"]}, headers=headers)
         assert response.status_code == 400, f"Expected 400, got {response.status_code}"
         ErrorResponse(**response.json())
-        auth_client.headers = headers
 
     @allure.title("Login with wrong method")
     @allure.severity(allure.severity_level.NORMAL)
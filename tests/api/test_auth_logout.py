@@ -6,6 +6,11 @@ from tests.api.cases.test_cases import EMPTY_STRING_CASES
 from utils.token_generator import generate_invalid_refresh_tokens, generate_expired_token
 import base64
 
+# Logging out revokes the session, so these tests never borrow the shared tokens.
+pytestmark = pytest.mark.private_token
+
+WITHOUT_TOKEN_IS_401 = pytest.mark.fake_unsupported(reason="openapi.yaml answers a request without a token with 401")
+
 
 @allure.feature("Authentication")
 @allure.story("Logout")
@@ -132,12 +137,10 @@ class TestLogoutAcess:
     @allure.title("Logout with too long access token")
     @allure.severity(allure.severity_level.CRITICAL)
     def test_logout_with_too_long_access_token(self, authenticated_auth_client):
-        headers = authenticated_auth_client.headers.copy() 
-        authenticated_auth_client.headers["Authorization"] = "Bearer " + "a" * 20480 
-        response = authenticated_auth_client.logout()       
+        headers = {"Authorization": "Bearer " + "a" * 20480}
+        response = authenticated_auth_client.send_custom_request("POST", "/v1/auth/logout", json={}, headers=headers)
         assert response.status_code == 431, f"Expected 431, got {response.status_code}"
         ErrorResponse(**response.json())
-        authenticated_auth_client.headers = headers
 
     @allure.title("Logout check response headers")
     @allure.severity(allure.severity_level.CRITICAL)
@@ -180,8 +183,8 @@ class TestLogoutQueryManipulation:
     @allure.title("Logout fails with malformed JSON")
     @allure.severity(allure.severity_level.NORMAL)
     @pytest.mark.parametrize("json", [
-                "",                                 
-                "{}",                               
+                pytest.param("", marks=WITHOUT_TOKEN_IS_401),
+                pytest.param("{}", marks=WITHOUT_TOKEN_IS_401),
                 "{",                                
                 "}",                                
                 '{"refresh_token": "qwerty"',              
@@ -191,7 +194,7 @@ class TestLogoutQueryManipulation:
                 '{"refresh_token": "qwerty", "refresh_token": }',
                 '["refresh_token",',           
                 '{"refresh_token": }', 
-                '{"refresh_token": "юникод"}',
+                pytest.param('{"refresh_token": "юникод"}', marks=WITHOUT_TOKEN_IS_401),
                 "null",                              
                 "true",                              
                 "123",                               
@@ -208,26 +211,22 @@ class TestLogoutQueryManipulation:
     @allure.title("Logout without content type")
     @allure.severity(allure.severity_level.NORMAL)
     def test_logout_without_content_type(self, auth_client):
-        headers = auth_client.headers.copy() 
-        auth_client.headers.pop("Content-Type")
-        response = auth_client.logout()       
+        response = auth_client.client.post(f"{auth_client.base_url}/v1/auth/logout", content="{}")
         assert response.status_code == 400, f"Expected 400, got {response.status_code}"
         ErrorResponse(**response.json())
-        auth_client.headers = headers
 
     @allure.title("Logout with wrong content type")
     @allure.severity(allure.severity_level.NORMAL)
     @pytest.mark.parametrize("content_type", ["text/plain", "application/xml", "application/json; charset=utf-8"])
     def test_logout_with_wrong_content_type(self, auth_client, content_type):
-        headers = auth_client.headers.copy() 
-        auth_client.headers["Content-Type"] = content_type
-        response = auth_client.logout()       
+        headers = {"Content-Type": content_type}
+        response = auth_client.send_custom_request("POST", "/v1/auth/logout", json={}, headers=headers)
         assert response.status_code == 400, f"Expected 400, got {response.status_code}"
         ErrorResponse(**response.json())
-        auth_client.headers = headers
 
     @allure.title("Logout check cache")
     @allure.severity(allure.severity_level.NORMAL)
+    @pytest.mark.fake_unsupported(reason="logs out without a token, which openapi.yaml answers with 401")
     def test_logout_check_cache(self, auth_client):
         response = auth_client.logout()       
         assert response.status_code == 200, f"Expected 200, got {response.status_code}"
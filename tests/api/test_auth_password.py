@@ -1,3 +1,4 @@
+import json
 import pytest
 import allure
 from pydantic import ValidationError
@@ -5,6 +6,11 @@ from tests.api.schemas.auth_schemas import ChangePasswordResponse, ErrorResponse
 from tests.api.cases.test_cases import EMPTY_STRING_CASES, NONSTRING_CASES
 import base64
 
+# Changing the password, or trying to, may revoke every session of the user, so these tests
+# never borrow the shared tokens.
+pytestmark = pytest.mark.private_token
+
+
 @allure.feature("Authentication")
 @allure.story("Password Change")
 @pytest.mark.api
@@ -197,15 +203,11 @@ class TestPasswordChangeAccess:
     @allure.title("Change password with too long access token")
     @allure.severity(allure.severity_level.CRITICAL)
     def test_change_password_with_too_long_access_token(self, authenticated_auth_client, valid_credentials, faker):
-        headers = authenticated_auth_client.headers.copy() 
-        authenticated_auth_client.headers["Authorization"] = "Bearer " + "a" * 20480 
-        response = authenticated_auth_client.change_password(
-            old_password=valid_credentials["password"],
-            new_password=faker.password()
-        )       
+        headers = {"Authorization": "Bearer " + "a" * 20480}
+        response = authenticated_auth_client.send_custom_request("PUT", "/v1/auth/password", json={
+            "old_password": valid_credentials["password"], "new_password": faker.password()}, headers=headers)
         assert response.status_code == 431, f"Expected 431, got {response.status_code}"
         ErrorResponse(**response.json())
-        authenticated_auth_client.headers = headers
 
     @allure.title("Change password check response headers")
     @allure.severity(allure.severity_level.CRITICAL)
@@ -244,29 +246,23 @@ class TestPasswordChangeQueryManipulation:
     @allure.title("Change password without content type")
     @allure.severity(allure.severity_level.NORMAL)
     def test_change_password_without_content_type(self, authenticated_auth_client, valid_credentials, valid_password):
-        headers = authenticated_auth_client.headers.copy() 
-        headers.pop("Content-Type")
-        response = authenticated_auth_client.change_password(
-            old_password=valid_credentials["password"],
-            new_password=valid_password
-        )       
+        response = authenticated_auth_client.client.put(
+            f"{authenticated_auth_client.base_url}/v1/auth/password",
+            content=json.dumps({"old_password": valid_credentials["password"], "new_password": valid_password}),
+            headers={"Authorization": f"Bearer {authenticated_auth_client.token}"},
+        )
         assert response.status_code == 400, f"Expected 400, got {response.status_code}"
         ErrorResponse(**response.json())
-        authenticated_auth_client.headers = headers
 
     @allure.title("Change password with wrong content type")
     @allure.severity(allure.severity_level.NORMAL)
     @pytest.mark.parametrize("content_type", ["text/plain", "application/xml", "application/json; charset=utf-8"])
     def test_change_password_with_wrong_content_type(self, authenticated_auth_client, valid_credentials, valid_password, content_type):
-        headers = authenticated_auth_client.headers.copy() 
-        headers["Content-Type"] = content_type
-        response = authenticated_auth_client.change_password(
-            old_password=valid_credentials["password"],
-            new_password=valid_password
-        )       
+        headers = {"Content-Type": content_type}
+        response = authenticated_auth_client.send_custom_request("PUT", "/v1/auth/password", json={
+            "old_password": valid_credentials["password"], "new_password": valid_password}, headers=headers)
         assert response.status_code == 400, f"Expected 400, got {response.status_code}"
         ErrorResponse(**response.json())
-        authenticated_auth_client.headers = headers
 
     @allure.title("Change password check cache")
     @allure.severity(allure.severity_level.NORMAL)
@@ -154,35 +154,30 @@ class TestProfileAccess:
     @allure.title("Get profile with wrong auth type")
     @allure.severity(allure.severity_level.NORMAL)
     def test_get_profile_with_wrong_auth_type(self, authenticated_auth_client):
-        headers = authenticated_auth_client.headers.copy() 
-        authenticated_auth_client.headers["Authorization"] = "Basic " + base64.b64encode(authenticated_auth_client.token.encode()).decode() 
-        response = authenticated_auth_client.get_profile()       
+        headers = {"Authorization": "Basic " + base64.b64encode(authenticated_auth_client.token.encode()).decode()}
+        response = authenticated_auth_client.send_custom_request("GET", "/v1/auth/profile", headers=headers)
         assert response.status_code == 401, f"Expected 401, got {response.status_code}"
         ErrorResponse(**response.json())
-        authenticated_auth_client.headers = headers
 
     @allure.title("Get profile with wrong auth format")
     @allure.severity(allure.severity_level.NORMAL)
     def test_get_profile_with_wrong_auth_format(self, authenticated_auth_client):
-        headers = authenticated_auth_client.headers.copy() 
-        authenticated_auth_client.headers["Authorization"] = "Bearer " + base64.b64encode(authenticated_auth_client.token.encode()).decode() 
-        response = authenticated_auth_client.get_profile()       
+        headers = {"Authorization": "Bearer " + base64.b64encode(authenticated_auth_client.token.encode()).decode()}
+        response = authenticated_auth_client.send_custom_request("GET", "/v1/auth/profile", headers=headers)
         assert response.status_code == 401, f"Expected 401, got {response.status_code}"
         ErrorResponse(**response.json())
-        authenticated_auth_client.headers = headers
 
     @allure.title("Get profile with too long access token")
     @allure.severity(allure.severity_level.NORMAL)
     def test_get_profile_with_too_long_access_token(self, authenticated_auth_client):
-        headers = authenticated_auth_client.headers.copy() 
-        authenticated_auth_client.headers["Authorization"] = "Bearer " + "a" * 20480 
-        response = authenticated_auth_client.get_profile()       
+        headers = {"Authorization": "Bearer " + "a" * 20480}
+        response = authenticated_auth_client.send_custom_request("GET", "/v1/auth/profile", headers=headers)
         assert response.status_code == 431, f"Expected 431, got {response.status_code}"
         ErrorResponse(**response.json())
-        authenticated_auth_client.headers = headers
 
     @allure.title("Get profile with revoked access token")
     @allure.severity(allure.severity_level.NORMAL)
+    @pytest.mark.private_token
     def test_get_profile_with_revoked_access_token(self, authenticated_auth_client, valid_credentials):
         authenticated_auth_client.logout()
         response = authenticated_auth_client.get_profile()       
@@ -195,23 +190,21 @@ class TestProfileHeaders:
     @allure.title("Get profile without content type")
     @allure.severity(allure.severity_level.NORMAL)
     def test_get_profile_without_content_type(self, authenticated_auth_client):
-        headers = authenticated_auth_client.headers.copy() 
-        authenticated_auth_client.headers.pop("Content-Type")
-        response = authenticated_auth_client.get_profile()       
+        response = authenticated_auth_client.client.get(
+            f"{authenticated_auth_client.base_url}/v1/auth/profile",
+            headers={"Authorization": f"Bearer {authenticated_auth_client.token}"},
+        )
         assert response.status_code == 400, f"Expected 400, got {response.status_code}"
         ErrorResponse(**response.json())
-        authenticated_auth_client.headers = headers
 
     @allure.title("Get profile with wrong content type")
     @allure.severity(allure.severity_level.NORMAL)
     @pytest.mark.parametrize("content_type", ["text/plain", "application/xml", "application/json; charset=utf-8"])
     def test_get_profile_with_wrong_content_type(self, authenticated_auth_client, content_type):
-        headers = authenticated_auth_client.headers.copy() 
-        headers["Content-Type"] = content_type
-        response = authenticated_auth_client.get_profile()       
+        headers = {"Content-Type": content_type}
+        response = authenticated_auth_client.send_custom_request("GET", "/v1/auth/profile", headers=headers)
         assert response.status_code == 400, f"Expected 400, got {response.status_code}"
         ErrorResponse(**response.json())
-        authenticated_auth_client.headers = headers
 
     @allure.title("Get profile check cache")
     @allure.severity(allure.severity_level.NORMAL)
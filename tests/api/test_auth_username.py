@@ -1,3 +1,4 @@
+import json
 import pytest
 import allure
 from pydantic import ValidationError
@@ -6,6 +7,10 @@ from tests.api.cases.test_cases import EMPTY_STRING_CASES, NONSTRING_CASES
 import base64
 from utils.token_generator import generate_invalid_bearer_tokens, generate_expired_token
 
+# Changing the username, or trying to, changes the credentials the shared tokens belong to, so
+# these tests never borrow them.
+pytestmark = pytest.mark.private_token
+
 
 @allure.feature("Authentication")
 @allure.story("Username Change")
@@ -59,7 +64,8 @@ class TestUsernameChangeUsernameValidation:
 
     @allure.title("Change username with too short username")
     @allure.severity(allure.severity_level.NORMAL)
-    @pytest.mark.parametrize("short_username", ["a", "ab", "abc"])
+    @pytest.mark.parametrize("short_username", [
+        "a", "ab", pytest.param("abc", marks=pytest.mark.fake_unsupported(reason="openapi.yaml minLength is 3"))])
     def test_change_username_too_short(self, authenticated_auth_client, short_username):
         response = authenticated_auth_client.change_username(short_username)
         
@@ -89,6 +95,7 @@ class TestUsernameChangeUsernameValidation:
         "user[name]",
         "user{name}",
     ])
+    @pytest.mark.fake_unsupported(reason="openapi.yaml only limits the username length")
     def test_change_username_invalid_characters(self, authenticated_auth_client, invalid_username):
         response = authenticated_auth_client.change_username(invalid_username)
         
@@ -104,6 +111,7 @@ class TestUsernameChangeUsernameValidation:
         "user123",
         "123user",
     ])
+    @pytest.mark.fake_unsupported(reason="openapi.yaml only limits the username length")
     def test_change_username_special_characters(self, authenticated_auth_client, special_username):
         response = authenticated_auth_client.change_username(special_username)
         
@@ -142,6 +150,7 @@ class TestUsernameChangeUsernameValidation:
         "admin'--",
         "1' UNION SELECT * FROM users--",
     ])
+    @pytest.mark.fake_unsupported(reason="openapi.yaml only limits the username length")
     def test_change_username_sql_injection(self, authenticated_auth_client, malicious_username):
         response = authenticated_auth_client.change_username(malicious_username)
         
@@ -194,32 +203,29 @@ class TestUsernameChangeAccess:
     @allure.title("Change username with wrong auth type")
     @allure.severity(allure.severity_level.NORMAL)
     def test_change_username_with_wrong_auth_type(self, authenticated_auth_client, valid_username):
-        headers = authenticated_auth_client.headers.copy() 
-        headers["Authorization"] = "Basic " + base64.b64encode(authenticated_auth_client.token.encode()).decode() 
-        response = authenticated_auth_client.change_username(valid_username)       
+        headers = {"Authorization": "Basic " + base64.b64encode(authenticated_auth_client.token.encode()).decode()}
+        response = authenticated_auth_client.send_custom_request(
+            "PUT", "/v1/auth/username", json={"new_username": valid_username}, headers=headers)
         assert response.status_code == 401, f"Expected 401, got {response.status_code}"
         ErrorResponse(**response.json())
-        authenticated_auth_client.headers = headers
 
     @allure.title("Change username with wrong auth format")
     @allure.severity(allure.severity_level.NORMAL)
     def test_change_username_with_wrong_auth_format(self, authenticated_auth_client, valid_username):
-        headers = authenticated_auth_client.headers.copy() 
-        authenticated_auth_client.headers["Authorization"] = "Bearer " + base64.b64encode(authenticated_auth_client.token.encode()).decode() 
-        response = authenticated_auth_client.change_username(valid_username)    
+        headers = {"Authorization": "Bearer " + base64.b64encode(authenticated_auth_client.token.encode()).decode()}
+        response = authenticated_auth_client.send_custom_request(
+            "PUT", "/v1/auth/username", json={"new_username": valid_username}, headers=headers)
         assert response.status_code == 401, f"Expected 401, got {response.status_code}"
         ErrorResponse(**response.json())
-        authenticated_auth_client.headers = headers
 
     @allure.title("Change username with too long access token")
     @allure.severity(allure.severity_level.NORMAL)
     def test_change_username_with_too_long_access_token(self, authenticated_auth_client, valid_username):
-        headers = authenticated_auth_client.headers.copy() 
-        authenticated_auth_client.headers["Authorization"] = "Bearer " + "a" * 20480 
-        response = authenticated_auth_client.change_username(valid_username)       
+        headers = {"Authorization": "Bearer " + "a" * 20480}
+        response = authenticated_auth_client.send_custom_request(
+            "PUT", "/v1/auth/username", json={"new_username": valid_username}, headers=headers)
         assert response.status_code == 431, f"Expected 431, got {response.status_code}"
         ErrorResponse(**response.json())
-        authenticated_auth_client.headers = headers
 
     @allure.title("Change username with revoked refresh token")
     @allure.severity(allure.severity_level.NORMAL)
@@ -238,23 +244,23 @@ class TestChangeUsernameHeaders:
     @allure.title("Change username without content type")
     @allure.severity(allure.severity_level.NORMAL)
     def test_change_username_without_content_type(self, authenticated_auth_client, valid_username):
-        headers = authenticated_auth_client.headers.copy() 
-        headers.pop("Content-Type")
-        response = authenticated_auth_client.change_username(valid_username)  
+        response = authenticated_auth_client.client.put(
+            f"{authenticated_auth_client.base_url}/v1/auth/username",
+            content=json.dumps({"new_username": valid_username}),
+            headers={"Authorization": f"Bearer {authenticated_auth_client.token}"},
+        )
         assert response.status_code == 400, f"Expected 400, got {response.status_code}"
         ErrorResponse(**response.json())
-        authenticated_auth_client.headers = headers
 
     @allure.title("Change username with wrong content type")
     @allure.severity(allure.severity_level.NORMAL)
     @pytest.mark.parametrize("content_type", ["text/plain", "application/xml", "application/json; charset=utf-8"])
     def test_change_username_with_wrong_content_type(self, authenticated_auth_client, content_type, valid_username):
-        headers = authenticated_auth_client.headers.copy() 
-        headers["Content-Type"] = content_type
-        response = authenticated_auth_client.change_username(valid_username)       
+        headers = {"Content-Type": content_type}
+        response = authenticated_auth_client.send_custom_request(
+            "PUT", "/v1/auth/username", json={"new_username": valid_username}, headers=headers)
         assert response.status_code == 400, f"Expected 400, got {response.status_code}"
         ErrorResponse(**response.json())
-        authenticated_auth_client.headers = headers
 
     @allure.title("Change username check cache")
     @allure.severity(allure.severity_level.NORMAL)
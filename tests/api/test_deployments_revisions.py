@@ -0,0 +1,62 @@
+import pytest
+import allure
+from itertools import islice
+from tests.api.schemas import validate_schema
+from tests.api.schemas.deployment_schemas import Deployment, DeploymentRevision, RevisionListResponse
+
+
+@allure.feature("Deployments")
+@allure.story("Revisions")
+@pytest.mark.api
+class TestDeploymentRevisions:
+
+    @allure.title("Get deployment of an existing node")
+    @allure.severity(allure.severity_level.CRITICAL)
+    def test_get_deployment_success(self, authenticated_deployments_client, existing_node_id):
+        response = authenticated_deployments_client.get_deployment(existing_node_id)
+
+        assert response.status_code == 200, f"Expected 200, got {response.status_code}"
+        deployment = validate_schema(response.json(), Deployment)
+        assert deployment.id == existing_node_id, "Deployment ID mismatch"
+
+    @allure.title("List revisions of a deployment")
+    @allure.severity(allure.severity_level.CRITICAL)
+    def test_list_revisions_success(self, authenticated_deployments_client, existing_node_id):
+        response = authenticated_deployments_client.list_revisions(existing_node_id)
+
+        assert response.status_code == 200, f"Expected 200, got {response.status_code}"
+        revisions = validate_schema(response.json(), RevisionListResponse)
+        assert revisions.total >= 1, "A deployment has at least its initial revision"
+        assert all(revision.deployment_id == existing_node_id for revision in revisions.results)
+
+    @allure.title("Paged revision listing matches the single-request listing")
+    @allure.severity(allure.severity_level.NORMAL)
+    def test_iter_revisions_matches_list(self, authenticated_deployments_client, existing_node_id):
+        listed = authenticated_deployments_client.list_revisions(existing_node_id).json()["results"]
+
+        iterated = list(authenticated_deployments_client.iter_revisions(
+            existing_node_id, page_size=1, parse=DeploymentRevision.model_validate
+        ))
+
+        assert [revision.id for revision in iterated] == [revision["id"] for revision in listed]
+        assert len({revision.version for revision in iterated}) == len(iterated), "Revision versions must be unique"
+
+    @allure.title("Get revision by ID")
+    @allure.severity(allure.severity_level.NORMAL)
+    def test_get_revision_success(self, authenticated_deployments_client, existing_node_id):
+        first = next(authenticated_deployments_client.iter_revisions(existing_node_id, lookahead=0,
+                                                                       parse=DeploymentRevision.model_validate))
+
+        response = authenticated_deployments_client.get_revision(existing_node_id, first.id)
+
+        assert response.status_code == 200, f"Expected 200, got {response.status_code}"
+        assert validate_schema(response.json(), DeploymentRevision) == first
+
+    @allure.title("Deployments listing can be consumed lazily")
+    @allure.severity(allure.severity_level.NORMAL)
+    def test_iter_deployments_lazy(self, authenticated_deployments_client, existing_node_id):
+        deployments = list(islice(authenticated_deployments_client.iter_deployments(
+            page_size=2, parse=Deployment.model_validate), 3))
+
+        assert deployments, "At least the pool node should be listed"
+        assert len({deployment.id for deployment in deployments}) == len(deployments), "Duplicate deployments"
@@ -1,3 +1,4 @@
+import asyncio
 import pytest
 import allure
 import concurrent.futures
@@ -47,6 +48,7 @@ class TestNodesConcurrency:
     @pytest.mark.xfail(reason="https://chainstack.myjetbrains.com/youtrack/issue/CORE-13622/Control-panelNodes-API-500-when-repeated-node-deletion")
     @allure.title("Concurrent delete requests on same node")
     @allure.severity(allure.severity_level.NORMAL)
+    @pytest.mark.exclusive_node
     def test_concurrent_delete_same_node(self, authenticated_nodes_client, existing_node_id):
 
         authenticated_nodes_client._wait_node_until_ready(existing_node_id)
@@ -92,3 +94,16 @@ class TestNodesConcurrency:
         node_ids = [r["id"] for r in responses]
         assert all(id == existing_node_id for id in node_ids), \
             "Inconsistent node data returned"
+
+    @allure.title("Concurrent get requests on same node with async client")
+    @allure.severity(allure.severity_level.NORMAL)
+    async def test_concurrent_get_same_node_async(self, async_authenticated_nodes_client, existing_node_id):
+        num_concurrent = 50
+        responses = await asyncio.gather(
+            *(async_authenticated_nodes_client.get_node(existing_node_id) for _ in range(num_concurrent))
+        )
+
+        assert all(r.status_code == 200 for r in responses), \
+            f"Some requests failed: {[r.status_code for r in responses if r.status_code != 200]}"
+        assert all(r.json()["id"] == existing_node_id for r in responses), \
+            "Inconsistent node data returned"
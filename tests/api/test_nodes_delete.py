@@ -20,6 +20,7 @@ class TestNodesDeleteGeneral:
     @allure.title("Schedule node deletion successfully")
     @allure.severity(allure.severity_level.CRITICAL)
     @pytest.mark.smoke
+    @pytest.mark.exclusive_node
     def test_schedule_delete_node_success(self, authenticated_nodes_client, existing_node_id):
         response = authenticated_nodes_client.schedule_delete_node(existing_node_id)
         
@@ -33,6 +34,7 @@ class TestNodesDeleteGeneral:
 
     @allure.title("Schedule delete check response headers")
     @allure.severity(allure.severity_level.NORMAL)
+    @pytest.mark.exclusive_node
     def test_schedule_delete_check_headers(self, authenticated_nodes_client, existing_node_id):
         response = authenticated_nodes_client.schedule_delete_node(existing_node_id)
         
@@ -43,6 +45,7 @@ class TestNodesDeleteGeneral:
     @pytest.mark.xfail(reason="https://chainstack.myjetbrains.com/youtrack/issue/CORE-13622")
     @allure.title("Schedule delete same node twice")
     @allure.severity(allure.severity_level.NORMAL)
+    @pytest.mark.exclusive_node
     def test_schedule_delete_twice(self, authenticated_nodes_client, existing_node_id):
         response1 = authenticated_nodes_client.schedule_delete_node(existing_node_id)
         assert response1.status_code == 200, f"First delete: Expected 200, got {response1.status_code}"
@@ -59,6 +62,7 @@ class TestNodesDeleteValidation:
 
     @allure.title("Delete node with uppercase UUID")
     @allure.severity(allure.severity_level.NORMAL)
+    @pytest.mark.exclusive_node
     def test_delete_node_uppercase_uuid(self, authenticated_nodes_client, existing_node_id):        
         node_status = authenticated_nodes_client.get_node(existing_node_id).json()["status"]
         if node_status == NodeState.PENDING:
@@ -70,6 +74,7 @@ class TestNodesDeleteValidation:
 
     @allure.title("Delete node with mixed case UUID")
     @allure.severity(allure.severity_level.NORMAL)
+    @pytest.mark.exclusive_node
     def test_delete_node_mixed_case_uuid(self, authenticated_nodes_client, existing_node_id):
         node_status = authenticated_nodes_client.get_node(existing_node_id).json()["status"]
         if node_status == NodeState.PENDING:
@@ -165,6 +165,7 @@ class TestNodesGetValidation:
     @allure.title("Get node with invalid method")
     @allure.severity(allure.severity_level.CRITICAL)
     @pytest.mark.parametrize("method", ["POST", "PUT", "PATCH", "DELETE"])
+    @pytest.mark.fake_unsupported(reason="requests /nodes/v1/ui/{id}, which is not a route of openapi.yaml")
     def test_get_node_invalid_method(self, authenticated_nodes_client, existing_node_id, method):
         response = authenticated_nodes_client.send_custom_request(endpoint=f"/nodes/v1/ui/{existing_node_id}", method=method)
         
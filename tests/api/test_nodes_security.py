@@ -35,6 +35,7 @@ class TestNodesSecurityHeaders:
 
     @allure.title("Delete node endpoint has security headers")
     @allure.severity(allure.severity_level.NORMAL)
+    @pytest.mark.exclusive_node
     def test_delete_node_security_headers(self, authenticated_nodes_client, existing_node_id):
         response = authenticated_nodes_client.schedule_delete_node(existing_node_id)
         
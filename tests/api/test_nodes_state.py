@@ -4,6 +4,7 @@ import time
 from pydantic import ValidationError
 from tests.api.schemas.node_schemas import Node, ErrorResponse
 from control_panel.node import NodeState
+from control_panel.fake_server import PENDING_DELAY_HEADER
 
 
 @allure.feature("Nodes")
@@ -32,6 +33,7 @@ class TestNodesStateTransitions:
 
     @allure.title("Running node can be scheduled for deletion")
     @allure.severity(allure.severity_level.CRITICAL)
+    @pytest.mark.exclusive_node
     def test_running_node_can_be_deleted(self, authenticated_nodes_client, existing_node_id):
         node_status = authenticated_nodes_client.get_node(existing_node_id).json()["status"]
         if node_status == NodeState.PENDING:
@@ -46,6 +48,7 @@ class TestNodesStateTransitions:
 
     @allure.title("Get deleted node shows deleted status")
     @allure.severity(allure.severity_level.NORMAL)
+    @pytest.mark.exclusive_node
     def test_get_deleted_node_shows_deleted_status(self, authenticated_nodes_client, existing_node_id):
         node_status = authenticated_nodes_client.get_node(existing_node_id).json()["status"]
         if node_status == NodeState.PENDING:
@@ -87,3 +90,20 @@ class TestNodesStateTransitions:
         final_status = get_response.json()["status"]
         assert final_status == NodeState.RUNNING, f"Expected running, got {final_status}"
         
+
+    @allure.title("Slow provisioning is waited out on virtual time")
+    @allure.severity(allure.severity_level.NORMAL)
+    def test_slow_pending_node_transitions_to_running(self, authenticated_nodes_client, valid_eth_preset_instance_id,
+                                                      fake_control_panel, virtual_clock):
+        create_response = authenticated_nodes_client.post(
+            "/v1/ui/nodes",
+            json={"preset_instance_id": valid_eth_preset_instance_id},
+            headers={PENDING_DELAY_HEADER: "600"},
+        )
+        assert create_response.status_code == 201
+        created_at = virtual_clock.time()
+        node_id = create_response.json()["deployment_id"]
+
+        authenticated_nodes_client._wait_node_until_status(node_id, NodeState.RUNNING, timeout=900)
+
+        assert virtual_clock.time() - created_at >= 600, "Node left pending before its provisioning delay"
@@ -0,0 +1,214 @@
+import json
+import httpx
+import pytest
+import allure
+import time
+from eth_account import Account
+from eth_utils import keccak
+from control_panel import fake_eth_node
+from control_panel.fake_eth_node import FakeEthNode
+from clients.eth_client import EthereumClient, RPCCallError
+
+# Storage: store(uint256) saves the value and emits Stored(uint256), retrieve() returns it.
+# Hand-assembled so the tests need no compiler; the first 11 bytes copy the runtime and return it.
+STORAGE_BYTECODE = (
+    "0x605b80600b6000396000f3"
+    "60003560e01c80636057361d14601d57632e64cec114604f57600080fd5b600435806000556000527f"
+    "c6d8c0af6d21f291e7c359603aa97e0ed500f04db6e983b9fce75a91c6b8da6b60206000a1005b60005460005260206000f3"
+)
+STORAGE_ABI = [
+    {"type": "function", "name": "store", "stateMutability": "nonpayable",
+     "inputs": [{"name": "value", "type": "uint256"}], "outputs": []},
+    {"type": "function", "name": "retrieve", "stateMutability": "view",
+     "inputs": [], "outputs": [{"name": "", "type": "uint256"}]},
+    {"type": "event", "name": "Stored", "anonymous": False,
+     "inputs": [{"name": "value", "type": "uint256", "indexed": False}]},
+]
+STORED_TOPIC = keccak(text="Stored(uint256)")
+
+
+@allure.feature("Ethereum RPC")
+@allure.story("Smoke")
+@pytest.mark.core
+class TestRpcSmoke:
+
+    @allure.title("Node answers the basic info methods")
+    @allure.severity(allure.severity_level.CRITICAL)
+    @pytest.mark.smoke
+    def test_node_info(self, eth_client):
+        assert eth_client.is_connected(), "Node is not reachable"
+        assert eth_client.get_client_version(), "Client version should not be empty"
+        assert eth_client.get_chain_id() > 0, "Chain ID should be positive"
+        assert eth_client.get_network_version(), "Network version should not be empty"
+        assert eth_client.get_sync_status() is False, "Node should be synced"
+
+    @allure.title("Latest block has number, hash and timestamp")
+    @allure.severity(allure.severity_level.CRITICAL)
+    def test_latest_block(self, eth_client):
+        block = eth_client.get_block("latest")
+
+        assert block["number"] == eth_client.get_block_number()
+        assert len(block["hash"]) == 32, "Block hash should be 32 bytes"
+        assert block["timestamp"] > 0, "Timestamp should be set"
+
+    @allure.title("Gas price, priority fee and fee history are positive")
+    @allure.severity(allure.severity_level.NORMAL)
+    def test_fees(self, eth_client):
+        assert eth_client.get_gas_price() > 0, "Gas price should be positive"
+        assert eth_client.w3.eth.max_priority_fee > 0, "Priority fee should be positive"
+
+        history = eth_client.get_fee_history(1, "latest", [50])
+        assert history["baseFeePerGas"], "Fee history should have base fees"
+        assert all(fee > 0 for fee in history["baseFeePerGas"])
+
+    @allure.title("Funded account has a balance")
+    @allure.severity(allure.severity_level.NORMAL)
+    def test_funded_balance(self, eth_client, eth_private_key):
+        address = Account.from_key(eth_private_key).address
+
+        assert eth_client.get_balance(address) > 0, f"{address} should be funded"
+
+    @allure.title("Block number increases over time")
+    @allure.severity(allure.severity_level.NORMAL)
+    def test_block_number_increases(self):
+        if fake_eth_node.EthereumTester is None:
+            pytest.skip('Requires eth-tester: uv sync --extra local-eth')
+        with FakeEthNode(accounts=1, block_time=0.1) as node, EthereumClient(node.url) as client:
+            start = client.get_block_number()
+            deadline = time.monotonic() + 5
+            while client.get_block_number() <= start and time.monotonic() < deadline:
+                time.sleep(0.05)
+
+            assert client.get_block_number() > start, "No block was produced"
+
+
+@allure.feature("Ethereum RPC")
+@allure.story("Transactions")
+@pytest.mark.core
+class TestRpcTransactions:
+
+    @allure.title("Simple ETH transfer changes balances")
+    @allure.severity(allure.severity_level.CRITICAL)
+    def test_send_eth(self, eth_client, eth_private_key):
+        recipient = Account.create().address
+        value = eth_client.w3.to_wei(0.001, "ether")
+
+        tx_hash = eth_client.send_eth(eth_private_key, recipient, value)
+        receipt = eth_client.wait_for_transaction_receipt(tx_hash)
+
+        assert tx_hash.startswith("0x"), f"Unexpected hash format: {tx_hash}"
+        assert receipt["status"] == 1, "Transfer should succeed"
+        assert receipt["gasUsed"] == 21000, "Plain transfer should use 21000 gas"
+        assert eth_client.get_balance(recipient) == value
+
+    @allure.title("Gas estimate for a transfer is 21000")
+    @allure.severity(allure.severity_level.NORMAL)
+    def test_estimate_gas(self, eth_client, eth_private_key):
+        sender = Account.from_key(eth_private_key).address
+
+        assert eth_client.estimate_gas({"from": sender, "to": Account.create().address, "value": 1}) == 21000
+
+    @allure.title("Deployed contract stores a value and emits an event")
+    @allure.severity(allure.severity_level.CRITICAL)
+    def test_deploy_and_invoke_contract(self, eth_client, eth_private_key):
+        deployed = eth_client.deploy_contract(STORAGE_ABI, STORAGE_BYTECODE, eth_private_key)
+
+        assert deployed.receipt["status"] == 1, "Deployment should succeed"
+        assert eth_client.w3.eth.get_code(deployed.contract_address), "Contract code should be on chain"
+
+        account = Account.from_key(eth_private_key)
+        contract = eth_client.w3.eth.contract(address=deployed.contract_address, abi=STORAGE_ABI)
+        transaction = contract.functions.store(42).build_transaction({
+            "from": account.address,
+            "nonce": eth_client.w3.eth.get_transaction_count(account.address),
+            "gasPrice": eth_client.get_gas_price(),
+        })
+        signed_tx = account.sign_transaction(transaction)
+        receipt = eth_client.wait_for_transaction_receipt(eth_client.send_raw_transaction(signed_tx.raw_transaction))
+
+        assert receipt["status"] == 1, "store() should succeed"
+        assert contract.functions.retrieve().call() == 42
+
+        logs = eth_client.get_logs({"fromBlock": receipt["blockNumber"], "toBlock": receipt["blockNumber"],
+                                    "address": deployed.contract_address, "topics": ["0x" + STORED_TOPIC.hex()]})
+        assert len(logs) == 1, f"Expected one Stored event, got {len(logs)}"
+        assert int.from_bytes(logs[0]["data"], "big") == 42
+
+    @allure.title("Unknown transaction has no receipt")
+    @allure.severity(allure.severity_level.MINOR)
+    def test_unknown_receipt(self, eth_client):
+        with pytest.raises(Exception, match="not found"):
+            eth_client.get_transaction_receipt("0x" + "ab" * 32)
+
+
+@allure.feature("Ethereum RPC")
+@allure.story("Batch")
+@pytest.mark.core
+class TestRpcBatch:
+
+    @allure.title("Batched block and balance reads match single calls")
+    @allure.severity(allure.severity_level.NORMAL)
+    def test_batch_matches_single_calls(self, eth_client, eth_private_key):
+        head = eth_client.get_block_number()
+        numbers = list(range(max(head - 9, 0), head + 1))
+        address = Account.from_key(eth_private_key).address
+
+        blocks = eth_client.get_blocks(numbers)
+        balances = eth_client.get_balances([address] * 3)
+
+        assert [block["number"] for block in blocks] == numbers, "Blocks should come back in request order"
+        assert blocks[-1]["hash"] == eth_client.get_block(head)["hash"]
+        assert balances == [eth_client.get_balance(address)] * 3
+
+    @allure.title("Failed call in a batch does not lose the others")
+    @allure.severity(allure.severity_level.NORMAL)
+    def test_batch_item_errors(self, eth_client):
+        batch = eth_client.batch()
+        batch.get_block_number()
+        batch.add("eth_noSuchMethod")
+        batch.get_transaction_receipt("0x" + "ab" * 32)
+
+        block_number, error, receipt = batch.execute(return_errors=True)
+
+        assert block_number >= 0
+        assert isinstance(error, RPCCallError) and error.code == -32601, f"Unexpected error: {error!r}"
+        assert receipt is None, "Unknown receipt should be null"
+
+        batch.add("eth_noSuchMethod")
+        with pytest.raises(RPCCallError, match="eth_noSuchMethod"):
+            batch.execute()
+
+    @allure.title("Batches are chunked and shrink when the node limits them")
+    @allure.severity(allure.severity_level.NORMAL)
+    def test_batch_chunking(self):
+        if fake_eth_node.EthereumTester is None:
+            pytest.skip('Requires eth-tester: uv sync --extra local-eth')
+        with FakeEthNode(accounts=1, max_batch_size=8) as node, EthereumClient(node.url, batch_size=20) as client:
+            address = node.accounts[0].address
+
+            balances = client.get_balances([address] * 50)
+
+            assert balances == [client.get_balance(address)] * 50
+            assert max(node.batches) <= 8, f"Node limit exceeded: {node.batches}"
+            assert sum(node.batches) == 50, f"Every call should be sent once: {node.batches}"
+
+    @allure.title("Batches are not split when the node fails them for another reason")
+    @allure.severity(allure.severity_level.NORMAL)
+    def test_batch_error_is_raised(self):
+        sizes = []
+
+        def handler(request):
+            sizes.append(len(json.loads(request.content)))
+            return httpx.Response(200, json={"jsonrpc": "2.0", "id": None,
+                                             "error": {"code": -32005, "message": "rate limit reached"}})
+
+        with EthereumClient("http://node", httpx.MockTransport(handler), batch_size=20) as client:
+            batch = client.batch()
+            for _ in range(10):
+                batch.get_block_number()
+
+            with pytest.raises(RPCCallError, match="rate limit reached"):
+                batch.execute()
+
+        assert sizes == [10], f"The batch should be sent once, whole: {sizes}"
+        assert batch.size == 20, "Only a batch limit error should shrink later batches"
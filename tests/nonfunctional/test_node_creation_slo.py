@@ -0,0 +1,56 @@
+import asyncio
+import json
+import time
+
+import allure
+import pytest
+from control_panel.node import NodePreset, NodeState
+from utils.benchmark import Baseline, distribution, format_distribution
+
+PRESETS = {name.lower(): value for name, value in vars(NodePreset).items() if name.isupper()}
+
+
+@pytest.fixture(scope="session")
+def node_creation_baseline(config, pytestconfig):
+    return Baseline(pytestconfig.rootpath / config.node_creation_baseline_path)
+
+
+@allure.feature("Nodes")
+@allure.story("Performance")
+@pytest.mark.nonfunctional
+@pytest.mark.slow
+class TestNodeCreationSLO:
+
+    @allure.title("Time to running for concurrently created nodes: {preset_name}")
+    @allure.severity(allure.severity_level.CRITICAL)
+    @pytest.mark.parametrize("preset_name", PRESETS)
+    async def test_time_to_running(self, config, async_authenticated_nodes_client, node_creation_baseline,
+                                   preset_name):
+        client = async_authenticated_nodes_client
+        # Time to running is only as precise as the poll interval, so keep it short.
+        client.max_sleep_period = 5
+
+        async def provision() -> float:
+            started = time.monotonic()
+            response = await client.create_node(preset_instance_id=PRESETS[preset_name])
+            assert response.status_code == 201, f"Create failed: {response.status_code} {response.text}"
+            await client._wait_node_until_status(response.json()["deployment_id"], NodeState.RUNNING,
+                                                 config.node_creation_slo)
+            return time.monotonic() - started
+
+        with allure.step(f"Create {config.parallel_deployments} {preset_name} nodes concurrently"):
+            samples = await asyncio.gather(*(provision() for _ in range(config.parallel_deployments)))
+
+        measured = distribution(samples)
+        baseline = node_creation_baseline.get(preset_name)
+        allure.attach(format_distribution(preset_name, samples, measured, baseline),
+                      "Time to running", allure.attachment_type.TEXT)
+        allure.attach(json.dumps({"samples": samples, "measured": measured, "baseline": baseline}, indent=2),
+                      "Time to running (json)", allure.attachment_type.JSON)
+        if config.update_benchmark_baselines:
+            node_creation_baseline.update(preset_name, measured)
+
+        assert measured["max"] <= config.node_creation_slo, \
+            f"{preset_name}: slowest node took {measured['max']}s, SLO is {config.node_creation_slo}s"
+        regressions = node_creation_baseline.regressions(preset_name, measured)
+        assert not regressions, "Time to running regressed:\n" + "\n".join(regressions)
@@ -0,0 +1,7 @@
+import pytest
+
+
+@pytest.fixture(scope="session", autouse=True)
+def http_transport_registry():
+    """Unit tests reach no environment, so they need no Settings and leave the shared pools alone."""
+    yield
@@ -0,0 +1,24 @@
+import asyncio
+import threading
+import pytest
+import allure
+from utils.async_bridge import run_sync
+
+
+async def _thread_name() -> str:
+    await asyncio.sleep(0)
+    return threading.current_thread().name
+
+
+@allure.feature("Test infrastructure")
+@allure.story("Async bridge")
+@pytest.mark.unit
+class TestRunSync:
+
+    @allure.title("Without a running loop the coroutine runs in the calling thread")
+    def test_without_loop(self):
+        assert run_sync(_thread_name()) == threading.current_thread().name
+
+    @allure.title("Under a running loop the coroutine gets a loop of its own instead of failing")
+    async def test_under_running_loop(self):
+        assert run_sync(_thread_name()) != threading.current_thread().name
@@ -0,0 +1,72 @@
+import pytest
+import allure
+from utils import attachment_buffer
+from utils.attachment_buffer import AttachmentBuffer, AttachmentMode, Oversize
+
+
+@pytest.fixture
+def attached(monkeypatch):
+    written = []
+    monkeypatch.setattr(attachment_buffer.allure, "attach",
+                        lambda body, name, attachment_type: written.append((name, body)))
+    return written
+
+
+@allure.feature("Test infrastructure")
+@allure.story("HTTP attachments")
+@pytest.mark.unit
+class TestAttachmentBuffer:
+
+    @allure.title("Eager mode writes at once, lean mode never")
+    def test_eager_and_lean(self, attached):
+        AttachmentBuffer(AttachmentMode.EAGER).attach(b'{"a": 1}', "Response Body", None)
+        AttachmentBuffer(AttachmentMode.LEAN).attach(lambda: pytest.fail("lean mode rendered a body"), "Body", None)
+
+        assert attached == [("Response Body", '{"a": 1}')]
+
+    @allure.title("Deferred mode writes only on flush and forgets on reset")
+    def test_deferred(self, attached):
+        buffer = AttachmentBuffer(AttachmentMode.DEFERRED)
+        buffer.attach(lambda: "{'page': 1}", "Query Parameters", None)
+        buffer.attach(b"ok", "Response Body", None)
+        assert attached == []
+
+        buffer.flush()
+        assert attached == [("Query Parameters", "{'page': 1}"), ("Response Body", "ok")]
+
+        buffer.attach(b"later", "Response Body", None)
+        buffer.reset()
+        buffer.flush()
+        assert len(attached) == 2, "Reset should drop buffered attachments"
+
+    @allure.title("Callable bodies count against the budget and the oldest are dropped")
+    def test_budget(self, attached):
+        buffer = AttachmentBuffer(AttachmentMode.DEFERRED, budget_bytes=250, max_body_bytes=0)
+        for index in range(5):
+            buffer.attach(lambda index=index: str(index) * 100, f"Body {index}", None)
+
+        assert buffer.buffered_bytes == 200
+        buffer.flush()
+        assert [name for name, _ in attached] == ["HTTP attachments truncated", "Body 3", "Body 4"]
+        assert "3 earlier HTTP attachments were dropped" in attached[0][1]
+
+    @allure.title("Oversized bodies are truncated to head and tail")
+    def test_truncate(self, attached):
+        buffer = AttachmentBuffer(AttachmentMode.EAGER, max_body_bytes=10, oversize=Oversize.TRUNCATE)
+        buffer.attach(b"HEAD" + b"x" * 100 + b"TAIL", "Body", None)
+
+        body = attached[0][1]
+        assert body.startswith("HEADx") and body.endswith("xTAIL")
+        assert "[98 bytes truncated]" in body
+
+    @allure.title("Oversized bodies are sampled across their whole length")
+    def test_sample(self, attached):
+        buffer = AttachmentBuffer(AttachmentMode.DEFERRED, max_body_bytes=80, oversize=Oversize.SAMPLE)
+        data = "".join(chr(ord("a") + index) * 100 for index in range(8))
+        buffer.attach(data, "Body", None)
+
+        assert buffer.buffered_bytes < len(data)
+        buffer.flush()
+        body = attached[0][1]
+        assert all(chr(ord("a") + index) * 10 in body for index in range(8)), "Every region should be sampled"
+        assert body.count("bytes skipped") == 7
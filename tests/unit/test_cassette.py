@@ -0,0 +1,112 @@
+import gzip
+import uuid
+import httpx
+import pytest
+import allure
+from clients.cassette import Cassette, request_fingerprint, request_key
+
+BASE = "http://cp"
+
+
+def _get_node(node_id: str) -> httpx.Request:
+    return httpx.Request("GET", f"{BASE}/v1/ui/nodes/{node_id}")
+
+
+def _login(password: str) -> httpx.Request:
+    return httpx.Request("POST", f"{BASE}/v1/auth/login", json={"username": "user", "password": password})
+
+
+def _record(cassette: Cassette, request: httpx.Request, body: dict) -> dict:
+    return cassette.record(request, httpx.Response(200, json=body))
+
+
+def _recording(path, *interactions) -> Cassette:
+    """A saved cassette holding `interactions`, given as (request, body) pairs."""
+    cassette = Cassette(path, "record")
+    for request, body in interactions:
+        _record(cassette, request, body)
+    cassette.save()
+    return cassette
+
+
+def _body(cassette: Cassette, request: httpx.Request):
+    interaction = cassette.lookup(request)
+    return None if interaction is None else Cassette.response(interaction, request).read()
+
+
+@allure.feature("Test infrastructure")
+@allure.story("HTTP cassette")
+@pytest.mark.unit
+class TestCassetteLookup:
+
+    @allure.title("Interactions under one key replay in recorded order, then repeat the last")
+    def test_recorded_order(self, tmp_path):
+        node_id = str(uuid.uuid4())
+        path = tmp_path / "api.jsonl.gz"
+        _recording(path, (_get_node(node_id), {"status": "pending"}), (_get_node(node_id), {"status": "running"}))
+        replay = Cassette(path, "replay")
+
+        bodies = [_body(replay, _get_node(node_id)) for _ in range(3)]
+
+        assert bodies == [b'{"status":"pending"}', b'{"status":"running"}', b'{"status":"running"}']
+
+    @allure.title("An exact match wins over recorded order")
+    def test_exact_match_first(self, tmp_path):
+        first, second = str(uuid.uuid4()), str(uuid.uuid4())
+        path = tmp_path / "api.jsonl.gz"
+        _recording(path, (_get_node(first), {"id": first}), (_get_node(second), {"id": second}))
+        replay = Cassette(path, "replay")
+
+        assert request_key(_get_node(first)) == request_key(_get_node(second))
+        assert _body(replay, _get_node(second)) == f'{{"id":"{second}"}}'.encode()
+        assert _body(replay, _get_node(first)) == f'{{"id":"{first}"}}'.encode()
+
+    @allure.title("Password fields stay out of the request hashes")
+    def test_passwords_are_not_hashed(self, tmp_path):
+        right, wrong = _login("Passw0rd!"), _login("wrong")
+        path = tmp_path / "api.jsonl.gz"
+        _recording(path, (right, {"access_token": "a"}), (wrong, {"error": "invalid credentials"}))
+
+        assert request_key(right) == request_key(wrong)
+        assert request_fingerprint(right) == request_fingerprint(wrong)
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            assert "Passw0rd!" not in f.read()
+        replay = Cassette(path, "replay")
+        assert _body(replay, _login("Passw0rd!")) == b'{"access_token":"a"}'
+        assert _body(replay, _login("wrong")) == b'{"error":"invalid credentials"}'
+
+
+@allure.feature("Test infrastructure")
+@allure.story("HTTP cassette")
+@pytest.mark.unit
+class TestCassetteRerecord:
+
+    @allure.title("Rerecord keeps what it replayed, adds what it missed and drops the rest")
+    def test_prunes_unused(self, tmp_path):
+        kept, stale, added = (str(uuid.uuid4()) for _ in range(3))
+        path = tmp_path / "api.jsonl.gz"
+        _recording(path, (_get_node(kept), {"id": kept}), (httpx.Request("GET", f"{BASE}/v1/ui/deployments"),
+                                                            {"id": stale}))
+        rerecord = Cassette(path, "rerecord")
+
+        assert _body(rerecord, _get_node(kept)) == f'{{"id":"{kept}"}}'.encode()
+        assert rerecord.lookup(httpx.Request("GET", f"{BASE}/v1/ui/nodes")) is None
+        _record(rerecord, httpx.Request("GET", f"{BASE}/v1/ui/nodes"), {"id": added})
+        rerecord.save()
+
+        assert [interaction["url"] for interaction in Cassette.read(path)] == [
+            f"{BASE}/v1/ui/nodes/{kept}", f"{BASE}/v1/ui/nodes"]
+
+    @allure.title("Recordings an xdist worker replayed survive the controller's save")
+    def test_keeps_worker_replays(self, tmp_path):
+        node_id = str(uuid.uuid4())
+        path = tmp_path / "api.jsonl.gz"
+        _recording(path, (_get_node(node_id), {"id": node_id}))
+        controller, worker = Cassette(path, "rerecord"), Cassette(path, "rerecord")
+        assert worker.lookup(_get_node(node_id)) is not None
+
+        controller.merge(worker.recorded(), worker.stats, worker.replayed())
+        controller.save()
+
+        assert len(Cassette(path, "replay")) == 1
+        assert controller.stats["replayed"] == 1
@@ -0,0 +1,194 @@
+import json
+import random
+import socket
+import subprocess
+import sys
+import uuid
+import httpx
+import pytest
+import allure
+from clients import fault_transport
+from clients.api_client import NodesAPIClient
+from clients.fault_transport import FaultProfile, FaultRule, FaultStats, FaultTransport, Latency
+from clients.node_cleanup import reap_orphans
+from clients.node_ledger import NodeLedger
+from clients.transport_pool import transport_registry
+from config.settings import Settings
+from control_panel.fake_server import FakeControlPanel
+from utils.clock import clock, VirtualClock
+
+REQUESTS = 2000
+
+
+@pytest.fixture(autouse=True)
+def virtual_clock():
+    virtual = VirtualClock()
+    previous = clock.use(virtual)
+    yield virtual
+    clock.use(previous)
+
+
+def _transport(*rules, seed=None):
+    """FaultTransport over a server that always answers 200, and the requests that reached it."""
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(200, json={})
+
+    transport = FaultTransport(httpx.MockTransport(handler), FaultProfile("test", rules),
+                               rng=random.Random(seed), stats=FaultStats())
+    return transport, calls
+
+
+def _outcome(transport, method="GET", path="/v1/ui/nodes"):
+    try:
+        return transport.handle_request(httpx.Request(method, f"http://cp{path}")).status_code
+    except httpx.ReadTimeout:
+        return "timeout"
+    except httpx.ReadError:
+        return "reset"
+
+
+def _outcomes(transport, count=REQUESTS):
+    return [_outcome(transport) for _ in range(count)]
+
+
+@allure.feature("Test infrastructure")
+@allure.story("Fault injection")
+@pytest.mark.unit
+class TestFaultTransportSeeding:
+
+    RULE = FaultRule(latency=Latency(0.1, 0.05), error_rate=0.2, timeout_rate=0.1, reset_rate=0.1)
+
+    @allure.title("The same seed degrades the same requests the same way")
+    def test_same_seed_repeats(self, virtual_clock):
+        first, _ = _transport(self.RULE, seed=7)
+        second, _ = _transport(self.RULE, seed=7)
+
+        start = virtual_clock.time()
+        first_outcomes = _outcomes(first, 200)
+        first_elapsed = virtual_clock.time() - start
+        start = virtual_clock.time()
+        second_outcomes = _outcomes(second, 200)
+
+        assert first_outcomes == second_outcomes
+        assert virtual_clock.time() - start == pytest.approx(first_elapsed)
+        assert first.stats.to_dict() == second.stats.to_dict()
+
+    @allure.title("Different seeds degrade differently")
+    def test_other_seed_differs(self):
+        first, _ = _transport(self.RULE, seed=7)
+        second, _ = _transport(self.RULE, seed=8)
+
+        assert _outcomes(first, 200) != _outcomes(second, 200)
+
+
+@allure.feature("Test infrastructure")
+@allure.story("Fault injection")
+@pytest.mark.unit
+class TestFaultTransportRates:
+
+    @allure.title("Resets, timeouts and 5xx occur at their configured rates")
+    def test_rates(self):
+        transport, calls = _transport(FaultRule(error_rate=0.2, error_statuses=(503,), timeout_rate=0.1,
+                                                reset_rate=0.05), seed=1)
+
+        outcomes = _outcomes(transport)
+
+        assert outcomes.count(503) / REQUESTS == pytest.approx(0.2, abs=0.03)
+        assert outcomes.count("timeout") / REQUESTS == pytest.approx(0.1, abs=0.03)
+        assert outcomes.count("reset") / REQUESTS == pytest.approx(0.05, abs=0.02)
+        # Resets happen after the server got the request; 5xx and timeouts never reach it.
+        assert len(calls) == outcomes.count(200) + outcomes.count("reset")
+        counters = transport.stats.to_dict()["endpoints"]["GET /v1/ui/nodes"]
+        assert (counters["requests"], counters["errors"], counters["timeouts"], counters["resets"]) == (
+            REQUESTS, outcomes.count(503), outcomes.count("timeout"), outcomes.count("reset"))
+
+    @allure.title("A rate of one fails every request and zero rates pass everything through")
+    def test_rate_bounds(self):
+        failing, failing_calls = _transport(FaultRule(error_rate=1.0, error_statuses=(502,)), seed=1)
+        passing, passing_calls = _transport(FaultRule(), seed=1)
+
+        assert set(_outcomes(failing, 100)) == {502}
+        assert failing_calls == []
+        assert set(_outcomes(passing, 100)) == {200}
+        assert len(passing_calls) == 100
+
+    @allure.title("The first matching rule decides and unmatched endpoints pass through")
+    def test_rule_matching(self):
+        transport, _ = _transport(FaultRule("POST *", error_rate=1.0, error_statuses=(504,)),
+                                  FaultRule("GET /v1/ui/nodes", error_rate=1.0, error_statuses=(503,)),
+                                  FaultRule("*", error_rate=1.0, error_statuses=(502,)), seed=1)
+        narrow, _ = _transport(FaultRule("GET /v1/ui/nodes", error_rate=1.0), seed=1)
+
+        assert _outcome(transport, "POST") == 504
+        assert _outcome(transport, "GET") == 503
+        assert _outcome(transport, "GET", "/v1/ui/deployments") == 502
+        assert _outcome(narrow, "GET", "/v1/ui/deployments") == 200
+        assert "GET /v1/ui/deployments" not in narrow.stats.to_dict()["endpoints"]
+
+    @allure.title("Latency and timeouts spend run-clock time, not wall time")
+    def test_waits_use_clock(self, virtual_clock):
+        slow, _ = _transport(FaultRule(latency=Latency(0.25)), seed=1)
+        hanging, _ = _transport(FaultRule(timeout_rate=1.0), seed=1)
+
+        start = virtual_clock.time()
+        _outcomes(slow, 4)
+        assert virtual_clock.time() - start == pytest.approx(1.0)
+
+        start = virtual_clock.time()
+        request = httpx.Request("GET", "http://cp/v1/ui/nodes", extensions={"timeout": {"read": 5.0}})
+        with pytest.raises(httpx.ReadTimeout):
+            hanging.handle_request(request)
+        assert virtual_clock.time() - start == pytest.approx(5.0)
+
+
+@pytest.fixture
+def fake():
+    server = FakeControlPanel()
+    server.start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    """The process-wide transport registry, put back as it was after the test."""
+    for name in ("limits", "http2", "retries", "retry_backoff", "retry_max_delay", "faults", "fault_rng"):
+        monkeypatch.setattr(transport_registry, name, getattr(transport_registry, name))
+    monkeypatch.setattr(fault_transport.fault_stats, "profile", fault_transport.fault_stats.profile)
+    monkeypatch.setitem(fault_transport.PROFILES, "test-outage",
+                        FaultProfile("test-outage", (FaultRule(error_rate=1.0, error_statuses=(503,)),)))
+    transport_registry.close()
+    yield transport_registry
+    transport_registry.close()
+
+
+@allure.feature("Test infrastructure")
+@allure.story("Fault injection")
+@pytest.mark.unit
+class TestFaultProfileConfiguration:
+
+    @allure.title("The fault profile applies to the nodes API after the orphan reaper used it")
+    def test_profile_survives_reaper(self, fake, registry, tmp_path):
+        settings = Settings(cp_ui_url="http://ui", cp_nodes_api_url=fake.url, fault_profile="test-outage",
+                            http_retries=0)
+        # A node of a killed run, so the reaper has work to do.
+        dead = subprocess.Popen([sys.executable, "-c", "pass"])
+        dead.wait()
+        ledger = NodeLedger(tmp_path / "ledger.jsonl")
+        ledger.path.write_text(json.dumps({"ts": 0, "event": "created", "node_id": str(uuid.uuid4()), "api_url": fake.url,
+                                           "host": socket.gethostname(), "pid": dead.pid}) + "\n")
+        with NodesAPIClient(settings) as reaper:
+            reaper.token = reaper.post("/v1/auth/login", json={"username": "admin", "password": "Passw0rd!"}
+                                       ).json()["access_token"]
+            reap_orphans(reaper, ledger)
+        assert ledger.outstanding() == []
+
+        registry.configure(settings)
+
+        with NodesAPIClient(settings) as client:
+            response = client.get("/v1/ui/nodes")
+        assert response.status_code == 503
+        assert "test-outage" in response.text
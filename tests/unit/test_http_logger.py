@@ -0,0 +1,67 @@
+import json
+import logging
+import pytest
+import allure
+from utils import http_logger
+from utils.http_logger import HTTPTextFormatter, _DeferredFormatQueueHandler, merge_jsonl_logs
+
+
+def _write_jsonl(path, *timestamps):
+    path.write_text("".join(json.dumps({"ts": ts, "worker": path.stem}) + "\n" for ts in timestamps))
+    return path
+
+
+def _record(decode_json):
+    record = logging.LogRecord("http_logger", logging.INFO, __file__, 0, "HTTP GET /", (), None)
+    record.http = {
+        "stage": "GET /", "context": "test", "url": "http://cp/v1/ui/nodes", "method": "GET", "status": 200,
+        "elapsed_text": "", "request_headers": {}, "request_body": b"", "response_headers": {},
+        "response_body": b'{"b": 1, "a": 2}', "response_json": decode_json, "include_response_body": True,
+    }
+    return record
+
+
+@allure.feature("Test infrastructure")
+@allure.story("HTTP log")
+@pytest.mark.unit
+class TestHTTPLogger:
+
+    @allure.title("Worker logs merge into one time-ordered file")
+    def test_merge_orders_by_timestamp(self, tmp_path):
+        first = _write_jsonl(tmp_path / "http-gw0.jsonl", 1.0, 3.0, 5.0)
+        second = _write_jsonl(tmp_path / "http-gw1.jsonl", 2.0, 4.0)
+
+        merged = merge_jsonl_logs([first, second, tmp_path / "http-gw2.jsonl"], tmp_path / "http.jsonl")
+
+        entries = [json.loads(line) for line in merged.read_text().splitlines()]
+        assert [entry["ts"] for entry in entries] == [1.0, 2.0, 3.0, 4.0, 5.0]
+        assert [entry["worker"] for entry in entries[:2]] == ["http-gw0", "http-gw1"]
+
+    @allure.title("At INFO the response is never decoded and the record holds no live reference")
+    def test_prepare_drops_decoder(self):
+        record = _DeferredFormatQueueHandler(None).prepare(_record(lambda: pytest.fail("decoded at INFO")))
+
+        assert "response_json" not in record.http
+        assert '{"b": 1, "a": 2}' in HTTPTextFormatter().format(record)
+
+    @allure.title("At DEBUG the body is parsed before the record is queued")
+    def test_prepare_parses_at_debug(self, request):
+        http_logger.log.setLevel(logging.DEBUG)
+        request.addfinalizer(lambda: http_logger.log.setLevel(logging.INFO))
+        calls = []
+
+        record = _DeferredFormatQueueHandler(None).prepare(_record(lambda: calls.append(1) or {"b": 1, "a": 2}))
+
+        assert calls == [1] and record.http["response_document"] == {"b": 1, "a": 2}
+        assert '"a": 2,\n' in HTTPTextFormatter(prefix="").format(record), "Body should be pretty-printed"
+
+    @allure.title("Blank, torn and timestamp-less lines are left out of the merge")
+    def test_merge_skips_broken_lines(self, tmp_path):
+        worker = _write_jsonl(tmp_path / "http-gw0.jsonl", 1.0, 3.0)
+        with open(worker, "a") as f:
+            f.write('\n{"worker": "http-gw0"}\n{"ts": 4.0, "wor')
+        other = _write_jsonl(tmp_path / "http-gw1.jsonl", 2.0)
+
+        merged = merge_jsonl_logs([worker, other], tmp_path / "http.jsonl")
+
+        assert [json.loads(line)["ts"] for line in merged.read_text().splitlines()] == [1.0, 2.0, 3.0]
@@ -0,0 +1,63 @@
+import pytest
+import allure
+from utils.http_metrics import Histogram, HTTPMetrics
+
+
+@allure.feature("Test infrastructure")
+@allure.story("HTTP latency")
+@pytest.mark.unit
+class TestHistogram:
+
+    @allure.title("Small values are recorded exactly")
+    def test_small_values_are_exact(self):
+        histogram = Histogram()
+        for value in range(1, 101):
+            histogram.record(value)
+
+        assert histogram.percentile(50) == 50
+        assert histogram.percentile(99) == 99
+        assert histogram.summary()["max"] == 100
+
+    @allure.title("Large values stay within 1% of their bucket")
+    @pytest.mark.parametrize("value", [1_000, 123_456, 9_999_999, 2 ** 40 + 12345])
+    def test_bucket_precision(self, value):
+        lower = Histogram.bucket(value)
+
+        assert lower <= value <= Histogram.bucket_top(lower)
+        assert Histogram.bucket_top(lower) - lower < value / 100
+
+    @allure.title("Merged histograms give the same percentiles as one histogram")
+    def test_merge_is_exact(self):
+        whole, first, second = Histogram(), Histogram(), Histogram()
+        for value in range(0, 100_000, 7):
+            whole.record(value)
+            (first if value % 2 else second).record(value)
+
+        first.merge(Histogram.from_dict(second.to_dict()))
+
+        assert first.counts == whole.counts
+        assert first.summary() == whole.summary()
+
+    @allure.title("Empty histogram reports zeros")
+    def test_empty(self):
+        assert Histogram().summary() == {"p50": 0, "p90": 0, "p95": 0, "p99": 0, "max": 0}
+
+
+@allure.feature("Test infrastructure")
+@allure.story("HTTP latency")
+@pytest.mark.unit
+class TestHTTPMetrics:
+
+    @allure.title("Worker metrics merge per templated endpoint")
+    def test_merge_workers(self):
+        controller, worker = HTTPMetrics(), HTTPMetrics()
+        controller.record("GET", "/v1/ui/nodes", 0.010, 0, 100)
+        worker.record("GET", "/v1/ui/nodes", 0.030, 0, 300)
+
+        controller.merge(worker.to_dict())
+        report = controller.report()
+
+        assert list(report) == ["GET /v1/ui/nodes"]
+        assert report["GET /v1/ui/nodes"]["count"] == 2
+        assert report["GET /v1/ui/nodes"]["bytes_in"]["total"] == 400
+        assert report["GET /v1/ui/nodes"]["latency_ms"]["max"] == pytest.approx(30.0, rel=0.01)
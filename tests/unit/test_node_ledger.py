@@ -0,0 +1,99 @@
+import json
+import socket
+import subprocess
+import sys
+import threading
+import pytest
+import allure
+from filelock import FileLock
+from clients.node_ledger import NodeLedger
+
+API = "http://cp"
+
+
+@pytest.fixture
+def ledger(tmp_path):
+    return NodeLedger(tmp_path / "ledger.jsonl")
+
+
+def _dead_pid() -> int:
+    process = subprocess.Popen([sys.executable, "-c", "pass"])
+    process.wait()
+    return process.pid
+
+
+@allure.feature("Test infrastructure")
+@allure.story("Node ledger")
+@pytest.mark.unit
+class TestNodeLedger:
+
+    @allure.title("Replay returns nodes created but never deleted")
+    def test_replay(self, ledger):
+        ledger.record_created("AAA", API)
+        ledger.record_created("bbb", API)
+        ledger.record_deleted("aaa", API)
+
+        outstanding = ledger.outstanding(include_live_runs=True)
+
+        assert [entry["node_id"] for entry in outstanding] == ["bbb"]
+
+    @allure.title("Nodes of a live run are left alone")
+    def test_live_runs_are_skipped(self, ledger):
+        ledger.record_created("mine", API)
+        with open(ledger.path, "a") as f:
+            f.write(json.dumps({"ts": 1.0, "event": "created", "node_id": "orphan", "api_url": API,
+                                "host": socket.gethostname(),
+                                "pid": _dead_pid()}) + "\n")
+
+        assert [entry["node_id"] for entry in ledger.outstanding()] == ["orphan"]
+
+    @allure.title("Outstanding nodes can be limited to one environment")
+    def test_filter_by_api_url(self, ledger):
+        ledger.record_created("one", API)
+        ledger.record_created("two", "http://other")
+
+        assert [entry["node_id"] for entry in ledger.outstanding(API, include_live_runs=True)] == ["one"]
+
+    @allure.title("Torn last line of a killed run is skipped")
+    def test_torn_line(self, ledger):
+        ledger.record_created("whole", API)
+        with open(ledger.path, "a") as f:
+            f.write('{"ts": 2.0, "event": "crea')
+
+        assert [entry["node_id"] for entry in ledger.outstanding(include_live_runs=True)] == ["whole"]
+
+    @allure.title("Compaction keeps only outstanding nodes in creation order")
+    def test_compact(self, ledger):
+        for node_id in ("a", "b", "c", "d"):
+            ledger.record_created(node_id, API)
+        ledger.record_deleted("b", API)
+        ledger.record_deleted("d", API)
+
+        ledger.compact()
+        lines = ledger.path.read_text().splitlines()
+
+        assert [json.loads(line)["node_id"] for line in lines] == ["a", "c"]
+        ledger.record_deleted("a", API)
+        assert [entry["node_id"] for entry in ledger.outstanding(include_live_runs=True)] == ["c"]
+
+    @allure.title("Ledger without a path records nothing")
+    def test_disabled(self):
+        ledger = NodeLedger()
+        ledger.record_created("a", API)
+        ledger.compact()
+
+        assert ledger.outstanding(include_live_runs=True) == []
+
+    @allure.title("Appends wait for a compaction in progress")
+    def test_append_waits_for_compaction(self, ledger):
+        ledger.record_created("a", API)
+        appended = threading.Event()
+
+        with FileLock(str(ledger.path) + ".lock"):
+            writer = threading.Thread(target=lambda: (ledger.record_created("b", API), appended.set()))
+            writer.start()
+            assert not appended.wait(0.2), "The append should wait for the lock"
+        writer.join(5)
+
+        assert appended.is_set()
+        assert [entry["node_id"] for entry in ledger.outstanding(include_live_runs=True)] == ["a", "b"]
@@ -0,0 +1,101 @@
+import time
+import pytest
+import allure
+from clients.node_registry import NodeRegistry, CREATING, PENDING
+
+PRESET = "preset"
+API = "http://cp"
+REMOTE_OWNER = "gw1@other-host:1"
+
+
+@pytest.fixture
+def registry(tmp_path):
+    registry = NodeRegistry(tmp_path / "registry.sqlite", heartbeat_interval=0.05, heartbeat_timeout=30)
+    yield registry
+    registry.close()
+
+
+def _remote_claim(registry: NodeRegistry, claim_id: str, heartbeat_at: float):
+    """A claim of a worker on another host, last heard of at `heartbeat_at`."""
+    with registry.transaction() as conn:
+        conn.execute("INSERT INTO nodes VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                     (claim_id, PRESET, API, CREATING, REMOTE_OWNER, heartbeat_at, heartbeat_at, heartbeat_at))
+
+
+def _claim_ids(registry: NodeRegistry):
+    return [row["node_id"] for row in registry.nodes(PRESET, (CREATING,))]
+
+
+@allure.feature("Test infrastructure")
+@allure.story("Node registry")
+@pytest.mark.unit
+class TestNodeRegistryHeartbeat:
+
+    @allure.title("Claims of another host expire once their heartbeat is stale")
+    def test_remote_claims_expire(self, registry):
+        now = time.time()
+        _remote_claim(registry, "claim-fresh", now)
+        _remote_claim(registry, "claim-stale", now - 31)
+
+        registry.drop_abandoned_claims()
+
+        assert _claim_ids(registry) == ["claim-fresh"]
+
+    @allure.title("The heartbeat thread keeps this process's claims and leases alive")
+    def test_own_rows_stay_alive(self, registry):
+        claim = registry.claim(PRESET, API)
+        registry.add("node-1", PRESET, API)
+        registry.add_shared_lease("node-1")
+        with registry.transaction() as conn:
+            conn.execute("UPDATE nodes SET heartbeat_at = 0")
+            conn.execute("UPDATE shared_leases SET heartbeat_at = 0")
+
+        deadline = time.monotonic() + 5
+        while registry.shared_lease_count("node-1") == 0 and time.monotonic() < deadline:
+            time.sleep(0.05)
+        registry.drop_abandoned_claims()
+
+        assert registry.shared_lease_count("node-1") == 1
+        assert _claim_ids(registry) == [claim]
+
+    @allure.title("A closed registry stops beating and its leases expire")
+    def test_closed_registry_expires(self, tmp_path):
+        path = tmp_path / "registry.sqlite"
+        first = NodeRegistry(path, heartbeat_interval=0.05)
+        first.add("node-1", PRESET, API)
+        first.add_shared_lease("node-1")
+        first.close()
+        second = NodeRegistry(path, heartbeat_timeout=1)
+        try:
+            with second.transaction() as conn:
+                conn.execute("UPDATE shared_leases SET owner = ?", (REMOTE_OWNER,))
+            assert second.shared_lease_count("node-1") == 1
+
+            time.sleep(1.1)
+
+            assert second.shared_lease_count("node-1") == 0
+        finally:
+            second.close()
+
+
+@allure.feature("Test infrastructure")
+@allure.story("Node registry")
+@pytest.mark.unit
+class TestNodeRegistryClaims:
+
+    @allure.title("Settling a claim registers the created node in its place")
+    def test_settle(self, registry):
+        claim = registry.claim(PRESET, API)
+
+        assert registry.settle_claim(claim, "node-1")
+
+        assert [(row["node_id"], row["state"]) for row in registry.nodes(PRESET, (CREATING, PENDING))] == [
+            ("node-1", PENDING)]
+
+    @allure.title("Settling a claim that was dropped meanwhile reports it instead of failing")
+    def test_settle_dropped_claim(self, registry):
+        claim = registry.claim(PRESET, API)
+        registry.drop_claim(claim)
+
+        assert not registry.settle_claim(claim, "node-1")
+        assert registry.nodes(PRESET) == []
@@ -0,0 +1,62 @@
+import pytest
+import allure
+from utils import node_timeline as timeline_module
+from utils.node_timeline import NodeTimeline
+
+
+def _worker(monkeypatch, worker_id, observations):
+    """A worker's to_dict() after it saw `observations` of (node_id, state, monotonic time)."""
+    monkeypatch.setattr(timeline_module, "WORKER_ID", worker_id)
+    timeline = NodeTimeline()
+    for node_id, state, at in observations:
+        timeline.record(node_id, state, at)
+    return timeline.to_dict()
+
+
+def _tracks(events):
+    names = {event["tid"]: event["args"]["name"] for event in events if event["name"] == "thread_name"}
+    tracks = {}
+    for event in events:
+        if event["ph"] == "X":
+            tracks.setdefault(names[event["tid"]], []).append(event)
+    return tracks
+
+
+@allure.feature("Test infrastructure")
+@allure.story("Node timeline")
+@pytest.mark.unit
+class TestNodeTimeline:
+
+    @allure.title("A pool node polled by several workers gets one track")
+    def test_one_track_per_deployment(self, monkeypatch):
+        controller = NodeTimeline()
+        controller.merge(_worker(monkeypatch, "gw0", [("NODE-1", "pending", 10.0), ("node-1", "running", 40.0)]))
+        controller.merge(_worker(monkeypatch, "gw1", [("node-1", "pending", 20.0), ("node-1", "running", 45.0),
+                                                      ("node-2", "pending", 30.0)]))
+
+        tracks = _tracks(controller.trace_events())
+
+        assert sorted(tracks) == ["node-1", "node-2"]
+        assert [event["name"] for event in tracks["node-1"]] == ["pending", "running"]
+        pending, running = tracks["node-1"]
+        assert pending["dur"] == 30_000_000, "pending lasts until any worker first saw running"
+        assert running["dur"] == 5_000_000
+        assert pending["args"]["observed_by"].startswith("gw0")
+
+    @allure.title("Repeated observations only extend the current span")
+    def test_repeated_state(self):
+        timeline = NodeTimeline()
+        for at in (1.0, 2.0, 3.0):
+            timeline.record("node", "pending", at)
+
+        assert [span[:3] for span in timeline.spans["node"]] == [["pending", 1.0, 3.0]]
+
+    @allure.title("Node bodies, lists and create results are recorded")
+    def test_record_body(self):
+        timeline = NodeTimeline()
+        timeline.record_body({"deployment_id": "a", "state": "pending"})
+        timeline.record_body({"results": [{"id": "b", "status": "running"}]})
+        timeline.record_body(["not", "a", "node"])
+
+        assert sorted(timeline.spans) == ["a", "b"]
+        assert timeline.observed
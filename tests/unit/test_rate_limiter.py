@@ -0,0 +1,78 @@
+import asyncio
+import pytest
+import allure
+from clients import rate_limiter
+from clients.rate_limiter import FileTokenBucket, _worker_share
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def frozen_time(monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(rate_limiter.time, "time", clock.time)
+    return clock
+
+
+@allure.feature("Test infrastructure")
+@allure.story("HTTP rate limits")
+@pytest.mark.unit
+class TestFileTokenBucket:
+
+    @allure.title("Burst is free, then reservations queue up at the rate")
+    def test_burst_then_rate(self, tmp_path, frozen_time):
+        bucket = FileTokenBucket(rate=2.0, burst=2, path=tmp_path / "rate.json")
+
+        waits = [bucket.reserve() for _ in range(4)]
+
+        assert waits == [0.0, 0.0, 0.5, 1.0]
+
+    @allure.title("Tokens refill with time up to the burst")
+    def test_refill(self, tmp_path, frozen_time):
+        bucket = FileTokenBucket(rate=1.0, burst=2, path=tmp_path / "rate.json")
+        bucket.reserve(), bucket.reserve()
+
+        frozen_time.now += 10
+
+        assert [bucket.reserve() for _ in range(3)] == [0.0, 0.0, 1.0]
+
+    @allure.title("Workers share one bucket through the state file")
+    def test_shared_between_workers(self, tmp_path, frozen_time):
+        first = FileTokenBucket(rate=1.0, burst=2, path=tmp_path / "rate.json")
+        second = FileTokenBucket(rate=1.0, burst=2, path=tmp_path / "rate.json")
+
+        assert [first.reserve(), second.reserve(), first.reserve(), second.reserve()] == [0.0, 0.0, 1.0, 2.0]
+
+    @allure.title("Async reservations share the same state")
+    def test_async_reserve(self, tmp_path, frozen_time):
+        bucket = FileTokenBucket(rate=1.0, burst=1, path=tmp_path / "rate.json")
+
+        async def reserve_twice():
+            return [await bucket.reserve_async(), await bucket.reserve_async()]
+
+        assert asyncio.run(reserve_twice()) == [0.0, 1.0]
+
+
+@allure.feature("Test infrastructure")
+@allure.story("HTTP rate limits")
+@pytest.mark.unit
+class TestInFlightShare:
+
+    @allure.title("Worker shares add up to the run-wide limit")
+    @pytest.mark.parametrize("limit, workers", [(8, 3), (4, 4), (10, 1)])
+    def test_shares_add_up(self, limit, workers):
+        shares = [_worker_share(limit, workers, index, "nodes") for index in range(workers)]
+
+        assert sum(shares) == limit
+        assert max(shares) - min(shares) <= 1
+
+    @allure.title("Limit below the number of workers is refused")
+    def test_limit_below_workers(self):
+        with pytest.raises(ValueError, match="max_in_flight_auth=2"):
+            _worker_share(2, 4, 0, "auth")
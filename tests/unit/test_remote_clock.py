@@ -0,0 +1,67 @@
+import json
+import pytest
+import allure
+from control_panel.fake_server import FakeControlPanel, FakeRequest, RemoteClock
+from utils.clock import VIRTUAL_TIME_HEADER, VirtualClock
+
+START = 1_000_000.0
+
+
+@pytest.fixture
+def fake():
+    server = FakeControlPanel(users=[("user", "Passw0rd!")], clock=VirtualClock(start=START))
+    server.start()
+    yield server
+    server.stop()
+
+
+def _request(fake, method, path, at, token=None, body=None):
+    headers = {"Content-Type": "application/json", VIRTUAL_TIME_HEADER: repr(at)}
+    if token:
+        headers["Authorization"] = f"Bearer {token}"
+    request = FakeRequest(method, path, headers, json.dumps(body).encode() if body else b"", "127.0.0.1")
+    status, body, _ = fake.dispatch(request)
+    return status, body
+
+
+@allure.feature("Test infrastructure")
+@allure.story("Virtual clock")
+@pytest.mark.unit
+class TestRemoteClock:
+
+    @allure.title("advance() moves only the calling worker's time")
+    def test_advance_is_per_worker(self, fake):
+        first, second = RemoteClock(fake.url), RemoteClock(fake.url)
+
+        first.advance(30 * 24 * 3600)
+
+        assert first.time() == START + 30 * 24 * 3600
+        assert second.time() == START
+        assert fake.clock.time() == START
+
+    @allure.title("Sleeps of every worker move the server clock")
+    def test_sleeps_are_shared(self, fake):
+        first, second = RemoteClock(fake.url), RemoteClock(fake.url)
+        first.advance(100)
+
+        first.sleep(5)
+        second.sleep(1)
+
+        assert fake.clock.time() == START + 6
+        assert second.time() == START + 6
+        # The earlier advance() stays on top of the shared time.
+        assert first.time() == START + 105
+
+    @allure.title("The fake judges token expiry by the sender's time")
+    def test_token_expiry_follows_sender(self, fake):
+        status, body = _request(fake, "POST", "/v1/auth/login", START,
+                                body={"username": "user", "password": "Passw0rd!"})
+        assert status == 200
+        token = body["access_token"]
+
+        assert _request(fake, "GET", "/v1/auth/profile", START + 60, token)[0] == 200
+        assert _request(fake, "GET", "/v1/auth/profile", START + 30 * 24 * 3600, token)[0] == 401
+        # Without the header the server clock, which did not move, decides.
+        assert fake.dispatch(FakeRequest("GET", "/v1/auth/profile", {"Authorization": f"Bearer {token}",
+                                                                     "Content-Type": "application/json"},
+                                         b"", "127.0.0.1"))[0] == 200
@@ -0,0 +1,116 @@
+import asyncio
+from types import SimpleNamespace
+import httpx
+import pytest
+import allure
+from clients import retry_transport
+from clients.retry_transport import RetryStats, RetryTransport
+
+
+def _statuses(*statuses):
+    """Inner transport answering with `statuses` in turn; the last one repeats."""
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(statuses[min(len(calls), len(statuses)) - 1])
+
+    return httpx.MockTransport(handler), calls
+
+
+def _stats(budget, state_dir=None):
+    stats = RetryStats()
+    stats.configure(SimpleNamespace(http_retry_budget=budget), state_dir=state_dir)
+    return stats
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(retry_transport.time, "sleep", lambda seconds: None)
+    monkeypatch.setattr(retry_transport.random, "uniform", lambda low, high: 0.0)
+
+
+@allure.feature("Test infrastructure")
+@allure.story("HTTP retries")
+@pytest.mark.unit
+class TestRetryTransport:
+
+    @allure.title("Idempotent request recovers from a transient 503")
+    def test_get_recovers(self):
+        inner, calls = _statuses(503, 200)
+        stats = _stats(budget=10)
+        transport = RetryTransport(inner, max_retries=2, stats=stats)
+
+        response = transport.handle_request(httpx.Request("GET", "http://cp/v1/ui/nodes"))
+
+        assert response.status_code == 200
+        assert len(calls) == 2
+        assert stats.used == 1
+        assert list(stats.endpoints.values()) == [{"retries": 1, "recovered": 1, "failed": 0}]
+
+    @allure.title("POST is not resent after it may have reached the server")
+    def test_post_is_not_retried(self):
+        inner, calls = _statuses(503, 200)
+        transport = RetryTransport(inner, stats=_stats(budget=10))
+
+        response = transport.handle_request(httpx.Request("POST", "http://cp/v1/ui/nodes"))
+
+        assert response.status_code == 503
+        assert len(calls) == 1
+
+    @allure.title("Retries stop at max_retries")
+    def test_max_retries(self):
+        inner, calls = _statuses(502)
+        stats = _stats(budget=10)
+
+        response = RetryTransport(inner, max_retries=2, stats=stats).handle_request(
+            httpx.Request("GET", "http://cp/v1/ui/nodes"))
+
+        assert response.status_code == 502
+        assert len(calls) == 3
+        assert list(stats.endpoints.values()) == [{"retries": 2, "recovered": 0, "failed": 1}]
+
+    @allure.title("Retry-After is honoured up to max_delay")
+    def test_retry_after(self):
+        transport = RetryTransport(None, max_delay=5.0)
+
+        assert transport._delay(0, httpx.Response(503, headers={"Retry-After": "2"})) == 2.0
+        assert transport._delay(0, httpx.Response(503, headers={"Retry-After": "60"})) == 5.0
+
+    @allure.title("Workers draw from one shared budget")
+    def test_budget_is_shared_between_workers(self, tmp_path):
+        first, second = _stats(budget=3, state_dir=tmp_path), _stats(budget=3, state_dir=tmp_path)
+
+        granted = [first.try_acquire(), second.try_acquire(), first.try_acquire(), second.try_acquire()]
+
+        assert granted == [True, True, True, False]
+        assert second.exhausted == 1
+        merged = RetryStats.merge(RetryStats.merge({}, first.to_dict()), second.to_dict())
+        assert (merged["budget"], merged["used"], merged["exhausted"]) == (3, 3, 1)
+
+    @allure.title("Exhausted budget returns the failure instead of retrying")
+    def test_exhausted_budget(self):
+        inner, calls = _statuses(503, 200)
+        stats = _stats(budget=0)
+
+        response = RetryTransport(inner, stats=stats).handle_request(httpx.Request("GET", "http://cp/v1/ui/nodes"))
+
+        assert response.status_code == 503
+        assert len(calls) == 1
+        assert stats.exhausted == 1
+
+    @allure.title("Async requests retry through the shared budget")
+    def test_async_recovers(self, tmp_path, monkeypatch):
+        async def no_sleep(seconds):
+            pass
+
+        monkeypatch.setattr(retry_transport.asyncio, "sleep", no_sleep)
+        inner, calls = _statuses(504, 200)
+        stats = _stats(budget=10, state_dir=tmp_path)
+        transport = RetryTransport(inner, stats=stats)
+
+        response = asyncio.run(transport.handle_async_request(httpx.Request("GET", "http://cp/v1/ui/nodes")))
+
+        assert response.status_code == 200
+        assert len(calls) == 2
+        assert stats.used == 1
@@ -0,0 +1,73 @@
+import itertools
+import json
+from types import SimpleNamespace
+import pytest
+import allure
+from clients.token_broker import TokenBroker
+
+
+@pytest.fixture
+def brokers(tmp_path, monkeypatch):
+    """Two brokers sharing one cache file, as two xdist workers do. Renewals issue numbered tokens."""
+    issued = itertools.count(1)
+
+    def renew(self, username, password, cached, force=False):
+        if cached and cached.is_fresh and not force:
+            return cached
+        return self._issue(f"access-{next(issued)}", "refresh", 3600)
+
+    monkeypatch.setattr(TokenBroker, "_renew", renew)
+    settings = SimpleNamespace(cp_nodes_api_url="http://cp", token_refresh_margin=60)
+    cache = tmp_path / "tokens.json"
+    return TokenBroker(settings, cache_path=cache), TokenBroker(settings, cache_path=cache)
+
+
+@allure.feature("Test infrastructure")
+@allure.story("Token broker")
+@pytest.mark.unit
+class TestTokenBroker:
+
+    @allure.title("Workers share one login through the cache file")
+    def test_tokens_are_shared(self, brokers):
+        first, second = brokers
+
+        assert first.get_tokens("user", "pass").access_token == "access-1"
+        assert second.get_tokens("user", "pass").access_token == "access-1"
+
+    @allure.title("Invalidation in one worker is seen by the others")
+    def test_invalidate_is_seen_by_other_workers(self, brokers):
+        first, second = brokers
+        first.get_tokens("user", "pass")
+        second.get_tokens("user", "pass")
+
+        first.invalidate("user", "pass")
+
+        assert first.get_tokens("user", "pass").access_token == "access-2"
+
+    @allure.title("Rejected token is renewed once and the replacement is shared")
+    def test_renew_rejected_token(self, brokers):
+        first, second = brokers
+        first.get_tokens("user", "pass")
+        second.get_tokens("user", "pass")
+
+        assert first.renew("user", "pass", rejected="access-1").access_token == "access-2"
+        # The second worker was rejected with the same token; it reuses the replacement.
+        assert second.renew("user", "pass", rejected="access-1").access_token == "access-2"
+
+    @allure.title("The cache file holds nothing derived from the password")
+    def test_cache_keeps_no_password(self, brokers, tmp_path):
+        first, _ = brokers
+        first.get_tokens("user", "s3cret-pass")
+
+        cache = tmp_path / "tokens.json"
+        assert list(json.loads(cache.read_text())) == ["user@http://cp"]
+        assert "s3cret" not in cache.read_text()
+        assert cache.stat().st_mode & 0o077 == 0, "Only the current user may read the tokens"
+
+    @allure.title("Another password for a cached user logs in instead of reusing the tokens")
+    def test_other_password_logs_in(self, brokers):
+        first, _ = brokers
+        first.get_tokens("user", "pass")
+
+        assert first.get_tokens("user", "other").access_token == "access-2"
+        assert first.get_tokens("user", "other").access_token == "access-2"
@@ -0,0 +1,162 @@
+import asyncio
+import warnings
+import pytest
+import allure
+from utils import wait_helper
+from utils.clock import clock, VirtualClock
+from utils.wait_helper import (AsyncConditionError, Condition, WaitHelper, WaitReport, all_of, any_of,
+                               not_)
+
+
+@pytest.fixture
+def virtual_clock():
+    virtual = VirtualClock()
+    previous = clock.use(virtual)
+    yield virtual
+    clock.use(previous)
+
+
+@pytest.fixture(autouse=True)
+def report(monkeypatch):
+    """A fresh report per test, and no Allure output outside a real test run."""
+    fresh = WaitReport()
+    monkeypatch.setattr(wait_helper, "wait_report", fresh)
+    monkeypatch.setattr(wait_helper.allure, "attach", lambda *args, **kwargs: None)
+    return fresh
+
+
+def _counter(succeed_on: int):
+    calls = []
+
+    def check():
+        calls.append(None)
+        return len(calls) >= succeed_on
+
+    return check, calls
+
+
+@allure.feature("Test infrastructure")
+@allure.story("Waits")
+@pytest.mark.unit
+class TestConditions:
+
+    @allure.title("Conditions combine with &, | and ~")
+    def test_operators(self):
+        yes, no = Condition(lambda: True, "yes"), Condition(lambda: False, "no")
+
+        assert (yes & yes).evaluate() and not (yes & no).evaluate()
+        assert (no | yes).evaluate() and not (no | no).evaluate()
+        assert (~no).evaluate() and not not_(yes).evaluate()
+        assert (yes & ~no).description == "(yes) and (not (no))"
+
+    @allure.title("all_of and any_of short-circuit in order")
+    def test_short_circuit(self):
+        seen = []
+
+        def check(name, value):
+            return Condition(lambda: seen.append(name) or value, name)
+
+        assert not all_of(check("a", False), check("b", True)).evaluate()
+        assert any_of(check("c", True), check("d", False)).evaluate()
+        assert seen == ["a", "c"]
+
+    @allure.title("Async conditions evaluate through evaluate_async")
+    def test_async_composite(self):
+        async def ready():
+            return True
+
+        condition = all_of(ready, lambda: True) | Condition(lambda: False)
+
+        assert asyncio.run(condition.evaluate_async())
+
+    @allure.title("Sync evaluation of a coroutine check fails without a never-awaited warning")
+    def test_sync_evaluate_of_coroutine(self):
+        async def ready():
+            return True
+
+        with warnings.catch_warnings():
+            warnings.simplefilter("error", RuntimeWarning)
+            with pytest.raises(AsyncConditionError):
+                Condition(ready, "ready").evaluate()
+
+    @allure.title("Other awaitables are rejected but left untouched")
+    def test_sync_evaluate_of_future(self):
+        loop = asyncio.new_event_loop()
+        try:
+            future = loop.create_future()
+            with pytest.raises(AsyncConditionError):
+                Condition(lambda: future, "future").evaluate()
+            assert not future.done()
+        finally:
+            loop.close()
+
+
+@allure.feature("Test infrastructure")
+@allure.story("Waits")
+@pytest.mark.unit
+class TestWaiters:
+
+    @allure.title("Wait result carries polls and elapsed time")
+    def test_success(self, virtual_clock, report):
+        check, calls = _counter(succeed_on=3)
+
+        result = WaitHelper.wait_for_condition(check, timeout=60, poll_interval=5, description="three polls")
+
+        assert result and result.polls == 3 and result.elapsed == 10
+        assert report.to_dict()["three polls"]["waits"] == 1
+
+    @allure.title("Timeout returns a falsy result and is reported")
+    def test_timeout(self, virtual_clock, report):
+        result = WaitHelper.wait_for_condition(lambda: False, timeout=12, poll_interval=5, description="never")
+
+        assert not result
+        assert result.elapsed == 12
+        assert report.to_dict()["never"]["timeouts"] == 1
+
+    @allure.title("Poll interval backs off up to max_interval")
+    def test_backoff(self, virtual_clock):
+        check, calls = _counter(succeed_on=5)
+
+        result = WaitHelper.wait_for_condition(check, timeout=600, poll_interval=1, backoff=2, max_interval=4)
+
+        assert result.elapsed == 1 + 2 + 4 + 4
+
+    @allure.title("Async state transition wait follows a coroutine state source")
+    def test_state_transition_async(self, virtual_clock):
+        states = iter(["pending", "pending", "running"])
+
+        async def state():
+            return next(states)
+
+        result = asyncio.run(WaitHelper.wait_for_state_transition_async(state, "running", timeout=60,
+                                                                        poll_interval=5))
+
+        assert result and result.polls == 3
+
+    @allure.title("Async state transition wait times out with the last state")
+    def test_state_transition_async_timeout(self, virtual_clock):
+        result = asyncio.run(WaitHelper.wait_for_state_transition_async(lambda: "pending", "running",
+                                                                        timeout=10, poll_interval=5))
+
+        assert not result and result.polls == 3
+
+
+@allure.feature("Test infrastructure")
+@allure.story("Waits")
+@pytest.mark.unit
+class TestWaitReport:
+
+    @allure.title("Worker reports merge per description")
+    def test_merge(self):
+        controller, worker = WaitReport(), WaitReport()
+        controller.record("node running", 10.0, 3, True)
+        worker.record("node running", 30.0, 7, False)
+        worker.record("token expired", 5.0, 1, True)
+
+        controller.merge(worker.to_dict())
+
+        assert controller.to_dict()["node running"] == {"waits": 2, "timeouts": 1, "polls": 10,
+                                                        "seconds": 40.0, "max_seconds": 30.0}
+        lines = controller.format().splitlines()
+        assert lines[0] == "45.0s spent waiting in 3 waits"
+        assert lines[1].endswith("node running")
@@ -0,0 +1,23 @@
+"""
+Running coroutines from synchronous code.
+
+Bulk node operations fan out on an event loop but are called from sync fixtures, hooks and
+clients. asyncio.run() refuses to start a loop in a thread that already runs one (an async
+test calling a sync helper), so run_sync() falls back to a loop in a helper thread there.
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Coroutine, TypeVar
+
+T = TypeVar("T")
+
+
+def run_sync(coroutine: Coroutine[Any, Any, T]) -> T:
+    """Run `coroutine` to completion and return its result, whether or not this thread runs a loop."""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coroutine)
+    # The caller is synchronous, so blocking the running loop until the result is in is expected.
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(asyncio.run, coroutine).result()
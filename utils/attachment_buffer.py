@@ -0,0 +1,138 @@
+import threading
+import allure
+from collections import deque
+from typing import Callable, Deque, Tuple, Union
+
+from config.settings import Settings
+from utils.test_context import current_context
+
+
+class AttachmentMode:
+    EAGER = "eager"        # attach every request/response as it happens (default)
+    DEFERRED = "deferred"  # keep attachments in memory, write them only for failed tests
+    LEAN = "lean"          # no HTTP attachments at all, for perf runs
+
+
+class Oversize:
+    TRUNCATE = "truncate"  # keep the head and tail of a large body
+    SAMPLE = "sample"      # keep evenly spaced slices across the whole body
+
+
+Body = Union[str, bytes, Callable[[], str]]
+# Number of slices a sampled body is cut into.
+SAMPLE_SLICES = 8
+
+
+class AttachmentBuffer:
+    """
+    Per-test holder for HTTP attachments.
+
+    Bodies may be passed as bytes or as a callable so that nothing is serialised unless the
+    mode keeps it: eager renders at once, deferred cuts the body down to `max_body_bytes`
+    when it is buffered (so the budget counts what would be written), lean drops it.
+    """
+
+    def __init__(self, mode: str = AttachmentMode.EAGER, budget_bytes: int = 1_048_576,
+                 max_body_bytes: int = 65_536, oversize: str = Oversize.TRUNCATE):
+        self.mode = mode
+        self.budget_bytes = budget_bytes
+        self.max_body_bytes = max_body_bytes
+        self.oversize = oversize
+        self._entries: Deque[Tuple[Union[str, bytes], str, object]] = deque()
+        self._buffered_bytes = 0
+        self._dropped = 0
+        self._lock = threading.Lock()
+
+    def configure(self, settings: Settings):
+        if settings.allure_http_attachments not in (AttachmentMode.EAGER, AttachmentMode.DEFERRED, AttachmentMode.LEAN):
+            raise ValueError(f"Unsupported allure_http_attachments mode: {settings.allure_http_attachments}")
+        if settings.allure_attachment_oversize not in (Oversize.TRUNCATE, Oversize.SAMPLE):
+            raise ValueError(f"Unsupported allure_attachment_oversize: {settings.allure_attachment_oversize}")
+        self.mode = settings.allure_http_attachments
+        self.budget_bytes = settings.allure_attachment_budget
+        self.max_body_bytes = settings.allure_attachment_max_body
+        self.oversize = settings.allure_attachment_oversize
+
+    def attach(self, body: Body, name: str, attachment_type):
+        """Attach now, buffer, or drop depending on the mode."""
+        # Outside a test (session hooks, the orphan reaper) allure has nothing to attach to.
+        if self.mode == AttachmentMode.LEAN or current_context() is None:
+            return
+        if self.mode == AttachmentMode.EAGER:
+            allure.attach(self._render(body), name, attachment_type)
+            return
+        body = self._shorten(body() if callable(body) else body)
+        with self._lock:
+            self._entries.append((body, name, attachment_type))
+            self._buffered_bytes += len(body)
+            # Keep the most recent exchanges: they are the ones closest to the failure.
+            while self._buffered_bytes > self.budget_bytes and len(self._entries) > 1:
+                dropped, _, _ = self._entries.popleft()
+                self._buffered_bytes -= len(dropped)
+                self._dropped += 1
+
+    @property
+    def buffered_bytes(self) -> int:
+        return self._buffered_bytes
+
+    def flush(self):
+        with self._lock:
+            entries, dropped = list(self._entries), self._dropped
+            self._clear()
+        if dropped:
+            allure.attach(
+                f"{dropped} earlier HTTP attachments were dropped to stay within "
+                f"the {self.budget_bytes} byte budget",
+                "HTTP attachments truncated", allure.attachment_type.TEXT
+            )
+        for body, name, attachment_type in entries:
+            allure.attach(self._decode(body), name, attachment_type)
+
+    def reset(self):
+        with self._lock:
+            self._clear()
+
+    def _clear(self):
+        self._entries.clear()
+        self._buffered_bytes = 0
+        self._dropped = 0
+
+    def _render(self, body: Body) -> str:
+        if callable(body):
+            body = body()
+        return self._decode(self._shorten(body))
+
+    @staticmethod
+    def _decode(body: Union[str, bytes]) -> str:
+        return body.decode("utf-8", errors="replace") if isinstance(body, bytes) else body
+
+    def _shorten(self, data):
+        if not self.max_body_bytes or len(data) <= self.max_body_bytes:
+            return data
+        if self.oversize == Oversize.SAMPLE:
+            return self._sample(data)
+        return self._truncate(data)
+
+    def _truncate(self, data):
+        """Keep the head and tail of oversized bodies, which is where JSON structure and errors live."""
+        half = self.max_body_bytes // 2
+        return data[:half] + self._marker(data, len(data) - 2 * half, "truncated") + data[-half:]
+
+    def _sample(self, data):
+        """Keep SAMPLE_SLICES evenly spaced slices, e.g. to see items from all over a long list."""
+        size = max(self.max_body_bytes // SAMPLE_SLICES, 1)
+        stride = (len(data) - size) / (SAMPLE_SLICES - 1)
+        starts = [round(index * stride) for index in range(SAMPLE_SLICES)]
+        pieces = [data[starts[0]:starts[0] + size]]
+        for previous, start in zip(starts, starts[1:]):
+            pieces.append(self._marker(data, start - previous - size, "skipped"))
+            pieces.append(data[start:start + size])
+        return data[:0].join(pieces)
+
+    @staticmethod
+    def _marker(data, count: int, verb: str):
+        marker = f"\n... [{count} bytes {verb}] ...\n"
+        return marker.encode() if isinstance(data, bytes) else marker
+
+
+http_attachments = AttachmentBuffer()
@@ -0,0 +1,87 @@
+import json
+import math
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from filelock import FileLock
+
+# Statistics compared against the baseline; the rest of a distribution is informational.
+COMPARED_STATS = ("p50", "p95")
+DEFAULT_TOLERANCE = {"p50": 0.25, "p95": 0.5}
+
+
+def percentile(samples: Iterable[float], q: float) -> float:
+    """Linear-interpolated percentile; benchmark samples are few, so they are kept exact."""
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    rank = (len(ordered) - 1) * q / 100
+    low, high = math.floor(rank), math.ceil(rank)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def distribution(samples: Iterable[float]) -> Dict[str, float]:
+    samples = list(samples)
+    return {
+        "count": len(samples),
+        "min": round(min(samples, default=0.0), 3),
+        "p50": round(percentile(samples, 50), 3),
+        "p95": round(percentile(samples, 95), 3),
+        "max": round(max(samples, default=0.0), 3),
+        "mean": round(sum(samples) / len(samples), 3) if samples else 0.0,
+    }
+
+
+class Baseline:
+    """
+    Stored benchmark distributions: {"tolerance": {stat: fraction}, "results": {name: distribution}}.
+
+    A measurement regresses when a compared statistic exceeds the baseline by more than its
+    tolerance band. Getting faster never fails; refresh the baseline with `update()` to lock
+    improvements in.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+
+    def _load(self) -> dict:
+        if not self.path.exists():
+            return {"tolerance": dict(DEFAULT_TOLERANCE), "results": {}}
+        return json.loads(self.path.read_text())
+
+    def get(self, name: str) -> Optional[Dict[str, float]]:
+        return self._load().get("results", {}).get(name)
+
+    def tolerance(self) -> Dict[str, float]:
+        return {**DEFAULT_TOLERANCE, **self._load().get("tolerance", {})}
+
+    def regressions(self, name: str, measured: Dict[str, float]) -> List[str]:
+        baseline = self.get(name)
+        if baseline is None:
+            return []
+        tolerance = self.tolerance()
+        failures = []
+        for stat in COMPARED_STATS:
+            limit = baseline[stat] * (1 + tolerance[stat])
+            if measured[stat] > limit:
+                failures.append(f"{name} {stat} {measured[stat]:.1f}s > {limit:.1f}s "
+                                f"(baseline {baseline[stat]:.1f}s +{tolerance[stat]:.0%})")
+        return failures
+
+    def update(self, name: str, measured: Dict[str, float]):
+        # Parametrized benchmarks may finish on several xdist workers at once.
+        with FileLock(str(self.path) + ".lock"):
+            data = self._load()
+            data.setdefault("results", {})[name] = measured
+            self.path.write_text(json.dumps(data, indent=2, sort_keys=True) + "\n")
+
+
+def format_distribution(name: str, samples: Iterable[float], measured: Dict[str, float],
+                        baseline: Optional[Dict[str, float]]) -> str:
+    lines = [f"{name}: " + " ".join(f"{key}={value}" for key, value in measured.items())]
+    if baseline is not None:
+        lines.append("baseline: " + " ".join(f"{key}={value}" for key, value in baseline.items()))
+    else:
+        lines.append("baseline: none recorded")
+    lines.append("samples (s): " + ", ".join(f"{sample:.1f}" for sample in sorted(samples)))
+    return "\n".join(lines)
@@ -0,0 +1,111 @@
+"""
+Time source for waits and the fake Control Panel.
+
+Code that polls or checks expiry asks `clock` instead of the time module, so an offline
+run can swap in a VirtualClock: sleeping advances virtual time instantly, which makes a
+600-second state transition or a 30-day token expiry a matter of milliseconds.
+"""
+import asyncio
+import threading
+import time
+from typing import Optional
+
+# Carries the sender's virtual time on API requests, so a fake server in another process
+# can judge token expiry by the clock of the worker that sent the request.
+VIRTUAL_TIME_HEADER = "X-Virtual-Time"
+
+
+class SystemClock:
+    """Real time."""
+
+    is_virtual = False
+
+    def time(self) -> float:
+        return time.time()
+
+    def monotonic(self) -> float:
+        return time.monotonic()
+
+    def sleep(self, seconds: float):
+        time.sleep(max(seconds, 0))
+
+    async def asleep(self, seconds: float):
+        await asyncio.sleep(max(seconds, 0))
+
+    def wait(self, event: threading.Event, timeout: float) -> bool:
+        """Event.wait that spends `timeout` on this clock."""
+        return event.wait(timeout)
+
+    async def wait_async(self, event: asyncio.Event, timeout: float) -> bool:
+        try:
+            await asyncio.wait_for(event.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+
+class VirtualClock(SystemClock):
+    """
+    Time that only moves when somebody sleeps or calls advance(); sleeping returns at once.
+
+    monotonic() keeps the offset to time() that the real clocks had at creation, so values
+    mix with timestamps taken before the clock was installed.
+    """
+
+    is_virtual = True
+
+    def __init__(self, start: Optional[float] = None):
+        self._now = time.time() if start is None else start
+        self._monotonic_offset = time.time() - time.monotonic()
+        self._lock = threading.Lock()
+
+    def time(self) -> float:
+        return self._now
+
+    def monotonic(self) -> float:
+        return self.time() - self._monotonic_offset
+
+    def advance(self, seconds: float) -> float:
+        with self._lock:
+            self._now += max(seconds, 0)
+            return self._now
+
+    def _elapse(self, seconds: float):
+        """Time passing while this process sleeps or waits."""
+        self.advance(seconds)
+
+    def sleep(self, seconds: float):
+        self._elapse(seconds)
+
+    async def asleep(self, seconds: float):
+        self._elapse(seconds)
+        # Still give other tasks a turn, as a real sleep would.
+        await asyncio.sleep(0)
+
+    def wait(self, event: threading.Event, timeout: float) -> bool:
+        if not event.is_set():
+            self._elapse(timeout)
+        return event.is_set()
+
+    async def wait_async(self, event: asyncio.Event, timeout: float) -> bool:
+        if not event.is_set():
+            await self.asleep(timeout)
+        return event.is_set()
+
+
+class _ClockProxy:
+    """The process-wide clock; `use()` swaps the implementation behind it."""
+
+    def __init__(self):
+        self.current = SystemClock()
+
+    def use(self, implementation: SystemClock) -> SystemClock:
+        """Install `implementation` and return the previous clock."""
+        previous, self.current = self.current, implementation
+        return previous
+
+    def __getattr__(self, name):
+        return getattr(self.current, name)
+
+
+clock = _ClockProxy()
@@ -0,0 +1,50 @@
+import re
+from functools import lru_cache
+from pathlib import Path
+from typing import List, Tuple
+
+import yaml
+
+OPENAPI_SPEC = Path(__file__).parent.parent / "openapi.yaml"
+
+_PARAM = re.compile(r"\{[^/]+\}")
+_ID_SEGMENT = re.compile(
+    r"^(?:[0-9a-fA-F]{8}-?[0-9a-fA-F]{4}-?[0-9a-fA-F]{4}-?[0-9a-fA-F]{4}-?[0-9a-fA-F]{12}"
+    r"|\d+|[0-9a-fA-F]{16,}|gts\..*)$"
+)
+
+
+@lru_cache(maxsize=1)
+def _route_patterns() -> List[Tuple[re.Pattern, str]]:
+    try:
+        with open(OPENAPI_SPEC, encoding="utf-8") as f:
+            paths = list((yaml.safe_load(f) or {}).get("paths", {}))
+    except OSError:
+        paths = []
+    # Literal routes first, so /v1/presets/types never matches /v1/presets/types/{id}.
+    paths.sort(key=lambda route: len(_PARAM.findall(route)))
+    patterns = []
+    for route in paths:
+        regex = "^" + _PARAM.sub("[^/]+", re.escape(route).replace(r"\{", "{").replace(r"\}", "}")) + "/?$"
+        patterns.append((re.compile(regex), route))
+    return patterns
+
+
+@lru_cache(maxsize=4096)
+def template_path(path: str) -> str:
+    """
+    Collapse a concrete request path to its route template, e.g.
+    /v1/ui/nodes/4f1c.../schedule-delete -> /v1/ui/nodes/{id}/schedule-delete.
+
+    Routes come from openapi.yaml; anything else (internal API, malformed ids used by
+    negative tests) falls back to replacing id-looking segments.
+    """
+    path = path.split("?", 1)[0] or "/"
+    for pattern, route in _route_patterns():
+        if pattern.match(path):
+            return route
+    return "/".join("{id}" if _ID_SEGMENT.match(segment) else segment for segment in path.split("/"))
+
+
+def endpoint_key(method: str, path: str) -> str:
+    return f"{method.upper()} {template_path(path)}"
@@ -1,97 +1,238 @@
+import atexit
+import heapq
 import logging
 import os
-from inspect import stack
-from json import dumps as json_dumps, JSONDecodeError
-from typing import Optional
+import queue
+from json import dumps as json_dumps, loads as json_loads, JSONDecodeError
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple, Union
 from pathlib import Path
 
 import httpx
 
-# Configure logging to file (in project root)
-LOG_FILE = Path(__file__).parent.parent / "pytest.log"
+from clients.api_response import APIResponse
+from utils.test_context import current_context
+
+# Log files live in the project root. Every xdist worker gets its own pair of files,
+# so parallel runs no longer truncate and interleave a single pytest.log.
+PROJECT_ROOT = Path(__file__).parent.parent
+WORKER_ID = os.environ.get("PYTEST_XDIST_WORKER", "master")
+LOG_FILE = PROJECT_ROOT / ("pytest.log" if WORKER_ID == "master" else f"pytest-{WORKER_ID}.log")
+LOG_DIR = PROJECT_ROOT / "logs"
+JSONL_FILE = LOG_DIR / f"http-{WORKER_ID}.jsonl"
+MERGED_JSONL_FILE = LOG_DIR / "http.jsonl"
+
+
+class _DeferredFormatQueueHandler(QueueHandler):
+    """
+    QueueHandler that leaves formatting to the listener thread.
+
+    The stock prepare() renders the message on the calling thread; HTTP records carry
+    a snapshot instead, so they can be formatted later without copying. The one live
+    part of the snapshot, the response's JSON decoder, is resolved here on the calling
+    thread, so the listener never touches the response object.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        exchange = getattr(record, "http", None)
+        if exchange is not None and "response_json" in exchange:
+            decode_json = exchange.pop("response_json")
+            # Only DEBUG output pretty-prints the body; at INFO nothing needs parsing.
+            if exchange["include_response_body"] and exchange["response_body"] \
+                    and log.isEnabledFor(logging.DEBUG):
+                try:
+                    exchange["response_document"] = decode_json()
+                except (JSONDecodeError, ValueError):
+                    pass
+        return record
+
+
+class HTTPTextFormatter(logging.Formatter):
+    """Human readable multi-line layout of pytest.log."""
+
+    def __init__(self, prefix: str = '%(asctime)s - %(levelname)s - '):
+        super().__init__(prefix + '%(message)s')
+        self.prefix = prefix
+
+    def format(self, record: logging.LogRecord) -> str:
+        exchange = getattr(record, "http", None)
+        if exchange is None:
+            return super().format(record)
+        lines = [
+            f"Context: {exchange['stage']} / {exchange['context']}",
+            f">REQ Url: {exchange['url']}",
+            f">REQ Common: {exchange['method']} / {exchange['status']}{exchange['elapsed_text']}",
+            f">REQ Headers: {exchange['request_headers']}",
+            f">REQ Body:\n{_decode_body(exchange['request_body'])}",
+            f"<RES Headers: {exchange['response_headers']}",
+        ]
+        if exchange["include_response_body"]:
+            # Re-indenting JSON is only worth it when someone asked for DEBUG output.
+            if "response_document" in exchange:
+                body = json_dumps(exchange["response_document"], sort_keys=True, indent=4)
+            else:
+                body = _decode_body(exchange['response_body'])
+            lines.append(
+                f"<RES Body:\n{body}"
+                "\n<---------------------------------------------------------\n"
+            )
+        record.asctime = self.formatTime(record, self.datefmt)
+        prefix = self.prefix % {"asctime": record.asctime, "levelname": record.levelname}
+        return "\n".join(prefix + line for line in lines)
+
+
+class HTTPJsonLinesFormatter(logging.Formatter):
+    """One compact JSON object per exchange; the shape used for merging and analysis."""
+
+    FIELDS = ("worker", "test_id", "context", "stage", "method", "url", "status",
+              "elapsed_ms", "request_bytes", "response_bytes")
+
+    def format(self, record: logging.LogRecord) -> str:
+        exchange = getattr(record, "http", None)
+        if exchange is None:
+            return json_dumps({"ts": record.created, "worker": WORKER_ID, "message": record.getMessage()})
+        entry = {"ts": record.created}
+        entry.update((field, exchange[field]) for field in self.FIELDS)
+        return json_dumps(entry)
+
+
+class _JsonLinesFilter(logging.Filter):
+    def filter(self, record: logging.LogRecord) -> bool:
+        return hasattr(record, "http")
+
+
+def _decode_body(body: Optional[bytes]) -> Optional[str]:
+    if not body:
+        return None
+    try:
+        return body.decode('utf-8')
+    except UnicodeDecodeError:
+        return f"<binary data: {len(body)} bytes>"
 
 
 # Create logger
 log = logging.getLogger("http_logger")
 log.setLevel(logging.INFO)
 
-# Avoid adding multiple handlers if module is reloaded
-if not log.handlers:
-    # File handler - overwrite on each test run
+_log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+_queue_handler = _DeferredFormatQueueHandler(_log_queue)
+_listener: Optional[QueueListener] = None
+
+
+def start_listener():
+    """
+    Open this process's log files and start the writer thread. Called from pytest_configure,
+    so importing the module has no side effects; safe to call more than once.
+    """
+    global _listener
+    if _listener is not None:
+        return
+    # File handler - overwrite on each test run (one file per xdist worker)
     file_handler = logging.FileHandler(LOG_FILE, mode='w', encoding='utf-8')
     file_handler.setLevel(logging.INFO)
-    file_formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
-    file_handler.setFormatter(file_formatter)
-    log.addHandler(file_handler)
-    
+    file_handler.setFormatter(HTTPTextFormatter())
+
+    LOG_DIR.mkdir(exist_ok=True)
+    jsonl_handler = logging.FileHandler(JSONL_FILE, mode='w', encoding='utf-8')
+    jsonl_handler.setLevel(logging.INFO)
+    jsonl_handler.setFormatter(HTTPJsonLinesFormatter())
+    jsonl_handler.addFilter(_JsonLinesFilter())
+
     # Console handler (optional - comment out if too verbose)
     console_handler = logging.StreamHandler()
     console_handler.setLevel(logging.INFO)
-    console_formatter = logging.Formatter('%(levelname)s - %(message)s')
-    console_handler.setFormatter(console_formatter)
-    log.addHandler(console_handler)
+    console_handler.setFormatter(HTTPTextFormatter(prefix='%(levelname)s - '))
+
+    # Request threads only enqueue; formatting and file I/O happen on the listener thread.
+    _listener = QueueListener(_log_queue, file_handler, jsonl_handler, console_handler,
+                              respect_handler_level=True)
+    _listener.start()
+    log.addHandler(_queue_handler)
+
+
+def stop_listener():
+    """Drain the queue, stop the writer thread and close the files. Safe to call more than once."""
+    global _listener
+    if _listener is not None:
+        log.removeHandler(_queue_handler)
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+
+atexit.register(stop_listener)
+
+
+def _timestamped_lines(lines: Iterable[str]) -> Iterator[Tuple[float, str]]:
+    for line in lines:
+        try:
+            ts = json_loads(line)["ts"]
+        except (ValueError, KeyError, TypeError):
+            continue  # blank, torn by a killed worker, or not an exchange
+        yield ts, line
+
+
+def merge_jsonl_logs(paths: Iterable[Path], destination: Path = MERGED_JSONL_FILE) -> Path:
+    """Merge per-worker JSON-lines logs into one time-ordered file. Each input is already ordered."""
+    files = [open(path, encoding='utf-8') for path in paths if Path(path).exists()]
+    try:
+        streams = [_timestamped_lines(f) for f in files]
+        with open(destination, "w", encoding='utf-8') as out:
+            for _, line in heapq.merge(*streams, key=lambda item: item[0]):
+                out.write(line if line.endswith("\n") else line + "\n")
+    finally:
+        for f in files:
+            f.close()
+    return destination
 
 
 class LogHTTPResponse:
-    def __init__(self, response: httpx.Response, stage: str, include_response_body: bool = True):
+    def __init__(self, response: Union[httpx.Response, APIResponse], stage: str, include_response_body: bool = True):
         self.stage = stage
-        if isinstance(response, httpx.Response):
-            self.response = response
+        if isinstance(response, APIResponse):
+            self.response, self.decode_json = response.raw, response.json
+        elif isinstance(response, httpx.Response):
+            self.response, self.decode_json = response, response.json
         else:
-            raise TypeError("LogHTTPResponse takes only httpx.Response type")
-        
+            raise TypeError("LogHTTPResponse takes only httpx.Response or APIResponse type")
+
         # Mask authorization header for security
         request_headers = dict(self.response.request.headers)
         if request_headers.get("authorization"):
             auth_value = request_headers["authorization"]
             request_headers["authorization"] = f'{auth_value[:10]}...{auth_value[-3:]}'
         self.request_headers = request_headers
-        
-        self._log_context()
-        self._log_request()
-        self._log_response(include_response_body)
-
-    def _log_context(self):
-        context_name = "unknown"
-        for elem in stack():
-            func_name = elem[3]
-            if "_fixture" in func_name or "_case" in func_name or "test_" in func_name:
-                context_name = func_name
-                break
-        log.info(f"Context: {self.stage} / {context_name}")
-
-    def _log_request(self):
+
+        log.info("HTTP %s %s", self.response.request.method, self.response.request.url,
+                 extra={"http": self._snapshot(include_response_body)})
+
+    def _snapshot(self, include_response_body: bool) -> Dict[str, Any]:
         request = self.response.request
+        context = current_context()
         elapsed = getattr(self.response, 'elapsed', None)
-        elapsed_str = f" / {elapsed}" if elapsed else ""
-        
-        log.info(f">REQ Url: {request.url}")
-        log.info(f">REQ Common: {request.method} / {self.response.status_code}{elapsed_str}")
-        log.info(f">REQ Headers: {self.request_headers}")
-        
-        body = self._get_request_body()
-        log.info(f">REQ Body:\n{body}")
-
-    def _get_request_body(self) -> Optional[str]:
-        request = self.response.request
-        if request.content:
-            try:
-                return request.content.decode('utf-8')
-            except UnicodeDecodeError:
-                return f"<binary data: {len(request.content)} bytes>"
-        return None
-
-    def _log_response(self, include_response_body: bool):
-        try:
-            body = json_dumps(self.response.json(), sort_keys=True, indent=4)
-        except (JSONDecodeError, ValueError):
-            body = self.response.text if len(self.response.text) > 0 else None
-        
-        log.info(f"<RES Headers: {dict(self.response.headers)}")
-        if include_response_body:
-            log.info(f"<RES Body:\n{body}\n<---------------------------------------------------------\n")
+        return {
+            "worker": WORKER_ID,
+            "test_id": context.test_id if context else None,
+            "context": context.label if context else "unknown",
+            "stage": self.stage,
+            "method": request.method,
+            "url": str(request.url),
+            "status": self.response.status_code,
+            "elapsed_ms": round(elapsed.total_seconds() * 1000, 3) if elapsed else None,
+            "elapsed_text": f" / {elapsed}" if elapsed else "",
+            "request_bytes": len(request.content),
+            "response_bytes": len(self.response.content),
+            "request_headers": self.request_headers,
+            "response_headers": dict(self.response.headers),
+            "request_body": request.content,
+            "response_body": self.response.content,
+            "response_json": self.decode_json,
+            "include_response_body": include_response_body,
+        }
 
 
-def log_response(response: httpx.Response, stage: str = "API", include_body: bool = True) -> httpx.Response:
+def log_response(response: Union[httpx.Response, APIResponse], stage: str = "API",
+                 include_body: bool = True) -> Union[httpx.Response, APIResponse]:
     LogHTTPResponse(response, stage, include_body)
     return response
@@ -0,0 +1,168 @@
+import json
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+from utils.endpoints import endpoint_key
+
+PERCENTILES = (50, 90, 95, 99)
+# 2**7 linear sub-buckets per power of two keeps every recorded value within 1% of its bucket.
+SUB_BUCKET_BITS = 7
+
+
+class Histogram:
+    """
+    HDR-style log-linear histogram of non-negative integers.
+
+    Counts are keyed by the lower bound of their bucket, which is all that is needed to
+    merge histograms from several workers without losing precision.
+    """
+
+    def __init__(self, counts: Optional[Dict[int, int]] = None):
+        self.counts: Dict[int, int] = dict(counts or {})
+
+    @staticmethod
+    def bucket(value: int) -> int:
+        shift = max(value.bit_length() - SUB_BUCKET_BITS - 1, 0)
+        return (value >> shift) << shift
+
+    @staticmethod
+    def bucket_top(lower: int) -> int:
+        """Highest value that falls into the bucket starting at `lower`."""
+        return lower + (1 << max(lower.bit_length() - SUB_BUCKET_BITS - 1, 0)) - 1
+
+    def record(self, value: int):
+        key = self.bucket(max(int(value), 0))
+        self.counts[key] = self.counts.get(key, 0) + 1
+
+    def merge(self, other: "Histogram"):
+        for key, count in other.counts.items():
+            self.counts[key] = self.counts.get(key, 0) + count
+
+    @property
+    def total(self) -> int:
+        return sum(self.counts.values())
+
+    def percentile(self, percentile: float) -> int:
+        total = self.total
+        if not total:
+            return 0
+        rank = max(int(total * percentile / 100 + 0.5), 1)
+        seen = 0
+        for key in sorted(self.counts):
+            seen += self.counts[key]
+            if seen >= rank:
+                return self.bucket_top(key)
+        return self.bucket_top(max(self.counts))
+
+    def summary(self) -> Dict[str, int]:
+        values = {f"p{p}": self.percentile(p) for p in PERCENTILES}
+        values["max"] = self.bucket_top(max(self.counts)) if self.counts else 0
+        return values
+
+    def to_dict(self) -> Dict[str, int]:
+        return {str(key): count for key, count in sorted(self.counts.items())}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, int]) -> "Histogram":
+        return cls({int(key): count for key, count in data.items()})
+
+
+class EndpointMetrics:
+    """Latency (microseconds) and payload sizes (bytes) of one `METHOD /templated/path`."""
+
+    def __init__(self):
+        self.latency_us = Histogram()
+        self.bytes_out = Histogram()
+        self.bytes_in = Histogram()
+        self.total_bytes_out = 0
+        self.total_bytes_in = 0
+
+    @property
+    def count(self) -> int:
+        return self.latency_us.total
+
+    def to_dict(self) -> dict:
+        return {
+            "latency_us": self.latency_us.to_dict(),
+            "bytes_out": self.bytes_out.to_dict(),
+            "bytes_in": self.bytes_in.to_dict(),
+            "total_bytes_out": self.total_bytes_out,
+            "total_bytes_in": self.total_bytes_in,
+        }
+
+    def merge(self, data: dict):
+        self.latency_us.merge(Histogram.from_dict(data["latency_us"]))
+        self.bytes_out.merge(Histogram.from_dict(data["bytes_out"]))
+        self.bytes_in.merge(Histogram.from_dict(data["bytes_in"]))
+        self.total_bytes_out += data["total_bytes_out"]
+        self.total_bytes_in += data["total_bytes_in"]
+
+    def report(self) -> dict:
+        latency = {key: round(value / 1000, 3) for key, value in self.latency_us.summary().items()}
+        return {
+            "count": self.count,
+            "latency_ms": latency,
+            "bytes_out": {"total": self.total_bytes_out, **self.bytes_out.summary()},
+            "bytes_in": {"total": self.total_bytes_in, **self.bytes_in.summary()},
+        }
+
+
+class HTTPMetrics:
+    """Per-endpoint histograms for every request made through APIClient in this process."""
+
+    def __init__(self):
+        self.endpoints: Dict[str, EndpointMetrics] = {}
+        self._lock = threading.Lock()
+
+    def record(self, method: str, path: str, elapsed_seconds: float, bytes_out: int, bytes_in: int):
+        key = endpoint_key(method, path)
+        with self._lock:
+            metrics = self.endpoints.get(key)
+            if metrics is None:
+                metrics = self.endpoints[key] = EndpointMetrics()
+            metrics.latency_us.record(int(elapsed_seconds * 1_000_000))
+            metrics.bytes_out.record(bytes_out)
+            metrics.bytes_in.record(bytes_in)
+            metrics.total_bytes_out += bytes_out
+            metrics.total_bytes_in += bytes_in
+
+    def record_response(self, response):
+        request = response.request
+        elapsed = getattr(response, "elapsed", None)
+        if elapsed is None:
+            return
+        self.record(request.method, request.url.path, elapsed.total_seconds(),
+                    len(request.content), len(response.content))
+
+    def to_dict(self) -> Dict[str, dict]:
+        with self._lock:
+            return {key: metrics.to_dict() for key, metrics in self.endpoints.items()}
+
+    def merge(self, data: Dict[str, dict]):
+        with self._lock:
+            for key, value in data.items():
+                self.endpoints.setdefault(key, EndpointMetrics()).merge(value)
+
+    def report(self) -> Dict[str, dict]:
+        with self._lock:
+            return {key: metrics.report() for key, metrics in sorted(self.endpoints.items())}
+
+    def write(self, path: Path) -> Path:
+        """Write percentiles plus the raw buckets, so separate runs can be merged again later."""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps({"endpoints": self.report(), "histograms": self.to_dict()}, indent=2))
+        return path
+
+
+http_metrics = HTTPMetrics()
+
+
+def format_latency_report(report: Dict[str, dict], columns: Iterable[str] = ("p50", "p90", "p95", "p99", "max")) -> str:
+    columns = tuple(columns)
+    header = f"{'endpoint':<60} {'count':>7} " + " ".join(f"{c + ' ms':>10}" for c in columns)
+    lines = [header]
+    for key, value in report.items():
+        latency = value["latency_ms"]
+        lines.append(f"{key:<60} {value['count']:>7} " + " ".join(f"{latency[c]:>10.1f}" for c in columns))
+    return "\n".join(lines)
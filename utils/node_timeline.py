@@ -0,0 +1,121 @@
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from utils.clock import clock
+from utils.test_context import current_label
+
+WORKER_ID = os.environ.get("PYTEST_XDIST_WORKER", "master")
+# Monotonic clocks are per process; this offset turns them into epoch time so the
+# observations of several workers line up when merged.
+_EPOCH_OFFSET = time.time() - time.monotonic()
+
+
+class NodeTimeline:
+    """
+    Every node state observed through NodesAPIClient, with monotonic timestamps.
+
+    Repeated observations of the same state only extend the current span, so polling
+    loops cost one dict update per response. Exported as Chrome trace-event JSON
+    (chrome://tracing, ui.perfetto.dev), one track per deployment: the spans xdist workers
+    send in are merged per node id, so a pool node polled by several workers still gets
+    a single track.
+    """
+
+    def __init__(self):
+        # node_id -> [[state, first_seen, last_seen, context], ...]
+        self.spans: Dict[str, List[list]] = {}
+        # Spans of other xdist workers, in epoch seconds, see merge().
+        self.merged: Dict[str, List[list]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, node_id: Optional[str], state: Optional[str], at: Optional[float] = None):
+        if not node_id or not state:
+            return
+        at = clock.monotonic() if at is None else at
+        node_id = node_id.lower()
+        with self._lock:
+            spans = self.spans.setdefault(node_id, [])
+            if spans and spans[-1][0] == state:
+                spans[-1][2] = at
+            else:
+                spans.append([state, at, at, current_label()])
+
+    def record_body(self, data):
+        """Record the states in a node API body: a node, a node list or a create/delete result."""
+        if not isinstance(data, dict):
+            return
+        at = clock.monotonic()
+        if "results" in data:
+            for item in data["results"]:
+                self.record(item.get("id"), item.get("status"), at)
+        else:
+            self.record(data.get("id") or data.get("deployment_id"), data.get("status") or data.get("state"), at)
+
+    def to_dict(self) -> Dict[str, List[list]]:
+        """This process's spans in epoch seconds, labelled with the worker, for merge() elsewhere."""
+        with self._lock:
+            return {
+                node_id: [[state, first_seen + _EPOCH_OFFSET, last_seen + _EPOCH_OFFSET, f"{WORKER_ID}: {context}"]
+                          for state, first_seen, last_seen, context in node_spans]
+                for node_id, node_spans in self.spans.items()
+            }
+
+    def merge(self, spans: Dict[str, List[list]]):
+        """Add a worker's to_dict()."""
+        with self._lock:
+            for node_id, node_spans in spans.items():
+                self.merged.setdefault(node_id, []).extend(list(span) for span in node_spans)
+
+    def _combined(self) -> Dict[str, List[list]]:
+        combined = self.to_dict()
+        with self._lock:
+            for node_id, node_spans in self.merged.items():
+                combined.setdefault(node_id, []).extend(list(span) for span in node_spans)
+        for node_id, node_spans in combined.items():
+            node_spans.sort(key=lambda span: span[1])
+            coalesced = []
+            for span in node_spans:
+                # Workers polling the same node see the same state; their spans overlap into one.
+                if coalesced and coalesced[-1][0] == span[0]:
+                    coalesced[-1][2] = max(coalesced[-1][2], span[2])
+                else:
+                    coalesced.append(span)
+            combined[node_id] = coalesced
+        return combined
+
+    def trace_events(self) -> List[dict]:
+        """Chrome "complete" events; a span lasts until the node was first seen in its next state."""
+        events = [{"name": "process_name", "ph": "M", "pid": 0, "tid": 0, "args": {"name": "deployments"}}]
+        tracks = sorted(self._combined().items(), key=lambda item: item[1][0][1])
+        for tid, (node_id, node_spans) in enumerate(tracks, start=1):
+            events.append({"name": "thread_name", "ph": "M", "pid": 0, "tid": tid, "args": {"name": node_id}})
+            for index, (state, first_seen, last_seen, context) in enumerate(node_spans):
+                end = node_spans[index + 1][1] if index + 1 < len(node_spans) else last_seen
+                events.append({
+                    "name": state,
+                    "cat": "node_state",
+                    "ph": "X",
+                    "pid": 0,
+                    "tid": tid,
+                    "ts": round(first_seen * 1_000_000),
+                    "dur": round((end - first_seen) * 1_000_000),
+                    "args": {"node_id": node_id, "observed_by": context},
+                })
+        return events
+
+    @property
+    def observed(self) -> bool:
+        return bool(self.spans) or bool(self.merged)
+
+
+node_timeline = NodeTimeline()
+
+
+def write_chrome_trace(events: List[dict], path: Path) -> Path:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps({"traceEvents": events, "displayTimeUnit": "ms"}))
+    return path
@@ -0,0 +1,67 @@
+import contextvars
+from contextlib import contextmanager
+from dataclasses import dataclass, replace
+from typing import Optional
+
+
+@dataclass(frozen=True)
+class RunContext:
+    """Which test (and, during setup, which fixture) the current code runs on behalf of."""
+    test_id: str
+    test_name: str
+    fixture: Optional[str] = None
+
+    @property
+    def label(self) -> str:
+        return self.fixture or self.test_name
+
+
+_context: contextvars.ContextVar[Optional[RunContext]] = contextvars.ContextVar("run_context", default=None)
+
+# Threads started by a test (e.g. ThreadPoolExecutor workers) do not inherit contextvars,
+# so the last context set by the pytest hooks is kept per process as a fallback.
+# Only one test runs at a time per process (xdist uses processes), which makes this safe.
+_process_context: Optional[RunContext] = None
+
+
+def is_xdist_worker(config) -> bool:
+    """True in an xdist worker process; the controller, and a run without xdist, are not workers."""
+    return hasattr(config, "workerinput")
+
+
+def current_context() -> Optional[RunContext]:
+    return _context.get() or _process_context
+
+
+def current_label(default: str = "unknown") -> str:
+    context = current_context()
+    return context.label if context else default
+
+
+def current_test_id() -> Optional[str]:
+    context = current_context()
+    return context.test_id if context else None
+
+
+@contextmanager
+def run_context(context: Optional[RunContext]):
+    global _process_context
+    previous = _process_context
+    token = _context.set(context)
+    _process_context = context
+    try:
+        yield context
+    finally:
+        _context.reset(token)
+        _process_context = previous
+
+
+@contextmanager
+def fixture_context(fixture_name: str):
+    context = current_context()
+    if context is None:
+        context = RunContext(test_id="", test_name="", fixture=fixture_name)
+    else:
+        context = replace(context, fixture=fixture_name)
+    with run_context(context):
+        yield context
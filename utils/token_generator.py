@@ -3,7 +3,7 @@ import json
 from faker import Faker
 import random
 import string
-import time
+from utils.clock import clock
 
 
 def generate_invalid_bearer_tokens():
@@ -20,7 +20,7 @@ def generate_invalid_bearer_tokens():
     ).decode().rstrip('=')
     
     valid_payload = base64.urlsafe_b64encode(
-        json.dumps({"sub": "1234567890", "name": str(faker.name()), "iat": int(time.time())}).encode()
+        json.dumps({"sub": "1234567890", "name": str(faker.name()), "iat": int(clock.time())}).encode()
     ).decode().rstrip('=')
     
     valid_signature = ''.join(random.choices(string.ascii_letters + string.digits + '-_', k=43))
@@ -90,8 +90,8 @@ def generate_invalid_refresh_tokens():
         json.dumps({
             "sub": faker.uuid4(),
             "type": "refresh",
-            "iat": int(time.time()),
-            "exp": int(time.time()) + 2592000  # 30 days
+            "iat": int(clock.time()),
+            "exp": int(clock.time()) + 2592000  # 30 days
         }).encode()
     ).decode().rstrip('=')
     
@@ -102,8 +102,8 @@ def generate_invalid_refresh_tokens():
         base64.urlsafe_b64encode(json.dumps({
             "sub": faker.uuid4(),
             "type": "access",
-            "iat": int(time.time()),
-            "exp": int(time.time()) + 3600
+            "iat": int(clock.time()),
+            "exp": int(clock.time()) + 3600
         }).encode()).decode().rstrip('=') + "." + valid_signature
     )
     
@@ -186,7 +186,7 @@ def generate_expired_token(
     Returns:
         str: An expired JWT token string
     """
-    now = int(time.time())
+    now = int(clock.time())
     exp = now - expired_seconds_ago  # Token expired in the past
     iat = exp - 300  # Issued 5 minutes before expiration
     nbf = iat
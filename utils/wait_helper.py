@@ -1,60 +1,321 @@
-import time
+import asyncio
+import inspect
+import threading
 import allure
-from typing import Callable, Any, Optional
+from dataclasses import dataclass
+from typing import Callable, Any, Dict, Optional, Union
+from utils.clock import clock
+
+PROGRESS_EVERY = 30
+
+
+class AsyncConditionError(TypeError):
+    """A coroutine check was handed to a sync waiter."""
+
+
+class Condition:
+    """
+    A named check that can be combined with `&` (all), `|` (any) and `~` (not).
+
+    The check may be a plain function or a coroutine function; conditions containing
+    coroutine checks can only be awaited through the async waiters.
+    """
+
+    def __init__(self, check: Callable[[], Any], description: Optional[str] = None):
+        self.check = check
+        self.description = description or getattr(check, "__name__", "condition")
+
+    def evaluate(self) -> bool:
+        result = self.check()
+        if inspect.isawaitable(result):
+            if inspect.iscoroutine(result):
+                result.close()  # never awaited; closing it avoids the "never awaited" warning
+            raise AsyncConditionError(f"{self.description} is async, use the *_async waiters")
+        return bool(result)
+
+    async def evaluate_async(self) -> bool:
+        result = self.check()
+        if inspect.isawaitable(result):
+            result = await result
+        return bool(result)
+
+    def __and__(self, other) -> "Condition":
+        return all_of(self, other)
+
+    def __or__(self, other) -> "Condition":
+        return any_of(self, other)
+
+    def __invert__(self) -> "Condition":
+        return not_(self)
+
+    def __repr__(self) -> str:
+        return f"Condition({self.description})"
+
+
+class _Composite(Condition):
+
+    def __init__(self, conditions, combine, joiner: str):
+        self.conditions = [as_condition(condition) for condition in conditions]
+        self.combine = combine
+        super().__init__(self._check, f" {joiner} ".join(f"({c.description})" for c in self.conditions))
+
+    def _check(self) -> bool:
+        return self.combine(condition.evaluate() for condition in self.conditions)
+
+    async def evaluate_async(self) -> bool:
+        # Evaluated in order and short-circuited, like the sync variant.
+        if self.combine is all:
+            for condition in self.conditions:
+                if not await condition.evaluate_async():
+                    return False
+            return True
+        for condition in self.conditions:
+            if await condition.evaluate_async():
+                return True
+        return False
+
+
+class _Not(Condition):
+
+    def __init__(self, condition):
+        self.condition = as_condition(condition)
+        super().__init__(lambda: not self.condition.evaluate(), f"not ({self.condition.description})")
+
+    async def evaluate_async(self) -> bool:
+        return not await self.condition.evaluate_async()
+
+
+def as_condition(condition: Union[Condition, Callable[[], Any]]) -> Condition:
+    return condition if isinstance(condition, Condition) else Condition(condition)
+
+
+def all_of(*conditions) -> Condition:
+    return _Composite(conditions, all, "and")
+
+
+def any_of(*conditions) -> Condition:
+    return _Composite(conditions, any, "or")
+
+
+def not_(condition) -> Condition:
+    return _Not(condition)
+
+
+@dataclass
+class WaitResult:
+    """Outcome of a wait. Truthy when the condition was met, so `if WaitHelper...:` keeps working."""
+    success: bool
+    description: str
+    elapsed: float
+    polls: int
+    timeout: float
+    last_error: Optional[str] = None
+
+    def __bool__(self) -> bool:
+        return self.success
+
+
+@dataclass
+class _WaitTotals:
+    waits: int = 0
+    timeouts: int = 0
+    polls: int = 0
+    seconds: float = 0.0
+    max_seconds: float = 0.0
+
+    def add(self, elapsed: float, polls: int, success: bool):
+        self.waits += 1
+        self.timeouts += 0 if success else 1
+        self.polls += polls
+        self.seconds += elapsed
+        self.max_seconds = max(self.max_seconds, elapsed)
+
+
+class WaitReport:
+    """Time spent waiting in this process, per wait description (virtual time when the clock is)."""
+
+    def __init__(self):
+        self.totals: Dict[str, _WaitTotals] = {}
+        self._lock = threading.Lock()
+
+    def record(self, description: str, elapsed: float, polls: int, success: bool):
+        with self._lock:
+            self.totals.setdefault(description, _WaitTotals()).add(elapsed, polls, success)
+
+    def to_dict(self) -> Dict[str, dict]:
+        with self._lock:
+            return {key: vars(value).copy() for key, value in self.totals.items()}
+
+    def merge(self, data: Dict[str, dict]):
+        with self._lock:
+            for key, value in data.items():
+                totals = self.totals.setdefault(key, _WaitTotals())
+                totals.waits += value["waits"]
+                totals.timeouts += value["timeouts"]
+                totals.polls += value["polls"]
+                totals.seconds += value["seconds"]
+                totals.max_seconds = max(totals.max_seconds, value["max_seconds"])
+
+    def format(self, limit: int = 20) -> Optional[str]:
+        with self._lock:
+            rows = sorted(self.totals.items(), key=lambda item: item[1].seconds, reverse=True)
+        if not rows:
+            return None
+        total = sum(value.seconds for _, value in rows)
+        lines = [f"{total:.1f}s spent waiting in {sum(value.waits for _, value in rows)} waits"]
+        for description, value in rows[:limit]:
+            lines.append(f"{value.seconds:8.1f}s  {value.waits:5} waits  {value.timeouts:3} timeouts  "
+                         f"max {value.max_seconds:6.1f}s  {description}")
+        return "\n".join(lines)
+
+
+wait_report = WaitReport()
+
+
+class _Waiter:
+    """Shared bookkeeping of the sync and async wait loops."""
+
+    def __init__(self, condition: Condition, timeout: float, poll_interval: float, description: str,
+                 backoff: float = 1.0, max_interval: Optional[float] = None):
+        self.condition = condition
+        self.timeout = timeout
+        self.interval = poll_interval
+        self.backoff = backoff
+        self.max_interval = max_interval or poll_interval
+        self.description = description
+        self.polls = 0
+        self.last_error: Optional[str] = None
+        self.started = clock.monotonic()
+        self.deadline = self.started + timeout
+        self.next_progress = self.started + PROGRESS_EVERY
+
+    def elapsed(self) -> float:
+        return clock.monotonic() - self.started
+
+    def failed_check(self, error: Exception):
+        self.last_error = str(error)
+        allure.attach(str(error), "Condition Check Error", allure.attachment_type.TEXT)
+
+    def next_sleep(self) -> Optional[float]:
+        """Seconds until the next poll, or None once the deadline has passed."""
+        now = clock.monotonic()
+        if now >= self.deadline:
+            return None
+        if now >= self.next_progress:
+            allure.attach(f"Still waiting... ({now - self.started:.0f}s / {self.timeout}s)",
+                          "Progress", allure.attachment_type.TEXT)
+            self.next_progress += PROGRESS_EVERY
+        delay = min(self.interval, self.deadline - now)
+        self.interval = min(self.interval * self.backoff, self.max_interval)
+        return delay
+
+    def finish(self, success: bool, error_message: Union[str, Callable[[], str], None] = None) -> WaitResult:
+        result = WaitResult(success, self.description, round(self.elapsed(), 3), self.polls, self.timeout,
+                            self.last_error)
+        wait_report.record(self.description, result.elapsed, result.polls, success)
+        if success:
+            allure.attach(f"Condition met after {result.elapsed:.1f} seconds ({result.polls} polls)",
+                          "Wait Result", allure.attachment_type.TEXT)
+        else:
+            if callable(error_message):
+                error_message = error_message()
+            msg = error_message or f"Timeout waiting for {self.description} after {self.timeout} seconds"
+            allure.attach(msg, "Timeout Error", allure.attachment_type.TEXT)
+        return result
+
+
+def _wait(waiter: _Waiter, wake: Optional[threading.Event], error_message) -> WaitResult:
+    while True:
+        waiter.polls += 1
+        try:
+            if waiter.condition.evaluate():
+                return waiter.finish(True)
+        except AsyncConditionError:
+            raise
+        except Exception as e:
+            waiter.failed_check(e)
+        delay = waiter.next_sleep()
+        if delay is None:
+            return waiter.finish(False, error_message)
+        if wake is None:
+            clock.sleep(delay)
+        elif clock.wait(wake, delay):
+            wake.clear()
+
+
+async def _wait_async(waiter: _Waiter, wake: Optional[asyncio.Event], error_message) -> WaitResult:
+    while True:
+        waiter.polls += 1
+        try:
+            if await waiter.condition.evaluate_async():
+                return waiter.finish(True)
+        except Exception as e:
+            waiter.failed_check(e)
+        delay = waiter.next_sleep()
+        if delay is None:
+            return waiter.finish(False, error_message)
+        if wake is None:
+            await clock.asleep(delay)
+        elif await clock.wait_async(wake, delay):
+            wake.clear()
 
 
 class WaitHelper:
+    """
+    Polling waiters with monotonic deadlines, measured and slept on `utils.clock.clock`.
+
+    Every waiter returns a WaitResult (truthy on success) and adds its duration to the
+    run-wide `wait_report`. Passing `wake`, a threading.Event (asyncio.Event for the async
+    variants), lets a producer trigger the next check immediately instead of sleeping out
+    the poll interval.
+    """
 
     @staticmethod
     @allure.step("Wait for condition: {description}")
     def wait_for_condition(
-        condition_func: Callable[[], bool],
+        condition_func: Union[Condition, Callable[[], bool]],
         timeout: int = 300,
         poll_interval: int = 5,
         description: str = "condition to be met",
-        error_message: Optional[str] = None
-    ) -> bool:
+        error_message: Optional[str] = None,
+        backoff: float = 1.0,
+        max_interval: Optional[float] = None,
+        wake: Optional[threading.Event] = None,
+    ) -> WaitResult:
         """
         Wait for a condition to become true.
-        
+
         Args:
-            condition_func: Function that returns True when condition is met
+            condition_func: Function or Condition that returns True when the condition is met
             timeout: Maximum time to wait in seconds
             poll_interval: Time between checks in seconds
             description: Description of what we're waiting for
             error_message: Custom error message if timeout occurs
-            
+            backoff: Factor the poll interval grows by after every miss
+            max_interval: Upper bound for the poll interval when backing off
+            wake: Event that cuts the current sleep short when set
+
         Returns:
-            True if condition met, False if timeout
+            WaitResult, truthy if the condition was met
         """
-        start_time = time.time()
-        elapsed = 0
-        
-        while elapsed < timeout:
-            try:
-                if condition_func():
-                    allure.attach(
-                        f"Condition met after {elapsed:.1f} seconds",
-                        "Wait Result",
-                        allure.attachment_type.TEXT
-                    )
-                    return True
-            except Exception as e:
-                allure.attach(str(e), "Condition Check Error", allure.attachment_type.TEXT)
-            
-            time.sleep(poll_interval)
-            elapsed = time.time() - start_time
-            
-            if elapsed % 30 == 0:
-                allure.attach(
-                    f"Still waiting... ({elapsed:.0f}s / {timeout}s)",
-                    "Progress",
-                    allure.attachment_type.TEXT
-                )
-        
-        msg = error_message or f"Timeout waiting for {description} after {timeout} seconds"
-        allure.attach(msg, "Timeout Error", allure.attachment_type.TEXT)
-        return False
+        waiter = _Waiter(as_condition(condition_func), timeout, poll_interval, description, backoff, max_interval)
+        return _wait(waiter, wake, error_message)
+
+    @staticmethod
+    async def wait_for_condition_async(
+        condition_func: Union[Condition, Callable[[], Any]],
+        timeout: int = 300,
+        poll_interval: int = 5,
+        description: str = "condition to be met",
+        error_message: Optional[str] = None,
+        backoff: float = 1.0,
+        max_interval: Optional[float] = None,
+        wake: Optional[asyncio.Event] = None,
+    ) -> WaitResult:
+        """Async variant of wait_for_condition; the condition may be a coroutine function."""
+        waiter = _Waiter(as_condition(condition_func), timeout, poll_interval, description, backoff, max_interval)
+        with allure.step(f"Wait for condition: {description}"):
+            return await _wait_async(waiter, wake, error_message)
 
     @staticmethod
     @allure.step("Wait for value: {description}")
@@ -64,24 +325,24 @@ class WaitHelper:
         timeout: int = 300,
         poll_interval: int = 5,
         description: str = "expected value"
-    ) -> bool:
+    ) -> WaitResult:
         """
         Wait for a function to return an expected value.
-        
+
         Args:
             value_func: Function that returns a value to check
             expected_value: The value we're waiting for
             timeout: Maximum time to wait in seconds
             poll_interval: Time between checks in seconds
             description: Description of what we're waiting for
-            
+
         Returns:
-            True if value matches, False if timeout
+            WaitResult, truthy if the value matched
         """
         def condition():
             actual = value_func()
             return actual == expected_value
-        
+
         return WaitHelper.wait_for_condition(
             condition,
             timeout,
@@ -89,6 +350,27 @@ class WaitHelper:
             f"{description} to equal {expected_value}"
         )
 
+    @staticmethod
+    async def wait_for_value_async(
+        value_func: Callable[[], Any],
+        expected_value: Any,
+        timeout: int = 300,
+        poll_interval: int = 5,
+        description: str = "expected value"
+    ) -> WaitResult:
+        async def condition():
+            actual = value_func()
+            if inspect.isawaitable(actual):
+                actual = await actual
+            return actual == expected_value
+
+        return await WaitHelper.wait_for_condition_async(
+            condition,
+            timeout,
+            poll_interval,
+            f"{description} to equal {expected_value}"
+        )
+
     @staticmethod
     @allure.step("Wait for state transition: {description}")
     def wait_for_state_transition(
@@ -97,52 +379,76 @@ class WaitHelper:
         timeout: int = 300,
         poll_interval: int = 5,
         description: str = "state transition"
-    ) -> bool:
+    ) -> WaitResult:
         """
         Wait for state to transition to target state.
-        
+
         Args:
             state_func: Function that returns current state
             target_state: The state we're waiting for
             timeout: Maximum time to wait in seconds
             poll_interval: Time between checks in seconds
             description: Description of the state transition
-            
+
         Returns:
-            True if state reached, False if timeout
+            WaitResult, truthy if the target state was reached
         """
-        start_time = time.time()
-        last_state = None
-        
-        while time.time() - start_time < timeout:
-            try:
-                current_state = state_func()
-                
-                if current_state != last_state:
-                    allure.attach(
-                        f"State changed: {last_state} -> {current_state}",
-                        "State Transition",
-                        allure.attachment_type.TEXT
-                    )
-                    last_state = current_state
-                
-                if current_state == target_state:
-                    elapsed = time.time() - start_time
-                    allure.attach(
-                        f"Target state '{target_state}' reached after {elapsed:.1f} seconds",
-                        "Success",
-                        allure.attachment_type.TEXT
-                    )
-                    return True
-                    
-            except Exception as e:
-                allure.attach(str(e), "State Check Error", allure.attachment_type.TEXT)
-            
-            time.sleep(poll_interval)
-        
-        allure.attach(
-            f"Timeout waiting for state '{target_state}'. Last state: {last_state}",
-            "Timeout Error",
-            allure.attachment_type.TEXT
+        tracker = _StateTracker(target_state)
+
+        def reached() -> bool:
+            return tracker.observe(state_func())
+
+        return WaitHelper.wait_for_condition(
+            reached,
+            timeout,
+            poll_interval,
+            description,
+            error_message=tracker.timeout_message,
         )
-        return False
+
+    @staticmethod
+    async def wait_for_state_transition_async(
+        state_func: Callable[[], Any],
+        target_state: str,
+        timeout: int = 300,
+        poll_interval: int = 5,
+        description: str = "state transition"
+    ) -> WaitResult:
+        """Async variant of wait_for_state_transition; state_func may be a coroutine function."""
+        tracker = _StateTracker(target_state)
+
+        async def reached() -> bool:
+            current_state = state_func()
+            if inspect.isawaitable(current_state):
+                current_state = await current_state
+            return tracker.observe(current_state)
+
+        with allure.step(f"Wait for state transition: {description}"):
+            return await WaitHelper.wait_for_condition_async(
+                reached,
+                timeout,
+                poll_interval,
+                description,
+                error_message=tracker.timeout_message,
+            )
+
+
+class _StateTracker:
+    """Attaches every state change seen while waiting for `target_state`."""
+
+    def __init__(self, target_state: str):
+        self.target_state = target_state
+        self.last_state = None
+
+    def observe(self, current_state) -> bool:
+        if current_state != self.last_state:
+            allure.attach(
+                f"State changed: {self.last_state} -> {current_state}",
+                "State Transition",
+                allure.attachment_type.TEXT
+            )
+            self.last_state = current_state
+        return current_state == self.target_state
+
+    def timeout_message(self) -> str:
+        return f"Timeout waiting for state '{self.target_state}'. Last state: {self.last_state}"